@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+import pymzml
+
+
+def main(n_points=200000, repeats=10):
+    """
+    Benchmark the centroiding of a synthetic Orbitrap-like profile spectrum
+    with :py:attr:`pymzml.spec.Spectrum.peaks`.
+
+    usage:
+
+        ./benchmark_centroiding.py <number_of_profile_points>
+
+    """
+    element = ElementTree.fromstring(
+        '<spectrum xmlns="http://psi.hupo.org/ms/mzml" id="scan=1">'
+        '<cvParam accession="MS:1000128" name="profile spectrum" value=""/>'
+        "</spectrum>"
+    )
+    translator = pymzml.obo.OboTranslator.from_cache("4.1.79")
+    translator["MS:1000128"]
+
+    rng = np.random.default_rng(0)
+    mz = np.linspace(200, 2000, n_points)
+    i = rng.uniform(1, 5, n_points)
+    for mu in rng.uniform(200, 2000, n_points // 100):
+        width = mu * 2e-6
+        window = np.abs(mz - mu) < 5 * width
+        i[window] += rng.uniform(1e3, 1e6) * np.exp(
+            -((mz[window] - mu) ** 2) / (2 * width**2)
+        )
+    peaks = np.column_stack((mz, i))
+
+    timings = []
+    for _ in range(repeats):
+        spectrum = pymzml.spec.Spectrum(element, obo_version="4.1.79")
+        spectrum.obo_translator = translator
+        spectrum.set_peaks(peaks, "raw")
+        start = time.perf_counter()
+        centroided = spectrum.peaks("centroided")
+        timings.append(time.perf_counter() - start)
+    print(
+        "Centroided {0} profile points into {1} peaks in {2:.2f} ms "
+        "(best of {3})".format(
+            n_points, len(centroided), min(timings) * 1000, repeats
+        )
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(n_points=int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+import base64
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ElementTree
+import zlib
+
+import numpy as np
+import pymzml
+
+BINARY_DATA_ARRAY = (
+    '<binaryDataArray encodedLength="{length}">'
+    '<cvParam cvRef="MS" accession="{type_accession}" name="{type_name}" value=""/>'
+    '<cvParam cvRef="MS" accession="MS:1000574" name="zlib compression" value=""/>'
+    '<cvParam cvRef="MS" accession="{array_accession}" name="{array_name}" '
+    'value=""/>'
+    "<binary>{binary}</binary>"
+    "</binaryDataArray>"
+)
+
+
+def _encode(array):
+    return base64.b64encode(zlib.compress(array.tobytes())).decode("ascii")
+
+
+def main(n_points=100000, repeats=10):
+    """
+    Benchmark the decoding of the m/z and intensity arrays of a synthetic
+    zlib compressed spectrum, reporting time and bytes allocated per spectrum
+    for accessing mz, i and :py:meth:`pymzml.spec.Spectrum.peaks`.
+
+    usage:
+
+        ./benchmark_decoding.py <number_of_points>
+
+    """
+    rng = np.random.default_rng(0)
+    mz = np.sort(rng.uniform(200, 2000, n_points))
+    i = rng.uniform(0, 1e6, n_points).astype(np.float32)
+    arrays = []
+    for array, type_accession, type_name, array_accession, array_name in (
+        (mz, "MS:1000523", "64-bit float", "MS:1000514", "m/z array"),
+        (i, "MS:1000521", "32-bit float", "MS:1000515", "intensity array"),
+    ):
+        binary = _encode(array)
+        arrays.append(
+            BINARY_DATA_ARRAY.format(
+                length=len(binary),
+                type_accession=type_accession,
+                type_name=type_name,
+                array_accession=array_accession,
+                array_name=array_name,
+                binary=binary,
+            )
+        )
+    xml = (
+        '<spectrum xmlns="http://psi.hupo.org/ms/mzml" id="scan=1" '
+        'defaultArrayLength="{0}"><binaryDataArrayList count="2">{1}'
+        "</binaryDataArrayList></spectrum>".format(n_points, "".join(arrays))
+    )
+    translator = pymzml.obo.OboTranslator.from_cache("4.1.79")
+    translator["MS:1000523"]
+
+    timings = []
+    allocated = []
+    retained = []
+    for _ in range(repeats):
+        spectrum = pymzml.spec.Spectrum(
+            ElementTree.fromstring(xml), obo_version="4.1.79"
+        )
+        spectrum.obo_translator = translator
+        tracemalloc.start()
+        start = time.perf_counter()
+        spectrum.mz
+        spectrum.i
+        spectrum.peaks("raw")
+        timings.append(time.perf_counter() - start)
+        current, peak = tracemalloc.get_traced_memory()
+        allocated.append(peak)
+        retained.append(current)
+        tracemalloc.stop()
+    print(
+        "Decoded {0} points in {1:.2f} ms, peak allocation {2:.2f} MB, "
+        "retained {3:.2f} MB per spectrum (best of {4})".format(
+            n_points,
+            min(timings) * 1000,
+            min(allocated) / 1e6,
+            min(retained) / 1e6,
+            repeats,
+        )
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(n_points=int(sys.argv[1]))
+    else:
+        main()
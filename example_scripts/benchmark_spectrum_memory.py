@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+import base64
+import sys
+import tracemalloc
+import xml.etree.ElementTree as ElementTree
+import zlib
+
+import numpy as np
+import pymzml
+
+SPECTRUM = (
+    '<spectrum xmlns="http://psi.hupo.org/ms/mzml" index="{index}" '
+    'id="scan={scan}" defaultArrayLength="{n_points}">'
+    '<cvParam cvRef="MS" accession="MS:1000511" name="ms level" value="1"/>'
+    '<cvParam cvRef="MS" accession="MS:1000127" name="centroid spectrum" '
+    'value=""/>'
+    "<scanList><scan>"
+    '<cvParam cvRef="MS" accession="MS:1000016" name="scan start time" '
+    'value="{rt}" unitAccession="UO:0000031" unitName="minute"/>'
+    "</scan></scanList>"
+    '<binaryDataArrayList count="2">{arrays}</binaryDataArrayList>'
+    "</spectrum>"
+)
+
+BINARY_DATA_ARRAY = (
+    '<binaryDataArray encodedLength="{length}">'
+    '<cvParam cvRef="MS" accession="{type_accession}" name="{type_name}" value=""/>'
+    '<cvParam cvRef="MS" accession="MS:1000574" name="zlib compression" value=""/>'
+    '<cvParam cvRef="MS" accession="{array_accession}" name="{array_name}" '
+    'value=""/>'
+    "<binary>{binary}</binary>"
+    "</binaryDataArray>"
+)
+
+
+def _encode(array):
+    return base64.b64encode(zlib.compress(array.tobytes())).decode("ascii")
+
+
+def main(n_spectra=10000, n_points=100):
+    """
+    Benchmark the memory retained by spectra that are kept alive after
+    reading, e.g. for the alignment of several runs. Every synthetic
+    spectrum has its ms level, scan time, m/z and intensity arrays and raw
+    peaks accessed before it is retained, once with its xml element and
+    once after :py:meth:`pymzml.spec.Spectrum.detach`.
+
+    usage:
+
+        ./benchmark_spectrum_memory.py <number_of_spectra> <number_of_points>
+
+    """
+    rng = np.random.default_rng(0)
+    arrays = []
+    for array, type_accession, type_name, array_accession, array_name in (
+        (
+            np.sort(rng.uniform(200, 2000, n_points)),
+            "MS:1000523",
+            "64-bit float",
+            "MS:1000514",
+            "m/z array",
+        ),
+        (
+            rng.uniform(0, 1e6, n_points).astype(np.float32),
+            "MS:1000521",
+            "32-bit float",
+            "MS:1000515",
+            "intensity array",
+        ),
+    ):
+        binary = _encode(array)
+        arrays.append(
+            BINARY_DATA_ARRAY.format(
+                length=len(binary),
+                type_accession=type_accession,
+                type_name=type_name,
+                array_accession=array_accession,
+                array_name=array_name,
+                binary=binary,
+            )
+        )
+    arrays = "".join(arrays)
+    documents = [
+        SPECTRUM.format(
+            index=n, scan=n + 1, n_points=n_points, rt=n / 100.0, arrays=arrays
+        )
+        for n in range(n_spectra)
+    ]
+    translator = pymzml.obo.OboTranslator.from_cache("4.1.79")
+    translator.accessions
+
+    for detach in (False, True):
+        tracemalloc.start()
+        spectra = []
+        array_bytes = 0
+        for document in documents:
+            spectrum = pymzml.spec.Spectrum(
+                ElementTree.fromstring(document), obo_version="4.1.79"
+            )
+            spectrum.obo_translator = translator
+            spectrum.ms_level
+            spectrum.scan_time_in_minutes()
+            if detach:
+                spectrum.detach()
+            array_bytes += spectrum.mz.nbytes + spectrum.i.nbytes
+            array_bytes += spectrum.peaks("raw").nbytes
+            spectra.append(spectrum)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del spectra
+        print(
+            "Retained {0} {1} spectra with {2} points: {3:.0f} bytes per "
+            "spectrum, {4:.0f} bytes of it in numpy arrays".format(
+                n_spectra,
+                "detached" if detach else "attached",
+                n_points,
+                retained / n_spectra,
+                array_bytes / n_spectra,
+            )
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        main(n_spectra=int(sys.argv[1]), n_points=int(sys.argv[2]))
+    elif len(sys.argv) > 1:
+        main(n_spectra=int(sys.argv[1]))
+    else:
+        main()
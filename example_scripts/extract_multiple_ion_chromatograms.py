@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+
+import os
+
+import pymzml
+
+
+def main():
+    """
+    Demonstration of the extraction of many ion chromatograms (XIC or EIC) in a
+    single pass over a run, using :py:class:`pymzml.xic.XICExtractor`.
+
+    usage:
+
+        ./extract_multiple_ion_chromatograms.py
+
+    """
+
+    example_file = os.path.join(
+        os.path.dirname(__file__), os.pardir, "tests", "data", "example.mzML"
+    )
+    run = pymzml.run.Reader(example_file)
+    extractor = pymzml.xic.XICExtractor(
+        [70.06575775, 136.06178],
+        precision=5e-6,
+        ids=["Proline immonium ion", "Adenine"],
+    )
+    for chromatogram in extractor.extract(run):
+        print(chromatogram.ID)
+        print("RT   \ti")
+        for rt, i in zip(chromatogram.time, chromatogram.i):
+            print("{0:5.3f}\t{1:13.4f}".format(rt, i))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -25,24 +25,49 @@ Copyright (C) 2010-2019 M. Kösters, C. Fufezan
     SOFTWARE.
 """
 
-__all__ = ["run", "spec", "chromatogram", "obo", "minimum", "plot", "file_classes"]
+__all__ = [
+    "run",
+    "spec",
+    "chromatogram",
+    "obo",
+    "minimum",
+    "plot",
+    "file_classes",
+    "xic",
+]
 
 import sys
 
 if not hasattr(sys, "version_info") or sys.version_info < (3, 4):
     raise RuntimeError("pymzML requires Python 3.4 or later.")
 
-# Set version
-from importlib.metadata import version
+import importlib
 
-__version__ = version("pymzml").rstrip(".dev0")
-
-# Imports of individual modules
 import pymzml.run
 import pymzml.spec
 import pymzml.chromatogram
-from pymzml.spec import MSDecoder
 from pymzml.chromatogram import Chromatogram
 import pymzml.obo
-import pymzml.plot
-import pymzml.utils
+
+# submodules and attributes which are only imported on first access (PEP 562),
+# so scripts which only iterate spectra do not pay for plotting, numpress,
+# conversion utils or package metadata
+_LAZY_SUBMODULES = {"plot", "xic", "utils", "decoder", "ms_numpress"}
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module("{0}.{1}".format(__name__, name))
+    if name == "MSDecoder":
+        return importlib.import_module("pymzml.decoder").MSDecoder
+    if name == "__version__":
+        from importlib.metadata import version
+
+        global __version__
+        __version__ = version("pymzml").rstrip(".dev0")
+        return __version__
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_SUBMODULES | {"MSDecoder", "__version__"})
@@ -34,7 +34,7 @@ There each chromatogram is accessible as a chromatogram object.
 #     SOFTWARE.
 
 import re
-import numpy as np
+import sys
 from .msdata import MsData
 from .obo import OboTranslator
 
@@ -44,6 +44,28 @@ class Chromatogram(MsData):
     Class for Chromatogram access and handling.
     """
 
+    __slots__ = [
+        "_centroided_peaks",
+        "_centroided_peaks_sorted_by_i",
+        "_centroidedPeaks",
+        "_chromatogram_type",
+        "_deconvoluted_peaks",
+        "_extreme_values",
+        "_ID",
+        "_ms_level",
+        "_peaks",
+        "_polarity",
+        "_precursor_mz",
+        "_precursors",
+        "_product_mz",
+        "_reprofiled_peaks",
+        "_reprofiledPeaks",
+        "_t_mass_set",
+        "_t_mz_set",
+        "_transformed_mass_with_error",
+        "_transformed_mz_with_error",
+    ]
+
     def __init__(self, element, measured_precision=5e-6, *, obo_version=None):
         """
         Arguments:
@@ -55,7 +77,7 @@ class Chromatogram(MsData):
         """
         self._measured_precision = measured_precision
         self.element = element
-        self.noise_level_estimate = {}
+        self._noise_level_estimate = None
         # Property variables
         self._time = None
         self._ms_level = None
@@ -77,19 +99,17 @@ class Chromatogram(MsData):
         self._precursor_mz = None
         self._product_mz = None
         self._polarity = None
+        self._params = None
+        self._binary_arrays = None
         self.obo_translator = OboTranslator.from_cache(obo_version)
 
         if self.element:
             self.ns = (
-                re.match(r"\{.*\}", element.tag).group(0)
+                sys.intern(re.match(r"\{.*\}", element.tag).group(0))
                 if re.match(r"\{.*\}", element.tag)
                 else ""
             )
 
-        self._decode = self._decode_to_numpy
-        # assign function to create numpy array to list???
-        self._array = np.array
-
     def __repr__(self):
         """
         Returns representative string for a chromatogram object class
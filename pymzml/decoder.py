@@ -7,27 +7,47 @@ Classes to encode and decode :py:attr:`~pymzml.spec.Spectrum.mz` and
 """
 
 import warnings
-import zlib
-from base64 import b64decode as b64dec
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
 
-import numpy as np
+from .chromatogram import Chromatogram
+from .msdata import _decode_binary
 
-# Global PyNump decoder
-try:
-    # try to import c-accelerated Numpress decoding
-    import pynumpress
+# Global PyNump decoder, imported on first use via _ms_decoder()
+_MS_DECODER = None
 
-    MSDecoder = pynumpress
-except ImportError:
-    # fall back to python-only implementation of numpress decoding
-    import pymzml.ms_numpress
 
-    warnings.warn(
-        "Cython PyNumpress is not installed; falling back to slower, python-only version",
-        ImportWarning,
-    )
-    MSDecoder = pymzml.ms_numpress.MSNumpress()
+def _ms_decoder():
+    """
+    Import the numpress decoder on first use.
+
+    Returns:
+        decoder: pynumpress or, if it is not installed, an instance of the
+            python-only :py:class:`~pymzml.ms_numpress.MSNumpress`
+    """
+    global _MS_DECODER
+    if _MS_DECODER is None:
+        try:
+            # try to import c-accelerated Numpress decoding
+            import pynumpress
+
+            _MS_DECODER = pynumpress
+        except ImportError:
+            # fall back to python-only implementation of numpress decoding
+            from . import ms_numpress
+
+            warnings.warn(
+                "Cython PyNumpress is not installed; falling back to slower, "
+                "python-only version",
+                ImportWarning,
+            )
+            _MS_DECODER = ms_numpress.MSNumpress()
+    return _MS_DECODER
+
+
+def __getattr__(name):
+    if name == "MSDecoder":
+        return _ms_decoder()
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
 
 
 def _decode(data, comp, d_array_length, f_type, d_type):
@@ -42,58 +62,48 @@ def _decode(data, comp, d_array_length, f_type, d_type):
         d_type (str): type of data (mz, i, or time)
 
     Returns:
-        result (tuple(str, list)): tuple containing the datatype and the
-        decompressed data list.
+        result (tuple(str, np.ndarray)): tuple containing the datatype and the
+        decompressed data array.
     """
-    if f_type == "32-bit float":
-        f_type = np.float32
-    elif f_type == "64-bit float":
-        f_type = np.float64
-    else:
-        f_type = None
-
-    decoded_data = b64dec(data)
-    if "zlib" in comp or "zlib compression" in comp:
-        decoded_data = zlib.decompress(decoded_data)
-
-    if (
-        "ms-np-linear" in comp
-        or "ms-np-pic" in comp
-        or "ms-np-slof" in comp
-        or "MS-Numpress linear prediction compression" in comp
-        or "MS-Numpress short logged float compression" in comp
-    ):
-        result = []
-        # start ms numpress decoder globally?
-        if (
-            "ms-np-linear" in comp
-            or "MS-Numpress linear prediction compression" in comp
-        ):
-            result = MSDecoder.decodeLinear(decoded_data)
-        elif "ms-np-pic" in comp:
-            result = MSDecoder.decode_pic(decoded_data)
-        elif (
-            "ms-np-slof" in comp or "MS-Numpress short logged float compression" in comp
-        ):
-            result = MSDecoder.decode_slof(decoded_data)
-        return (d_type, result)
-
-    array = np.fromstring(decoded_data, f_type)
-    return (d_type, array)
+    return (d_type, _decode_binary(data, d_array_length, f_type, comp))
 
 
 class Decoder:
     """
     Decoder class to enable parallel decoding of peaks.
 
+    The pool is created once and reused for all calls until
+    :py:meth:`close` is called. By default a thread pool is used, since
+    zlib decompression releases the GIL and the decoded arrays do not need
+    to be copied between processes.
+
     Keyword Args:
-        nb_worker(int): number of pool workers to use. Defaults to 2.
+        nb_workers (int): number of pool workers to use. Defaults to 2.
+        executor (str): either 'thread' or 'process'
     """
 
-    def __init__(self, nb_workers=2):
+    def __init__(self, nb_workers=2, executor="thread"):
         """ """
-        self._mz = None
-        self._i = None
+        if executor == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=nb_workers)
+        elif executor == "process":
+            # imported here, multiprocessing is slow to import and rarely needed
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._pool = ProcessPoolExecutor(max_workers=nb_workers)
+        else:
+            raise ValueError("Unknown executor ({0})".format(executor))
+        self.nb_workers = nb_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        """Shut down the pool."""
+        self._pool.shutdown(wait=True)
 
     # @profile
     def pool_decode(self, data, callback):
@@ -101,19 +111,95 @@ class Decoder:
         Decode mz and i values in parallel.
 
         Args:
-            data (): ...
+            data (list): argument tuples for :py:func:`_decode`, i.e. (data,
+                compression, array length, float type, data type)
 
         Keyword Args:
             callback (:obj:`func`): Callback function to call if decoding is
                 finished. Should be :py:meth:`~pymzml.spec.Spectrum._register`.
+
+        Returns:
+            results (list): (data type, array) tuples in the order of data
         """
-        ZE_POOL = Pool(processes=2)
+        futures = [self._pool.submit(_decode, *params) for params in data]
+        results = [future.result() for future in futures]
+        for result in results:
+            callback(result)
+        return results
 
-        ZE_POOL.starmap(_decode, data)
+    def submit(self, element):
+        """
+        Start decoding all binary arrays of a spectrum or chromatogram that
+        have not been decoded yet.
 
-    def _error_callback(self, result):
-        """ """
-        raise Exception("Failed with error:\n{0}".format(result))
+        Args:
+            element (Spectrum or Chromatogram): element to decode
+
+        Returns:
+            futures (list): futures of (data type, array) tuples, see
+                :py:meth:`register`
+        """
+        futures = []
+        for array_type, d_type in _decode_targets(element):
+            data, d_array_length, f_type, comp = element._get_encoding_parameters(
+                array_type
+            )
+            futures.append(
+                self._pool.submit(_decode, data, comp, d_array_length, f_type, d_type)
+            )
+        return futures
+
+    @staticmethod
+    def register(element, futures):
+        """
+        Wait for the futures returned by :py:meth:`submit` and register the
+        decoded arrays on the element.
+
+        Args:
+            element (Spectrum or Chromatogram): element the futures belong to
+            futures (list): futures returned by :py:meth:`submit`
+
+        Returns:
+            element (Spectrum or Chromatogram): the decoded element
+        """
+        for future in futures:
+            element._register(future.result())
+        return element
+
+    def decode_spectra(self, elements):
+        """
+        Decode the binary arrays of many spectra or chromatograms at once.
+
+        Args:
+            elements (iterable): spectra and/or chromatograms
+
+        Returns:
+            elements (list): the decoded elements
+        """
+        submitted = [(element, self.submit(element)) for element in elements]
+        return [self.register(element, futures) for element, futures in submitted]
+
+
+def _decode_targets(element):
+    """
+    List the arrays of an element that still need to be decoded.
+
+    Args:
+        element (Spectrum or Chromatogram): element to decode
+
+    Returns:
+        targets (list): (array type, data type) tuples as expected by
+            :py:func:`_decode` and :py:meth:`MsData._register`
+    """
+    targets = []
+    if isinstance(element, Chromatogram):
+        if element._time is None:
+            targets.append(("time array", "time"))
+    elif element._mz is None:
+        targets.append(("m/z array", "mz"))
+    if element._i is None:
+        targets.append(("intensity array", "i"))
+    return targets
 
 
 if __name__ == "__main__":
@@ -22,6 +22,9 @@ class BytesMzml(StandardMzml):
             encoding (str) : encoding of the file
         """
         self.binary = binary
+        self.encoding = encoding
+        self._mmap = None
+        self._sorted_offsets = None
         self.file_handler = self.get_file_handler(encoding)
         self.offset_dict = dict()
         self.spec_open = regex_patterns.SPECTRUM_OPEN_PATTERN
@@ -31,6 +34,10 @@ class BytesMzml(StandardMzml):
             self._build_index_from_scratch(seeker)
             seeker.close()
 
+    def _get_buffer(self):
+        """In-memory streams are read through the file handlers."""
+        return None
+
     def get_binary_file_handler(self):
         self.binary.seek(0)
         return self.binary
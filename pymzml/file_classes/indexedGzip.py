@@ -34,19 +34,23 @@ from xml.etree.ElementTree import XML
 
 from .. import spec
 from .. import chromatogram
-from ..utils.GSGR import GSGR
 
 
 class IndexedGzip:
-    def __init__(self, path, encoding):
+    def __init__(self, path, encoding, block_cache_size=8):
         """
         Initialize Wrapper object for indexed gzipped files.
 
         Arguments:
             path (str)     : path to the file
             encoding (str) : encoding of the file
+
+        Keyword Arguments:
+            block_cache_size (int) : number of decompressed blocks kept in
+                memory for files written with blocks
         """
         self.path = path
+        self.block_cache_size = block_cache_size
         self.file_handler = codecs.getreader(encoding)(gzip.open(path))
         self.offset_dict = dict()
         self._build_index()
@@ -58,7 +62,9 @@ class IndexedGzip:
 
     def _build_index(self):
         """Use the GSGR class to retrieve the index from the file and save it."""
-        self.Reader = GSGR(self.path)
+        from ..utils.GSGR import GSGR
+
+        self.Reader = GSGR(self.path, block_cache_size=self.block_cache_size)
         self.offset_dict = self.Reader.index
 
     def read(self, size=-1):
@@ -26,38 +26,254 @@ Interface for gzipped mzML files.
 #     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #     SOFTWARE.
 
+import bisect
 import codecs
 import gzip
-from xml.etree.ElementTree import iterparse
+import zlib
+from xml.etree.ElementTree import XMLParser, iterparse
+
+from logging import getLogger
 
 from .. import regex_patterns
 from .. import spec
 from .. import chromatogram
 
+logger = getLogger(__name__)
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
 
 class StandardGzip(object):
-    def __init__(self, path, encoding):
+    def __init__(
+        self,
+        path,
+        encoding,
+        persistent_index=False,
+        checkpoint_spacing=2**23,
+        chunk_size=2**16,
+        checkpoint_index=None,
+    ):
         """
         Initalize Wrapper object for gzipped mzML files.
 
+        Random access is provided by a checkpoint index, which is built by
+        decompressing the file once on the first access by id: the
+        uncompressed offsets of all spectra and chromatograms are collected
+        and a copy of the decompressor state is kept every
+        checkpoint_spacing uncompressed bytes. Afterwards, every lookup only
+        decompresses the data between the nearest checkpoint and the
+        requested element.
+
         Arguments:
             path (str)     : path to the file
             encoding (str) : encoding of the file
+
+        Keyword Arguments:
+            persistent_index (bool): store the offsets in a sidecar file
+                (``<path>.pymzml-idx``) and load them on later opens
+            checkpoint_spacing (int): number of uncompressed bytes between
+                two checkpoints
+            chunk_size (int): number of compressed bytes decompressed at once
+            checkpoint_index (tuple): :py:attr:`checkpoint_index` of another
+                instance of the same file, used instead of building the
+                index again, e.g. when the file is reopened
         """
         self.path = path
+        self.encoding = encoding
+        self.persistent_index = persistent_index
+        self.checkpoint_spacing = checkpoint_spacing
+        self.chunk_size = chunk_size
         self.file_handler = codecs.getreader(encoding)(gzip.open(path))
-        self.offset_dict = self._build_index()
+        self.offset_dict = {}
+        self._indexed = False
+        self._checkpoints = []
+        self._checkpoint_positions = []
+        if checkpoint_index is not None:
+            self.offset_dict, self._checkpoints, self._checkpoint_positions = (
+                checkpoint_index
+            )
+            self._indexed = True
+            return
+        self._add_checkpoint(0, 0, zlib.decompressobj(GZIP_WBITS))
+        if persistent_index is True:
+            self._load_persistent_index()
         return
 
+    @property
+    def checkpoint_index(self):
+        """
+        Offset dict and checkpoints of the file, shared with the instances
+        created with it.
+
+        Returns:
+            checkpoint_index (tuple): offset dict, checkpoints and their
+                uncompressed positions or None if the index has not been
+                built yet
+        """
+        if self._indexed is False:
+            return None
+        return self.offset_dict, self._checkpoints, self._checkpoint_positions
+
     def close(self):
         self.file_handler.close()
 
     def _build_index(self):
         """
-        Cant build index for standard gzip files
+        Decompress the whole file once, collect the uncompressed offsets of
+        all spectra and chromatograms and set checkpoints on the way.
+
+        Spectra are stored with their native id string and, if the id ends
+        with a number, with this number as well.
+        """
+        chromexp = regex_patterns.INDEX_CHROMATOGRAM_PATTERN
+        specexp = regex_patterns.INDEX_SPECTRUM_PATTERN
+        lookback_size = 100
+        chrom_positions = {}
+        spec_positions = {}
+        prev_chunk = b""
+        position = 0
+        with open(self.path, "rb") as fin:
+            for _, _, data in self._inflate(fin, self._checkpoints[0]):
+                # part of the previous chunk is scanned again to catch tags
+                # which have been cut in the middle
+                offset = position - len(prev_chunk[-lookback_size:])
+                chunk = prev_chunk[-lookback_size:] + data
+                position += len(data)
+                prev_chunk = chunk
+                for m in chromexp.finditer(chunk):
+                    chrom_positions[m.group(1).decode("utf-8")] = offset + m.start()
+                for m in specexp.finditer(chunk):
+                    spec_positions[m.group(1).decode("utf-8")] = offset + m.start()
+
+        indices = {}
+        for native_id, offset in spec_positions.items():
+            match = regex_patterns.SPECTRUM_ID_PATTERN.search(native_id)
+            if match is not None and match.group(1) != "":
+                indices[int(match.group(1))] = (offset,)
+            indices[native_id] = (offset,)
+        for native_id, offset in chrom_positions.items():
+            indices[native_id] = (offset,)
+        self.offset_dict.update(indices)
+        self._indexed = True
+        if self.persistent_index is True:
+            self._write_persistent_index()
+
+    def _load_persistent_index(self):
         """
-        # raise Exception('Cant build index for gzip files')
-        pass
+        Load the offset dict from the sidecar index of the file.
+
+        The decompressor states can not be stored, so the checkpoints are
+        set again while the file is decompressed by later lookups.
+
+        Returns:
+            loaded (bool): True if a valid sidecar index was found
+        """
+        from ..utils import sidecar_index
+
+        index = sidecar_index.read_sidecar_index(self.path)
+        if index is None:
+            return False
+        self.offset_dict = index["offset_dict"]
+        self._indexed = True
+        return True
+
+    def _write_persistent_index(self):
+        """Write the offset dict into the sidecar index of the file."""
+        from ..utils import sidecar_index
+
+        try:
+            sidecar_index.write_sidecar_index(self.path, self.offset_dict, [])
+        except OSError as e:
+            logger.warning("Could not write sidecar index ({0})".format(e))
+
+    def _add_checkpoint(self, compressed_position, position, decompressor):
+        """
+        Store a copy of the decompressor state if position lies behind the
+        last checkpoint by at least checkpoint_spacing bytes.
+
+        Arguments:
+            compressed_position (int): position in the gzip file from which
+                on the decompressor has to be fed
+            position (int): uncompressed position of the decompressor
+            decompressor (zlib.Decompress): decompressor to copy
+        """
+        if (
+            len(self._checkpoints) > 0
+            and position < self._checkpoints[-1][1] + self.checkpoint_spacing
+        ):
+            return
+        self._checkpoints.append((compressed_position, position, decompressor.copy()))
+        self._checkpoint_positions.append(position)
+
+    def _inflate(self, fin, checkpoint):
+        """
+        Decompress the file starting at a checkpoint, crossing the borders
+        of concatenated gzip members, and set new checkpoints on the way.
+
+        Arguments:
+            fin (_io.BufferedReader): binary file handler of the gzip file
+            checkpoint (tuple): compressed position, uncompressed position
+                and decompressor state to start from
+
+        Yields:
+            chunk (tuple): compressed position, uncompressed position of the
+                chunk and the uncompressed data
+        """
+        compressed_position, position, decompressor = checkpoint
+        decompressor = decompressor.copy()
+        fin.seek(compressed_position)
+        while True:
+            data = fin.read(self.chunk_size)
+            if not data:
+                break
+            compressed_position += len(data)
+            output = []
+            while data:
+                output.append(decompressor.decompress(data))
+                if decompressor.eof:
+                    data = decompressor.unused_data
+                    decompressor = zlib.decompressobj(GZIP_WBITS)
+                    if data.strip(b"\x00") == b"":
+                        # padding after the last member
+                        data = b""
+                else:
+                    data = b""
+            output = b"".join(output)
+            yield compressed_position, position, output
+            position += len(output)
+            self._add_checkpoint(compressed_position, position, decompressor)
+
+    def _read_element(self, offset):
+        """
+        Read the uncompressed bytes of the spectrum or chromatogram starting
+        at offset, decompressing from the nearest checkpoint before it.
+
+        Arguments:
+            offset (tuple): offset dict entry, the first value is the start
+                of the element
+
+        Returns:
+            data (bytes): xml of the element
+        """
+        start = offset[0]
+        pos = bisect.bisect_right(self._checkpoint_positions, start) - 1
+        buffer = bytearray()
+        close_tag = None
+        with open(self.path, "rb") as fin:
+            for _, position, data in self._inflate(fin, self._checkpoints[pos]):
+                if position + len(data) <= start:
+                    continue
+                search_start = max(len(buffer) - 20, 0)
+                buffer += data[max(start - position, 0) :]
+                if close_tag is None:
+                    if buffer.lstrip(b"< \t").startswith(b"spectrum"):
+                        close_tag = b"</spectrum>"
+                    else:
+                        close_tag = b"</chromatogram>"
+                end = buffer.find(close_tag, search_start)
+                if end != -1:
+                    return bytes(buffer[: end + len(close_tag)])
+        return bytes(buffer)
 
     def read(self, size=-1):
         """
@@ -72,6 +288,30 @@ class StandardGzip(object):
         return self.file_handler.read(size)
 
     def __getitem__(self, identifier):
+        """
+        Access the item with id 'identifier' in the file.
+
+        The checkpoint index is built on the first call. Items which are
+        not in the index are searched by iterating the xml-tree.
+
+        Arguments:
+            identifier (str): native id of the item to access
+
+        Returns:
+            data (str): text associated with the given identifier
+        """
+        if self._indexed is False:
+            self._build_index()
+        if identifier in self.offset_dict:
+            parser = XMLParser(encoding=self.encoding)
+            parser.feed(self._read_element(self.offset_dict[identifier]))
+            element = parser.close()
+            if element.tag.endswith("spectrum"):
+                return spec.Spectrum(element, measured_precision=5e-6)
+            return chromatogram.Chromatogram(element, measured_precision=5e-6)
+        return self._search_iterparse(identifier)
+
+    def _search_iterparse(self, identifier):
         """
         Access the item with id 'identifier' in the file by iterating the xml-tree.
 
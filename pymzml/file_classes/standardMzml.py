@@ -30,9 +30,10 @@ Interface for uncompressed mzML files.
 
 import bisect
 import codecs
+import mmap
 import re
 import os
-from xml.etree.ElementTree import XML, iterparse
+from xml.etree.ElementTree import XML, XMLParser, iterparse
 
 from logging import getLogger
 
@@ -47,7 +48,14 @@ class StandardMzml(object):
     """ """
 
     def __init__(
-        self, path, encoding, build_index_from_scratch=False, index_regex=None
+        self,
+        path,
+        encoding,
+        build_index_from_scratch=False,
+        index_regex=None,
+        persistent_index=False,
+        index_workers=1,
+        offset_dict=None,
     ):
         """
         Initalize Wrapper object for standard mzML files.
@@ -55,16 +63,40 @@ class StandardMzml(object):
         Arguments:
             path (str)     : path to the file
             encoding (str) : encoding of the file
+
+        Keyword Arguments:
+            build_index_from_scratch (bool): parse the file to build the index
+                if the file does not contain one
+            index_regex (re.Pattern): custom regex to parse the index
+            persistent_index (bool): load the index from a sidecar file next
+                to the mzML file and write the sidecar if it does not exist
+                or is outdated, see :py:mod:`pymzml.utils.sidecar_index`
+            index_workers (int): number of processes used to build the
+                index from scratch
+            offset_dict (dict): offset dict of another reader of the same
+                file, used instead of reading or building the index
         """
         self.index_regex = index_regex
+        self.index_workers = index_workers
         self.path = path
+        self.encoding = encoding
         self.file_handler = self.get_file_handler(encoding)
+        self._mmap = None
+        self._sorted_offsets = None
         self.offset_dict = {}
         self.spec_open = regex_patterns.SPECTRUM_OPEN_PATTERN
         self.spec_close = regex_patterns.SPECTRUM_CLOSE_PATTERN
 
+        if offset_dict is not None:
+            self.offset_dict = offset_dict
+            self.seek_list = self._read_extremes()
+            return
+        if persistent_index is True and self._load_persistent_index():
+            return
         self.seek_list = self._read_extremes()
         self._build_index(from_scratch=build_index_from_scratch)
+        if persistent_index is True:
+            self._write_persistent_index()
 
     def get_binary_file_handler(self):
         return open(self.path, "rb")
@@ -110,6 +142,12 @@ class StandardMzml(object):
         elif identifier in self.offset_dict:
             start = self.offset_dict[identifier]
 
+            buffer = self._get_buffer()
+            if buffer is not None:
+                return self._element_to_item(
+                    self._parse_element_from_buffer(buffer, start)
+                )
+
             seeker = self.get_binary_file_handler()
             seeker.seek(start[0])
             start, end = self._read_to_spec_end(seeker)
@@ -127,6 +165,182 @@ class StandardMzml(object):
 
         return spectrum
 
+    def _get_buffer(self):
+        """
+        Memory-map the file for zero-copy random access.
+
+        Returns:
+            buffer (mmap.mmap): read-only memory map of the whole file or
+                None if the file can not be memory-mapped (e.g. it is empty)
+        """
+        if self._mmap is None:
+            with open(self.path, "rb") as fin:
+                try:
+                    self._mmap = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    return None
+        return self._mmap
+
+    def _element_end(self, buffer, start):
+        """
+        Find the end of the spectrum or chromatogram starting at start.
+
+        The search for the closing tag is limited to the range up to the next
+        known offset in the index, so a lookup touches only the bytes of the
+        requested element.
+
+        Args:
+            buffer (mmap.mmap): memory map of the file
+            start (int): byte offset of the element
+
+        Returns:
+            end (int): byte offset directly after the closing tag
+        """
+        if buffer[start : start + 9] == b"<spectrum":
+            close_tag = b"</spectrum>"
+        else:
+            close_tag = b"</chromatogram>"
+        stop = self._next_offset(start)
+        if stop is None:
+            stop = len(buffer)
+        end = buffer.find(close_tag, start, stop)
+        if end == -1:
+            end = buffer.find(close_tag, start)
+        return end + len(close_tag)
+
+    def _next_offset(self, start):
+        """
+        Return the smallest offset in the index larger than start.
+
+        Args:
+            start (int): byte offset
+
+        Returns:
+            offset (int): next offset or None if start is the last offset
+        """
+        if self._sorted_offsets is None or self._sorted_offsets[0] != len(
+            self.offset_dict
+        ):
+            offsets = sorted(
+                set(v[0] for v in self.offset_dict.values() if v is not None)
+            )
+            self._sorted_offsets = (len(self.offset_dict), offsets)
+        offsets = self._sorted_offsets[1]
+        pos = bisect.bisect_right(offsets, start)
+        return offsets[pos] if pos < len(offsets) else None
+
+    def _element_to_item(self, element):
+        """
+        Wrap a parsed xml element into a spectrum or chromatogram object.
+
+        Args:
+            element (xml.etree.ElementTree.Element): spectrum or chromatogram
+
+        Returns:
+            item (Spectrum or Chromatogram): wrapped element
+        """
+        if element.tag.endswith("spectrum"):
+            return spec.Spectrum(element, measured_precision=5e-6)
+        elif element.tag.endswith("chromatogram"):
+            return chromatogram.Chromatogram(element)
+
+    def get_items(self, identifiers, max_gap=2**20, max_block_size=2**26):
+        """
+        Access several spectra or chromatograms at once.
+
+        All identifiers are resolved through the offset dict and sorted by
+        their byte offset. Elements lying close to each other are read with
+        a single sequential read, so scattered lookups turn into
+        near-sequential I/O. Identifiers which are not in the offset dict
+        are looked up one by one via :py:meth:`__getitem__`.
+
+        Arguments:
+            identifiers (list): native ids of the items to access
+
+        Keyword Arguments:
+            max_gap (int): maximal number of unrequested bytes between two
+                elements which are still read in one go
+            max_block_size (int): maximal number of bytes per read
+
+        Returns:
+            items (list): spectra and chromatograms in the order of
+                identifiers
+        """
+        items = {}
+        starts = []
+        for identifier in identifiers:
+            if identifier in items:
+                continue
+            offset = self.offset_dict.get(identifier, None)
+            if (
+                offset is None
+                or str(identifier).upper() == "TIC"
+                or self._get_buffer() is None
+            ):
+                items[identifier] = self[identifier]
+            else:
+                items[identifier] = None
+                starts.append((offset[0], identifier))
+        starts.sort(key=lambda x: x[0])
+
+        # group elements into blocks which are read at once
+        blocks = []
+        for start, identifier in starts:
+            stop = self._next_offset(start)
+            if stop is None:
+                stop = self._element_end(self._get_buffer(), start)
+            if (
+                blocks
+                and start - blocks[-1][1] <= max_gap
+                and stop - blocks[-1][0] <= max_block_size
+            ):
+                blocks[-1][1] = max(blocks[-1][1], stop)
+                blocks[-1][2].append((identifier, start, stop))
+            else:
+                blocks.append([start, stop, [(identifier, start, stop)]])
+
+        with self.get_binary_file_handler() as seeker:
+            for block_start, block_stop, elements in blocks:
+                seeker.seek(block_start)
+                data = seeker.read(block_stop - block_start)
+                with memoryview(data) as view:
+                    for identifier, start, stop in elements:
+                        rel_start = start - block_start
+                        if data.startswith(b"<spectrum", rel_start):
+                            close_tag = b"</spectrum>"
+                        else:
+                            close_tag = b"</chromatogram>"
+                        end = data.find(close_tag, rel_start, stop - block_start)
+                        if end == -1:
+                            items[identifier] = self[identifier]
+                            continue
+                        parser = XMLParser(encoding=self.encoding)
+                        with view[rel_start : end + len(close_tag)] as element_view:
+                            parser.feed(element_view)
+                        items[identifier] = self._element_to_item(parser.close())
+        return [items[identifier] for identifier in identifiers]
+
+    def _parse_element_from_buffer(self, buffer, offset):
+        """
+        Parse the spectrum or chromatogram at offset directly from a slice
+        of the memory-mapped file, without copying or decoding the bytes.
+
+        Args:
+            buffer (mmap.mmap): memory map of the file
+            offset (tuple): offset dict entry, the first value is the start
+                of the element
+
+        Returns:
+            element (xml.etree.ElementTree.Element): parsed xml element
+        """
+        start = offset[0]
+        end = self._element_end(buffer, start)
+        parser = XMLParser(encoding=self.encoding)
+        with memoryview(buffer) as view:
+            with view[start:end] as element_view:
+                parser.feed(element_view)
+        return parser.close()
+
     def _binary_search(self, target_index):
         """
         Retrieve spectrum for a given spectrum ID using binary jumps
@@ -356,14 +570,63 @@ class StandardMzml(object):
 
         elif from_scratch is True:
             seeker.seek(0)
-            self._build_index_from_scratch(seeker)
+            self._build_index_from_scratch(seeker, workers=self.index_workers)
         else:
             logger.warning("No index found and build_index_from_scratch is False")
 
         seeker.close()
 
-    def _build_index_from_scratch(self, seeker):
-        """Build an index of spectra/chromatogram data with offsets by parsing the file."""
+    def _load_persistent_index(self):
+        """
+        Load offset dict and seek list from the sidecar index of the file.
+
+        Returns:
+            loaded (bool): True if a valid sidecar index was found
+        """
+        from ..utils import sidecar_index
+
+        index = sidecar_index.read_sidecar_index(
+            self.path, index_regex=self.index_regex
+        )
+        if index is None:
+            return False
+        self.offset_dict = index["offset_dict"]
+        self.seek_list = index["seek_list"]
+        return True
+
+    def _write_persistent_index(self):
+        """
+        Write offset dict and seek list into the sidecar index of the file.
+
+        Files without any offsets (i.e. no index and
+        build_index_from_scratch=False) are not persisted.
+        """
+        from ..utils import sidecar_index
+
+        if not any(v is not None for v in self.offset_dict.values()):
+            return
+        try:
+            sidecar_index.write_sidecar_index(
+                self.path,
+                self.offset_dict,
+                self.seek_list,
+                index_regex=self.index_regex,
+            )
+        except OSError as e:
+            logger.warning("Could not write sidecar index ({0})".format(e))
+
+    def _build_index_from_scratch(self, seeker, workers=1):
+        """
+        Build an index of spectra/chromatogram data with offsets by parsing the file.
+
+        Args:
+            seeker (_io.BufferedReader): binary file handler
+
+        Keyword Args:
+            workers (int): number of processes used to scan the file. If
+                larger than 1, the file is split into byte ranges which are
+                memory-mapped and scanned in a process pool.
+        """
 
         def get_data_indices(fh, chunksize=8192, lookback_size=100):
             """Get a dictionary with binary file indices of spectra and
@@ -381,10 +644,10 @@ class StandardMzml(object):
             chromcnt = 0
             speccnt = 0
             # regexes to be used
-            chromexp = re.compile(b'<\\s*chromatogram[^>]*id="([^"]*)"')
-            chromcntexp = re.compile(b'<\\s*chromatogramList\\s*count="([^"]*)"')
-            specexp = re.compile(b'<\\s*spectrum[^>]*id="([^"]*)"')
-            speccntexp = re.compile(b'<\\s*spectrumList\\s*count="([^"]*)"')
+            chromexp = regex_patterns.INDEX_CHROMATOGRAM_PATTERN
+            chromcntexp = regex_patterns.INDEX_CHROMATOGRAM_COUNT_PATTERN
+            specexp = regex_patterns.INDEX_SPECTRUM_PATTERN
+            speccntexp = regex_patterns.INDEX_SPECTRUM_COUNT_PATTERN
             # go to start of file
             fh.seek(0)
             prev_chunk = ""
@@ -417,50 +680,88 @@ class StandardMzml(object):
                 m = speccntexp.search(chunk)
                 if m is not None:
                     speccnt = int(m.group(1))
-            # Check if everything is ok (e.g. we found the right number of
-            # chromatograms and spectra) and then return the dictionary.
-            if chromcnt == len(chrom_positions) and speccnt == len(spec_positions):
-                positions = {}
-                positions.update(chrom_positions)
-                positions.update(spec_positions)
-            else:
-                logger.warning(
-                    "Found {spec_count} spectra "
-                    "and {chrom_count} chromatograms\n"
-                    "[ Warning ] However Spectrum index list shows {speccnt} and "
-                    "Chromatogram index list shows {chromcnt} entries".format(
-                        spec_count=len(spec_positions),
-                        chrom_count=len(chrom_positions),
-                        speccnt=speccnt,
-                        chromcnt=chromcnt,
-                    )
-                )
-                logger.warning(
-                    "Updating offset dict with found offsets "
-                    "but some might be still missing. "
-                    "This may happen because your is file truncated"
-                )
-                positions = {}
-                positions.update(chrom_positions)
-                positions.update(spec_positions)
-            return positions
+            return chrom_positions, spec_positions, chromcnt, speccnt
 
-        indices = get_data_indices(seeker)
-        if indices is not None:
-            tmp_dict = {}
+        if workers > 1 and getattr(self, "path", None) is not None:
+            chrom_positions, spec_positions, chromcnt, speccnt = (
+                self._scan_data_indices_parallel(workers)
+            )
+        else:
+            chrom_positions, spec_positions, chromcnt, speccnt = get_data_indices(
+                seeker
+            )
+
+        # Check if everything is ok (e.g. we found the right number of
+        # chromatograms and spectra).
+        if chromcnt != len(chrom_positions) or speccnt != len(spec_positions):
+            logger.warning(
+                "Found {spec_count} spectra "
+                "and {chrom_count} chromatograms\n"
+                "[ Warning ] However Spectrum index list shows {speccnt} and "
+                "Chromatogram index list shows {chromcnt} entries".format(
+                    spec_count=len(spec_positions),
+                    chrom_count=len(chrom_positions),
+                    speccnt=speccnt,
+                    chromcnt=chromcnt,
+                )
+            )
+            logger.warning(
+                "Updating offset dict with found offsets "
+                "but some might be still missing. "
+                "This may happen because your is file truncated"
+            )
+        indices = {}
+        indices.update(chrom_positions)
+        indices.update(spec_positions)
+
+        tmp_dict = {}
+        item_list = sorted(indices.items(), key=lambda x: x[1])
+        for key, offset in item_list:
+            tmp_dict[key] = (offset,)
+        self.offset_dict.update(tmp_dict)
+        return
 
-            item_list = sorted(indices.items(), key=lambda x: x[1])
-            for i in range(len(item_list)):
-                key = item_list[i][0]
-                tmp_dict[key] = (item_list[i][1],)
+    def _scan_data_indices_parallel(self, workers, min_range_size=2**20):
+        """
+        Split the file into byte ranges and scan them for spectrum and
+        chromatogram offsets in a process pool.
 
-            self.offset_dict.update(tmp_dict)
+        Args:
+            workers (int): number of worker processes
 
-            # make sure the list is sorted (for bisect)
-            # self.info['offsetList'] = sorted(self.info['offsetList'])
-            # self.info['seekable'] = True
+        Keyword Args:
+            min_range_size (int): minimal number of bytes per range
 
-        return
+        Returns:
+            indices (tuple): chromatogram positions, spectrum positions,
+                chromatogram count and spectrum count
+        """
+        file_size = os.path.getsize(self.path)
+        range_size = max(-(-file_size // (workers * 4)), min_range_size)
+        starts = list(range(0, file_size, range_size))
+        ends = starts[1:] + [file_size]
+
+        chrom_positions = {}
+        spec_positions = {}
+        chromcnt = 0
+        speccnt = 0
+        # imported here, multiprocessing is slow to import and rarely needed
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _scan_data_indices_range, [self.path] * len(starts), starts, ends
+            )
+            # ranges are returned in file order, so later ids win as in
+            # the sequential scan
+            for chroms, specs, range_chromcnt, range_speccnt in results:
+                chrom_positions.update(chroms)
+                spec_positions.update(specs)
+                if range_chromcnt is not None:
+                    chromcnt = range_chromcnt
+                if range_speccnt is not None:
+                    speccnt = range_speccnt
+        return chrom_positions, spec_positions, chromcnt, speccnt
 
     def _interpol_search(self, target_index, chunk_size=8, fallback_cutoff=100):
         """
@@ -806,6 +1107,58 @@ class StandardMzml(object):
     def close(self):
         """ """
         self.file_handler.close()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+def _scan_data_indices_range(path, start, end, overlap=65536):
+    """
+    Find the offsets of all spectrum and chromatogram tags starting in the
+    byte range [start, end) of a memory-mapped mzML file.
+
+    Tags starting close to the end of the range are completed by scanning
+    up to overlap bytes beyond end; tags starting before start are left to
+    the previous range.
+
+    Args:
+        path (str): path to the mzML file
+        start (int): first byte of the range
+        end (int): first byte after the range
+
+    Keyword Args:
+        overlap (int): number of bytes scanned beyond end to complete tags
+
+    Returns:
+        indices (tuple): chromatogram positions, spectrum positions,
+            chromatogram count and spectrum count (None if not in range)
+    """
+    chrom_positions = {}
+    spec_positions = {}
+    chromcnt = None
+    speccnt = None
+    with open(path, "rb") as fin:
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            stop = min(end + overlap, len(data))
+            for m in regex_patterns.INDEX_CHROMATOGRAM_PATTERN.finditer(
+                data, start, stop
+            ):
+                if m.start() >= end:
+                    break
+                chrom_positions[m.group(1).decode("utf-8")] = m.start()
+            for m in regex_patterns.INDEX_SPECTRUM_PATTERN.finditer(data, start, stop):
+                if m.start() >= end:
+                    break
+                spec_positions[m.group(1).decode("utf-8")] = m.start()
+            m = regex_patterns.INDEX_CHROMATOGRAM_COUNT_PATTERN.search(
+                data, start, stop
+            )
+            if m is not None and m.start() < end:
+                chromcnt = int(m.group(1))
+            m = regex_patterns.INDEX_SPECTRUM_COUNT_PATTERN.search(data, start, stop)
+            if m is not None and m.start() < end:
+                speccnt = int(m.group(1))
+    return chrom_positions, spec_positions, chromcnt, speccnt
 
 
 if __name__ == "__main__":
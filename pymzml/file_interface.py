@@ -8,14 +8,21 @@ Interface for mzML files
 
 from io import BytesIO
 from pymzml.file_classes import indexedGzip, standardGzip, standardMzml, bytesMzml
-from pymzml.utils import GSGR
 
 
 class FileInterface(object):
     """Interface to different mzML formats."""
 
     def __init__(
-        self, path, encoding, build_index_from_scratch=False, index_regex=None
+        self,
+        path,
+        encoding,
+        build_index_from_scratch=False,
+        index_regex=None,
+        persistent_index=False,
+        index_workers=1,
+        offset_dict=None,
+        checkpoint_index=None,
     ):
         """
         Initialize a object interface to mzML files.
@@ -24,10 +31,26 @@ class FileInterface(object):
             path (str)               : path to the mzML file
             encoding (str)           : encoding of the file
 
+        Keyword Arguments:
+            build_index_from_scratch (bool) : build index by parsing the file
+            index_regex (re.Pattern)        : custom regex to parse the index
+            persistent_index (bool)         : use a sidecar index file
+            index_workers (int)             : processes used to build the
+                                              index from scratch
+            offset_dict (dict)              : offset dict of another reader
+                                              of the same uncompressed file
+            checkpoint_index (tuple)        : checkpoint index of another
+                                              reader of the same plain
+                                              gzipped file
+
         """
         self.build_index_from_scratch = build_index_from_scratch
         self.encoding = encoding
         self.index_regex = index_regex
+        self.persistent_index = persistent_index
+        self.index_workers = index_workers
+        self.offset_dict = offset_dict
+        self.checkpoint_index = checkpoint_index
         self.file_handler = self._open(path)
         self.offset_dict = self.file_handler.offset_dict
 
@@ -57,12 +80,20 @@ class FileInterface(object):
             if self._indexed_gzip(path_or_file):
                 return indexedGzip.IndexedGzip(path_or_file, self.encoding)
             else:
-                return standardGzip.StandardGzip(path_or_file, self.encoding)
+                return standardGzip.StandardGzip(
+                    path_or_file,
+                    self.encoding,
+                    persistent_index=self.persistent_index,
+                    checkpoint_index=self.checkpoint_index,
+                )
         return standardMzml.StandardMzml(
             path_or_file,
             self.encoding,
             self.build_index_from_scratch,
             index_regex=self.index_regex,
+            persistent_index=self.persistent_index,
+            index_workers=self.index_workers,
+            offset_dict=self.offset_dict,
         )
 
     def _indexed_gzip(self, path):
@@ -75,6 +106,8 @@ class FileInterface(object):
         Returns:
             bool : `True` if path is a gzip file with index, else `False`
         """
+        from pymzml.utils import GSGR
+
         indexed = False
         indexed = GSGR.GSGR(path).indexed
         return indexed
@@ -106,6 +139,24 @@ class FileInterface(object):
         #     self.offset_dict.update(self.file_handler.offset_dict)
         return self.file_handler[identifier]
 
+    def get_items(self, identifiers):
+        """
+        Access several spectra or chromatograms at once.
+
+        File classes offering a batched access read the items in order of
+        their position in the file, all others access them one by one.
+
+        Arguments:
+            identifiers (list): native ids of the items
+
+        Returns:
+            items (list): spectra and chromatograms in the order of
+                identifiers
+        """
+        if hasattr(self.file_handler, "get_items"):
+            return self.file_handler.get_items(identifiers)
+        return [self.file_handler[identifier] for identifier in identifiers]
+
 
 if __name__ == "__main__":
     print(__doc__)
@@ -16,6 +16,175 @@ import math
 
 import numpy as np
 
+# number of data half bytes following each possible count half byte
+_DATA_HALF_BYTES = np.array(
+    [8, 7, 6, 5, 4, 3, 2, 1, 0, 7, 6, 5, 4, 3, 2, 1], dtype=np.intp
+)
+
+
+def _half_bytes(data):
+    """
+    Split bytes into half bytes, high half byte first.
+
+    Args:
+        data (bytes, bytearray or np.ndarray): encoded bytes
+
+    Returns:
+        half_bytes (np.ndarray): uint8 array of half bytes
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    half_bytes = np.empty(2 * len(data), dtype=np.uint8)
+    half_bytes[0::2] = data >> 4
+    half_bytes[1::2] = data & 0xF
+    return half_bytes
+
+
+def _decode_int_stream(half_bytes, jump=16):
+    """
+    Decode a stream of truncated integers as written by
+    :py:meth:`MSNumpress._encodeInt`.
+
+    Every integer starts with a count half byte c, c < 8 gives the number of
+    leading zero half bytes, c > 8 the number of leading one half bytes plus
+    8 and c == 8 encodes 0. The remaining half bytes follow, least
+    significant first. Integers that are cut off at the end of the stream
+    (i.e. padding) are dropped.
+
+    The start of each integer depends on all previous ones. The position of
+    the next integer is calculated for every half byte at once and composed
+    ``jump`` times, so only every ``jump``-th start is followed in Python and
+    the starts in between are filled in with numpy.
+
+    Args:
+        half_bytes (np.ndarray): half bytes as returned by :py:func:`_half_bytes`
+
+    Keyword Args:
+        jump (int): number of integers skipped per Python iteration, must be
+            a power of 2
+
+    Returns:
+        ints (np.ndarray): decoded signed 32 bit integers as int64
+    """
+    n_half_bytes = len(half_bytes)
+    if n_half_bytes == 0:
+        return np.zeros(0, dtype=np.int64)
+    n_data = _DATA_HALF_BYTES[half_bytes]
+    # next_start[n_half_bytes] is the sentinel marking the end of the stream
+    next_start = np.empty(n_half_bytes + 1, dtype=np.intp)
+    np.minimum(
+        np.arange(1, n_half_bytes + 1, dtype=np.intp) + n_data,
+        n_half_bytes,
+        out=next_start[:-1],
+    )
+    next_start[-1] = n_half_bytes
+    skip = next_start
+    for _ in range(int(jump).bit_length() - 1):
+        skip = skip[skip]
+    coarse = []
+    pos = 0
+    while pos < n_half_bytes:
+        coarse.append(pos)
+        pos = int(skip[pos])
+    starts = np.empty((len(coarse), jump), dtype=np.intp)
+    starts[:, 0] = coarse
+    for column in range(1, jump):
+        starts[:, column] = next_start[starts[:, column - 1]]
+    starts = starts.ravel()
+    starts = starts[starts < n_half_bytes]
+    n_data = n_data[starts]
+    # drop the last integer if it is incomplete
+    if len(starts) > 0 and starts[-1] + n_data[-1] >= n_half_bytes:
+        starts = starts[:-1]
+        n_data = n_data[:-1]
+
+    # the data half bytes occupy disjoint bits, so summing them equals or-ing
+    offsets = np.arange(1, 9, dtype=np.intp)
+    padded = np.concatenate((half_bytes, np.zeros(8, dtype=np.uint8)))
+    values = padded[starts[:, None] + offsets].astype(np.uint32)
+    values[offsets > n_data[:, None]] = 0
+    values <<= (4 * (offsets - 1)).astype(np.uint32)
+    ints = values.sum(axis=1, dtype=np.uint32)
+    leading_ones = half_bytes[starts] > 8
+    shifts = (4 * n_data[leading_ones]).astype(np.uint32)
+    ints[leading_ones] |= np.uint32(0xFFFFFFFF) << shifts
+    return ints.view(np.int32).astype(np.int64)
+
+
+def _decode_fixed_point(data):
+    """
+    Decode the big endian fixed point stored in the first 8 bytes.
+
+    Args:
+        data (bytes, bytearray or np.ndarray): encoded bytes
+
+    Returns:
+        fixed_point (float): decoded fixed point
+    """
+    return float(np.frombuffer(data, dtype=">f8", count=1)[0])
+
+
+def decode_linear(data):
+    """
+    Decode data compressed with linear prediction and truncated integers.
+
+    The encoded differences are the second differences of the scaled
+    integer values, hence the values are restored with two cumulative sums.
+
+    Args:
+        data (bytes, bytearray or np.ndarray): encoded bytes
+
+    Returns:
+        result (np.ndarray): decoded values
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    if len(data) < 8:
+        raise Exception("Corrupt input data.\nnot enough bytes to read fixed point")
+    fixed_point = _decode_fixed_point(data)
+    if len(data) < 12:
+        raise Exception("Corrupt input data.\nnot enough bytes to read first value")
+    if len(data) < 16:
+        raise Exception("Corrupt input data\nnot enough bytes to read second value")
+    first, second = np.frombuffer(data[8:16].tobytes(), dtype="<u4").astype(np.int64)
+    diffs = _decode_int_stream(_half_bytes(data[16:]))
+    ints = np.empty(len(diffs) + 2, dtype=np.int64)
+    ints[0] = first
+    ints[1] = second
+    np.cumsum(diffs, out=ints[2:])
+    ints[2:] += second - first
+    np.cumsum(ints[2:], out=ints[2:])
+    ints[2:] += second
+    return ints / fixed_point
+
+
+def decode_pic(data):
+    """
+    Decode positive integers compressed with truncated integers.
+
+    Args:
+        data (bytes, bytearray or np.ndarray): encoded bytes
+
+    Returns:
+        result (np.ndarray): decoded values
+    """
+    return _decode_int_stream(_half_bytes(data)).astype(np.float64)
+
+
+def decode_slof(data):
+    """
+    Decode short logged float compressed data.
+
+    Args:
+        data (bytes, bytearray or np.ndarray): encoded bytes
+
+    Returns:
+        result (np.ndarray): decoded values
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    fixed_point = _decode_fixed_point(data)
+    n_values = (len(data) - 8) // 2
+    values = np.frombuffer(data[8 : 8 + 2 * n_values].tobytes(), dtype="<u2")
+    return np.exp(values / fixed_point) - 1
+
 
 class MSNumpress:
     """
@@ -28,10 +197,10 @@ class MSNumpress:
 
     ..Note::
         This is a Python implementation of the Golomb-Rice encoding,
-        also known as MS-Numpress. As such it is considerably slower than
-        the C implementation, which we wrapped into cython. Please make
-        yourself a favor and use the the wrapper/c implementation and only
-        as a last result this Python implementation.
+        also known as MS-Numpress. Decoding is vectorized with numpy, see
+        :py:func:`decode_linear`, :py:func:`decode_pic` and
+        :py:func:`decode_slof`, encoding is considerably slower than the C
+        implementation, which we wrapped into cython.
 
     """
 
@@ -43,24 +212,6 @@ class MSNumpress:
             array (list): data array with compressed or decompressed data
         """
         self.is_little_endian = True if sys.byteorder == "little" else False
-        self.Filler = {
-            8: "00000000",
-            7: "0000000",
-            6: "000000",
-            5: "00000",
-            4: "0000",
-            3: "000",
-            2: "00",
-            1: "0",
-            0: "",
-            9: "f",
-            10: "ff",
-            11: "fff",
-            12: "ffff",
-            13: "fffff",
-            14: "ffffff",
-            15: "fffffff",
-        }
         # call check what data was set ...
         self._encoded_data = None
         self._decoded_data = None
@@ -286,96 +437,22 @@ class MSNumpress:
         self.encoded_data = result
         return result
 
-    def decode_linear(self):
+    def decode_linear(self, data=None):
         """
         Decode a Golomb encoded bytearray to its corresponding numpy array.
 
+        Keyword Args:
+            data (bytes, bytearray or np.ndarray): encoded bytes, defaults to
+                :py:attr:`encoded_data`
+
         Returns:
             result (np.ndarray): NumLin decoded numpy array of the
                 original data
 
         """
-        ints = [0 for x in range(3)]
-        data = self.encoded_data
-
-        if len(data) < 8:
-            raise Exception("Corrupt input data.\nnot enough bytes to read fixed point")
-
-        enc_fp = data
-        fp = self._decode_fixed_point(enc_fp)
-
-        if len(data) < 12:
-            raise Exception("Corrupt input data.\nnot enough bytes to read first value")
-
-        for i in range(4):
-            ints[1] = ints[1] | ((0xFF & (data[8 + i])) << (i * 8))
-        i1 = ints[1] / fp
-
-        if len(data) < 16:
-            raise Exception("Corrupt input data\nnot enough bytes to read second value")
-
-        for i in range(4):
-            ints[2] = ints[2] | ((0xFF & (data[12 + i])) << (i * 8))
-        i2 = ints[2] / fp
-
-        diff_vals = self._decode_ints_from_bytearray(16, fp)
-        result = [0 for x in range(len(diff_vals) + 2)]
-        result[0] = i1
-        result[1] = i2
-        i = 2
-        for diff in diff_vals:
-            ints[0] = ints[1]
-            ints[1] = ints[2]
-            ints[2] = diff
-            extrapol = ints[1] + (ints[1] - ints[0])
-            val = extrapol + ints[2]
-            result[i] = val / fp
-            ints[2] = val
-            i += 1
-
-        return result
-
-    def _decode_ints_from_bytearray(self, pos, normalization=1):
-        """
-        Decode truncated integer encoded values and end position
-        in bytearray.
-
-        Args:
-            pos (int) : start position in array
-
-        Returns:
-            results (list): ...
-        """
-        # results = np.empty(len(self.encoded_data) * 2)
-        results = [0 for x in range(len(self.encoded_data) * 2)]
-        leading_count = None
-        i = 0
-        while pos < len(self.encoded_data):
-            current_byte = "{0:02x}".format(self.encoded_data[pos])
-            for byte_pos in [0, 1]:
-                hb = current_byte[byte_pos]
-                if leading_count is None:
-                    if hb == "8":
-                        results[i] = 0
-                        i += 1
-                    else:
-                        leading_count = int(hb, 16)
-                        hex_str = ""
-                        cb = leading_count - (8 * math.floor(leading_count / 8))
-                else:
-                    hex_str = "{0}{1}".format(hb, hex_str)
-                    cb += 1
-                    try:
-                        1 / (cb - 8)
-                    except:
-                        final_int = int(self.Filler[leading_count] + hex_str, 16)
-                        if final_int > 0x7FFFFFFF:
-                            final_int -= 0x100000000
-                        results[i] = final_int
-                        i += 1
-                        leading_count = None
-            pos += 1
-        return results[:i]
+        if data is None:
+            data = self.encoded_data
+        return decode_linear(data)
 
     def encode_pic(self):
         """
@@ -407,77 +484,21 @@ class MSNumpress:
         self.encoded_data = final
         return final
 
-    def decode_pic(self):
+    def decode_pic(self, data=None):
         """
         Decode ion count data compressed with :py:func:`encodePic`
 
+        Keyword Args:
+            data (bytes, bytearray or np.ndarray): encoded bytes, defaults to
+                :py:attr:`encoded_data`
+
         Returns:
             result (array): decoded Ion count data as numpy array
         """
-        results = []
-        data = self.encoded_data
-        read_first = True
-        hb_to_read = 0
-        current_value = bytearray()
-
-        # TODO fix problem when 2 or more zeroes appear after each other
-        # => if first hbc is 8, the next number is a hbc again and not data
-
-        for val in data:
-            if hb_to_read == 0:
-                if read_first is True:
-                    current_value = bytearray()
-                    count = (0xFF & val) >> 4
-                    current_value.append(count)
-                    hb_to_read = 8 - count
-                    read_first = False
-                else:
-                    current_value = bytearray()
-                    count = 0xF & val
-                    current_value.append(count)
-                    hb_to_read = 8 - count
-                    read_first = True
-            if hb_to_read != 0:
-                if hb_to_read == 1:
-                    if read_first is True:
-                        hb = (0xFF & val) >> 4
-                        current_value.append(hb)
-                        hb_to_read -= 1
-                        dec_int = self._decodeInt(current_value)
-                        current_value = bytearray()
-                        results.append(dec_int)
-                        count = 0xF & val
-                        current_value.append(count)
-                        hb_to_read = 8 - count
-                        continue
-                    else:
-                        hb = 0xF & val
-                        current_value.append(hb)
-                        hb_to_read -= 1
-                        dec_int = self._decodeInt(current_value)
-                        current_value = bytearray()
-                        results.append(dec_int)
-                        read_first = True
-                        continue
-                if read_first is True:
-                    hb1 = (0xFF & val) >> 4
-                    hb2 = 0xF & val
-                    current_value.append(hb1)
-                    current_value.append(hb2)
-                    hb_to_read -= 2
-                    if hb_to_read == 0:
-                        dec_int = self._decodeInt(current_value)
-                        results.append(dec_int)
-                        current_value = bytearray()
-                        continue
-                else:
-                    hb = 0xF & val
-                    current_value.append(hb)
-                    read_first = True
-                    hb_to_read -= 1
-
+        if data is None:
+            data = self.encoded_data
+        results = decode_pic(data)
         self.decoded_data = results
-
         return results
 
     def encode_slof(self):
@@ -498,23 +519,22 @@ class MSNumpress:
         self.encoded_data = res
         return res
 
-    def decode_slof(self):
+    def decode_slof(self, data=None):
         """
         Decode short logged float compressed data.
 
+        Keyword Args:
+            data (bytes, bytearray or np.ndarray): encoded bytes, defaults to
+                :py:attr:`encoded_data`
+
         Returns:
-            result (bytearray): array with decoded ion count data
+            result (np.ndarray): array with decoded ion count data
         """
-        data = self.encoded_data
+        if data is None:
+            data = self.encoded_data
         if len(data) < 8:
             return -1
-        res = list()
-        fixed_point = self._decode_fixed_point(data)
-
-        for i in range(8, len(data), 2):
-            x = 0xFF & data[i] | ((0xFF & data[i + 1]) << 8)
-            res.append(math.exp((0xFFFF & x) / fixed_point) - 1)
-
+        res = decode_slof(data)
         self.decoded_data = res
         return res
 
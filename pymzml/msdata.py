@@ -34,6 +34,7 @@ import warnings
 import xml.etree.ElementTree as ElementTree
 import zlib
 from base64 import b64decode as b64dec
+from binascii import a2b_base64
 from collections import defaultdict as ddict
 from struct import unpack
 
@@ -41,13 +42,151 @@ import numpy as np
 
 from .obo import OboTranslator
 
+NUMPY_DTYPES = {
+    "32-bit float": np.float32,
+    "64-bit float": np.float64,
+    "32-bit integer": np.int32,
+    "64-bit integer": np.int64,
+}
+"""Map mzML binary data types to numpy dtypes"""
+
+DETACHED_PARAM_ATTRIBUTES = {
+    "accession": "accession",
+    "name": "name",
+    "value": "value",
+    "unitAccession": "unit_accession",
+    "unitName": "unit_name",
+}
+"""Map cvParam attributes to the slots of detached params"""
+
+NUMPRESS_DECODERS = {
+    "ms-np-linear": "decode_linear",
+    "MS-Numpress linear prediction compression": "decode_linear",
+    "ms-np-pic": "decode_pic",
+    "MS-Numpress positive integer compression": "decode_pic",
+    "ms-np-slof": "decode_slof",
+    "MS-Numpress short logged float compression": "decode_slof",
+}
+"""Map numpress compressions to the methods of the numpress decoder"""
+
+
+def _decode_binary(data, d_array_length, data_type, comp):
+    """
+    Decode b64 encoded and zlib and/or numpress compressed data as numpy
+    array. Used by :py:meth:`MsData._decode_to_numpy` and by the pool of
+    :py:class:`~pymzml.decoder.Decoder`.
+
+    The b64 string is decoded without an intermediate bytes copy and the
+    zlib output buffer is allocated with the final array size, the
+    resulting array is a read-only view on the decompressed buffer.
+
+    Arguments:
+        data (str): b64 encoded data
+        d_array_length (int): number of values in the array
+        data_type (str): binary data type, e.g. '32-bit float'
+        comp (list): names of the compressions
+
+    Returns:
+        array (np.ndarray): decoded values, empty if there is no data
+    """
+    # a2b_base64 reads ASCII str objects in place
+    out_data = a2b_base64(data)
+    if len(out_data) == 0:
+        return np.array([])
+    dtype = NUMPY_DTYPES.get(data_type, None)
+    if "zlib" in comp or "zlib compression" in comp:
+        if dtype is not None and d_array_length:
+            bufsize = int(d_array_length) * np.dtype(dtype).itemsize
+            out_data = zlib.decompress(out_data, bufsize=bufsize)
+        else:
+            out_data = zlib.decompress(out_data)
+    for compression in comp:
+        method = NUMPRESS_DECODERS.get(compression, None)
+        if method is not None:
+            from .decoder import _ms_decoder
+
+            values = getattr(_ms_decoder(), method)(
+                np.frombuffer(out_data, dtype=np.uint8)
+            )
+            return np.asarray(values, dtype=np.float64)
+    if dtype is None:
+        # TODO "null-terminated ASCII string":
+        raise ValueError(f"Unsupported data type: {data_type}")
+    return np.frombuffer(out_data, dtype)
+
+
+class _DetachedParam(object):
+    """
+    Compact copy of an element carrying an accession, kept after the element
+    tree of a spectrum has been dropped.
+
+    Supports the read access of xml.etree.ElementTree.Element used on
+    cvParams, i.e. get and attrib, for the attributes listed in
+    DETACHED_PARAM_ATTRIBUTES. Everything but the value is interned, since
+    accessions, names and units are shared by many spectra.
+
+    Arguments:
+        element (xml.etree.ElementTree.Element): element to copy
+    """
+
+    __slots__ = ["accession", "name", "value", "unit_accession", "unit_name"]
+
+    def __init__(self, element):
+        for key, slot in DETACHED_PARAM_ATTRIBUTES.items():
+            value = element.get(key)
+            if value is not None and key != "value":
+                value = sys.intern(value)
+            setattr(self, slot, value)
+
+    def get(self, key, default=None):
+        slot = DETACHED_PARAM_ATTRIBUTES.get(key)
+        if slot is None:
+            return default
+        value = getattr(self, slot)
+        if value is None:
+            return default
+        return value
+
+    @property
+    def attrib(self):
+        attrib = {}
+        for key, slot in DETACHED_PARAM_ATTRIBUTES.items():
+            value = getattr(self, slot)
+            if value is not None:
+                attrib[key] = value
+        return attrib
+
 
 class MsData(object):
     """
     General base class for mass spectrometry data handling.
     Provides common functionality for both Spectrum and Chromatogram classes.
+
+    Attributes are stored in slots instead of a per instance dict, since runs
+    can keep a very large number of spectra in memory. Subclasses declare
+    their own attributes in __slots__ as well.
     """
 
+    __slots__ = [
+        "__weakref__",
+        "_binary_arrays",
+        "_i",
+        "_measured_precision",
+        "_mz",
+        "_noise_level_estimate",
+        "_params",
+        "_profile",
+        "_time",
+        "accessions",
+        "element",
+        "internal_precision",
+        "ns",
+        "obo_translator",
+    ]
+
+    # shared by all instances instead of being assigned per object
+    _array = staticmethod(np.array)
+
     def _read_accessions(self):
         """Set all required variables for this spectrum."""
         self.accessions = {}
@@ -118,6 +257,114 @@ class MsData(object):
         else:
             raise Exception("Unknown data Type ({0})".format(d_type))
 
+    def _get_params(self):
+        """
+        Collect all elements carrying an accession in a single pass.
+
+        The table is built on first use and serves all accession based
+        properties, so the element tree is not searched again for every
+        property.
+
+        Returns:
+            params (dict): maps accessions to the list of elements carrying
+                them, in document order
+        """
+        if self._params is None:
+            params = {}
+            if self.element is not None:
+                for element in self.element.iter():
+                    accession = element.get("accession")
+                    if accession is not None:
+                        if accession in params:
+                            params[accession].append(element)
+                        else:
+                            params[accession] = [element]
+            self._params = params
+        return self._params
+
+    def _detach_params(self):
+        """
+        Replace the elements of the accession table by compact copies, so
+        the table no longer keeps parts of the element tree alive.
+        """
+        self._params = {
+            sys.intern(accession): [_DetachedParam(element) for element in elements]
+            for accession, elements in self._get_params().items()
+        }
+
+    def _find_param(self, accession, direct=False):
+        """
+        Return the first element carrying an accession.
+
+        Arguments:
+            accession (str): MS accession, e.g. MS:1000511
+
+        Keyword Arguments:
+            direct (bool): only consider direct children of the element
+
+        Returns:
+            element (xml.etree.ElementTree.Element): first element with the
+                accession or None
+        """
+        elements = self._get_params().get(accession, None)
+        if elements is None:
+            return None
+        if direct is False:
+            return elements[0]
+        if self.element is None:
+            return None
+        for element in elements:
+            for child in self.element:
+                if child is element:
+                    return element
+        return None
+
+    def _get_binary_arrays(self):
+        """
+        Describe all binary data arrays of the element in a single pass.
+
+        Returns:
+            binary_arrays (list): one dict per binaryDataArray holding the
+                names and values of its cvParams, a mapping from accession to
+                cvParam name, the compression names and the binary element
+        """
+        if self._binary_arrays is None:
+            binary_arrays = []
+            if self.element is not None:
+                for b_data_array in self.element.iterfind(
+                    "./{ns}binaryDataArrayList/{ns}binaryDataArray".format(ns=self.ns)
+                ):
+                    names = set()
+                    values = set()
+                    accessions = {}
+                    comp = []
+                    numpress_encoding = False
+                    for cvParam in b_data_array.iterfind(
+                        "./{ns}cvParam".format(ns=self.ns)
+                    ):
+                        name = cvParam.get("name")
+                        names.add(name)
+                        values.add(cvParam.get("value"))
+                        accessions.setdefault(cvParam.get("accession"), name)
+                        if name is not None and "compression" in name:
+                            if "numpress" in name.lower():
+                                numpress_encoding = True
+                            comp.append(name)
+                    binary_arrays.append(
+                        {
+                            "names": names,
+                            "values": values,
+                            "accessions": accessions,
+                            "compression": comp,
+                            "numpress": numpress_encoding,
+                            "binary": b_data_array.find(
+                                "./{ns}binary".format(ns=self.ns)
+                            ),
+                        }
+                    )
+            self._binary_arrays = binary_arrays
+        return self._binary_arrays
+
     def _get_encoding_parameters(self, array_type):
         """
         Find the correct parameter for decoding and return them as tuple.
@@ -131,88 +378,41 @@ class MsData(object):
             d_type (str)         : data type
             d_array_length (str) : length of the data array
         """
-        numpress_encoding = False
-
-        b_data_string = "./{ns}binaryDataArrayList/{ns}binaryDataArray/{ns}cvParam[@name='{name}']/..".format(
-            ns=self.ns, name=array_type
-        )
-        float_type_string = "./{ns}cvParam[@accession='{Acc}']"
-
-        b_data_array = self.element.find(b_data_string)
-        if b_data_array is None:
+        binary_arrays = self._get_binary_arrays()
+        b_data_array = None
+        for binary_array in binary_arrays:
+            if array_type in binary_array["names"]:
+                b_data_array = binary_array
+                break
+        else:
             # non-standard data array
-            b_data_string = "./{ns}binaryDataArrayList/{ns}binaryDataArray/{ns}cvParam[@value='{value}']/..".format(
-                ns=self.ns, value=array_type
-            )
-            b_data_array = self.element.find(b_data_string)
+            for binary_array in binary_arrays:
+                if array_type in binary_array["values"]:
+                    b_data_array = binary_array
+                    break
 
         comp = []
         if b_data_array is not None:
-            for cvParam in b_data_array.iterfind("./{ns}cvParam".format(ns=self.ns)):
-                if "compression" in cvParam.get("name"):
-                    if "numpress" in cvParam.get("name").lower():
-                        numpress_encoding = True
-                    comp.append(cvParam.get("name"))
-                d_array_length = self.element.get("defaultArrayLength")
-            if not numpress_encoding:
-                try:
-                    # 32-bit float
-                    d_type = b_data_array.find(
-                        float_type_string.format(
-                            ns=self.ns,
-                            Acc=self.obo_translator["32-bit float"]["id"],
-                        )
-                    ).get("name")
-                except:
-                    try:
-                        # 64-bit Float
-                        d_type = b_data_array.find(
-                            float_type_string.format(
-                                ns=self.ns,
-                                Acc=self.obo_translator["64-bit float"]["id"],
-                            )
-                        ).get("name")
-                    except:
-                        try:
-                            # 32-bit integer
-                            d_type = b_data_array.find(
-                                float_type_string.format(
-                                    ns=self.ns,
-                                    Acc=self.obo_translator["32-bit integer"]["id"],
-                                )
-                            ).get("name")
-                        except:
-                            try:
-                                # 64-bit integer
-                                d_type = b_data_array.find(
-                                    float_type_string.format(
-                                        ns=self.ns,
-                                        Acc=self.obo_translator["64-bit integer"]["id"],
-                                    )
-                                ).get("name")
-                            except:
-                                # null-terminated ASCII string
-                                d_type = b_data_array.find(
-                                    float_type_string.format(
-                                        ns=self.ns,
-                                        Acc=self.obo_translator[
-                                            "null-terminated ASCII string"
-                                        ]["id"],
-                                    )
-                                ).get("name")
+            comp = b_data_array["compression"]
+            d_array_length = self.element.get("defaultArrayLength")
+            if not b_data_array["numpress"]:
+                accession = self.obo_translator.accessions.data_type(
+                    b_data_array["accessions"]
+                )
+                d_type = None
+                if accession is not None:
+                    d_type = b_data_array["accessions"][accession]
             else:
                 # compression is numpress, dont need data type here
                 d_type = None
-            data = b_data_array.find("./{ns}binary".format(ns=self.ns))
+            data = b_data_array["binary"]
             if data is not None:
                 data = data.text
         else:
             data = None
             d_array_length = 0
             d_type = "64-bit float"
-        if data is not None:
-            data = data.encode("utf-8")
-        else:
+        if data is None:
             data = ""
         return (data, d_array_length, d_type, comp)
 
@@ -232,6 +432,22 @@ class MsData(object):
         self.internal_precision = int(round(50000.0 / (value * 1e6)))
         return
 
+    @property
+    def noise_level_estimate(self):
+        """
+        Cache of the noise levels estimated per mode, allocated on first use.
+
+        Returns:
+            noise_level_estimate (dict): noise level per estimation mode
+        """
+        if self._noise_level_estimate is None:
+            self._noise_level_estimate = {}
+        return self._noise_level_estimate
+
+    @noise_level_estimate.setter
+    def noise_level_estimate(self, value):
+        self._noise_level_estimate = value
+
     def _decode_to_numpy(self, data, d_array_length, data_type, comp):
         """
         Decode the b64 encoded and packed strings from data as numpy arrays.
@@ -241,42 +457,11 @@ class MsData(object):
                                empty list if there is no raw data or raises an
                                exception if data could not be decoded.
 
-        d_array_length just for compatibility
+        See :py:func:`_decode_binary`.
         """
-        out_data = b64dec(data)
-        if len(out_data) != 0:
-            if "zlib" in comp or "zlib compression" in comp:
-                out_data = zlib.decompress(out_data)
-            if (
-                "ms-np-linear" in comp
-                or "ms-np-pic" in comp
-                or "ms-np-slof" in comp
-                or "MS-Numpress linear prediction compression" in comp
-                or "MS-Numpress short logged float compression" in comp
-            ):
-                out_data = self._decodeNumpress_to_array(out_data, comp)
-            if data_type == "32-bit float":
-                # one character code may be sufficient too (f)
-                f_type = np.float32
-                out_data = np.frombuffer(out_data, f_type)
-            elif data_type == "64-bit float":
-                # one character code may be sufficient too (d)
-                f_type = np.float64
-                out_data = np.frombuffer(out_data, f_type)
-            elif data_type == "32-bit integer":
-                # one character code may be sufficient too (i)
-                i_type = np.int32
-                out_data = np.frombuffer(out_data, i_type)
-            elif data_type == "64-bit integer":
-                # one character code may be sufficient too (l)
-                i_type = np.int64
-                out_data = np.frombuffer(out_data, i_type)
-            # TODO elif data_type == "null-terminated ASCII string":
-            else:
-                raise ValueError(f"Unsupported data type: {data_type}")
-        else:
-            out_data = np.array([])
-        return out_data
+        return _decode_binary(data, d_array_length, data_type, comp)
+
+    _decode = _decode_to_numpy
 
     def _decode_to_tuple(self, data, d_array_length, float_type, comp):
         """
@@ -326,7 +511,8 @@ class MsData(object):
 
         """
         result = []
-        comp_ms_tags = [self.calling_instance.OT[comp]["id"] for comp in compression]
+        name_to_id = self.obo_translator.accessions.name_to_id
+        comp_ms_tags = [name_to_id.get(comp) for comp in compression]
         data = np.frombuffer(data, dtype=np.uint8)
         if "MS:1002312" in comp_ms_tags:
             from .decoder import MSDecoder
@@ -83,19 +83,81 @@ import sys
 import os
 import re
 import gzip
+import hashlib
+import pickle
 import urllib
 
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+COMPILED_CACHE_FORMAT = 1
+"""Version of the layout of the compiled obo cache files."""
+
+
+def obo_cache_dir():
+    """
+    Return the directory of the compiled obo cache.
+
+    The directory is taken from the environment variable
+    ``PYMZML_CACHE_DIR`` and defaults to ``pymzml`` in ``XDG_CACHE_HOME``
+    or ``~/.cache``.
+
+    Returns:
+        cache_dir (str): path to the cache directory
+    """
+    cache_dir = os.environ.get("PYMZML_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "pymzml")
+
+
+def warm_cache(versions=None):
+    """
+    Compile the obo cache for the given versions, e.g. while building a
+    container image, so later processes load the translators in
+    milliseconds.
+
+    Keyword Arguments:
+        versions (list): obo versions to compile, defaults to all versions
+            shipped with pymzml
+
+    Returns:
+        versions (list): normalized versions which have been compiled
+    """
+    if versions is None:
+        obo_dir = os.path.join(os.path.dirname(__file__), "obo")
+        versions = sorted(
+            file_name[len("psi-ms-") : -len(".obo.gz")]
+            for file_name in os.listdir(obo_dir)
+            if file_name.startswith("psi-ms-") and file_name.endswith(".obo.gz")
+        )
+    compiled = []
+    for version in versions:
+        translator = OboTranslator(version)
+        translator.parseOBO()
+        compiled.append(translator.version)
+    return compiled
+
 
 class OboTranslator(object):
     """
     Generates a mapping from MS:xxxxx to names and vice versa for a specific
     obo version
 
+    Parsed obo files are stored as compiled cache in :py:func:`obo_cache_dir`
+    and loaded from there as long as the hash of the obo file matches, see
+    :py:func:`warm_cache`.
+
     Args:
         version (str): obo version
     """
 
     _obo_instance_cache = {}
+    use_compiled_cache = True
 
     def __init__(self, version=None):
         self.version = self.__normalize_version(version)
@@ -108,6 +170,7 @@ class OboTranslator(object):
 
         # Only parse the OBO when necessary, not upon object construction
         self.__obo_parsed = False
+        self._accessions = None
 
     @classmethod
     def from_cache(cls, version):
@@ -127,7 +190,9 @@ class OboTranslator(object):
 
         for lookup in self.lookups:
             if key in lookup:
-                if self.MS_tag_regex.match(key):
+                # keys found in a lookup are strings, a prefix test is
+                # equivalent to matching MS_tag_regex but much cheaper
+                if key.startswith("MS:"):
                     try:
                         return lookup[key]["name"]
                     except:
@@ -135,6 +200,21 @@ class OboTranslator(object):
                 return lookup[key]
         return None
 
+    @property
+    def accessions(self):
+        """
+        Interned lookup table between accessions and names of this obo
+        version, built once on first access.
+
+        Returns:
+            accessions (AccessionTable): precomputed accession table
+        """
+        if self._accessions is None:
+            if not self.__obo_parsed:
+                self.parseOBO()
+            self._accessions = AccessionTable(self)
+        return self._accessions
+
     @staticmethod
     def __normalize_version(version):
         """
@@ -212,6 +292,13 @@ class OboTranslator(object):
                     "The file may be corrupted or not gzipped."
                 )
 
+        source_hash = None
+        if self.use_compiled_cache is True:
+            with open(obo_file, "rb") as fin:
+                source_hash = hashlib.sha1(fin.read()).hexdigest()
+            if self._load_compiled_cache(obo_file, source_hash):
+                return
+
         with open_func(obo_file, "rt", encoding="utf-8") as obo:
             collections = {}
             collect = False
@@ -226,8 +313,90 @@ class OboTranslator(object):
                     if line.strip() != "" and collect is True:
                         k = line.find(":")
                         collections[line[:k]] = line[k + 1 :].strip()
+        if source_hash is not None:
+            self._write_compiled_cache(obo_file, source_hash)
         return
 
+    @staticmethod
+    def _compiled_cache_path(obo_file):
+        """
+        Return the path of the compiled cache of an obo file.
+
+        Args:
+            obo_file (str): path to the obo file
+
+        Returns:
+            cache_file (str): path to the compiled cache file
+        """
+        name = os.path.basename(obo_file)
+        if name.endswith(".gz"):
+            name = name[: -len(".gz")]
+        return os.path.join(obo_cache_dir(), name + ".pickle")
+
+    def _load_compiled_cache(self, obo_file, source_hash):
+        """
+        Load the parsed obo from its compiled cache.
+
+        Args:
+            obo_file (str): path to the obo file
+            source_hash (str): sha1 of the obo file
+
+        Returns:
+            loaded (bool): True if a valid cache was found
+        """
+        cache_file = self._compiled_cache_path(obo_file)
+        try:
+            with open(cache_file, "rb") as fin:
+                header = pickle.load(fin)
+                if header != (COMPILED_CACHE_FORMAT, source_hash):
+                    return False
+                all_dicts, ids, names, definitions = pickle.load(fin)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("Ignoring broken obo cache {0} ({1})".format(cache_file, e))
+            return False
+        self.all_dicts = all_dicts
+        self.id.update(ids)
+        self.name.update(names)
+        self.definition.update(definitions)
+        return True
+
+    def _write_compiled_cache(self, obo_file, source_hash):
+        """
+        Store the parsed obo as compiled cache.
+
+        The cache is written to a temporary file first and moved into place,
+        so concurrent processes never load a partially written cache. The
+        temporary file is removed if writing fails.
+
+        Args:
+            obo_file (str): path to the obo file
+            source_hash (str): sha1 of the obo file
+        """
+        cache_file = self._compiled_cache_path(obo_file)
+        tmp_file = "{0}.{1}.tmp".format(cache_file, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(tmp_file, "wb") as fout:
+                pickle.dump(
+                    (COMPILED_CACHE_FORMAT, source_hash),
+                    fout,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+                pickle.dump(
+                    (self.all_dicts, self.id, self.name, self.definition),
+                    fout,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning("Could not write obo cache ({0})".format(e))
+        finally:
+            # remove the partially written file if writing or pickling failed
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
     def add(self, collection_dict):
         """
         Add a new dict to the translator.
@@ -240,6 +409,7 @@ class OboTranslator(object):
             self.parseOBO()
 
         self.all_dicts.append(collection_dict)
+        self._accessions = None
         if "id" in collection_dict.keys():
             self.id[collection_dict["id"]] = self.all_dicts[-1]
         if "name" in collection_dict.keys():
@@ -269,5 +439,66 @@ class OboTranslator(object):
             return False
 
 
+class AccessionTable(object):
+    """
+    Precomputed, interned mapping between accessions and names of an
+    :py:class:`OboTranslator`.
+
+    Decoding the binary arrays of a spectrum needs to know which cvParams
+    describe the data type and the compression of an array. Resolving these
+    once per obo version turns the per spectrum lookup into plain dict and
+    set hits instead of repeated :py:meth:`OboTranslator.__getitem__` calls.
+
+    Args:
+        translator (OboTranslator): parsed obo translator
+    """
+
+    # binary data types in the order of precedence used for decoding
+    BINARY_DATA_TYPES = (
+        "32-bit float",
+        "64-bit float",
+        "32-bit integer",
+        "64-bit integer",
+        "null-terminated ASCII string",
+    )
+
+    def __init__(self, translator):
+        self.version = translator.version
+        self.name_to_id = {}
+        for name, term in translator.name.items():
+            if "id" in term:
+                self.name_to_id[sys.intern(name)] = sys.intern(term["id"])
+        self.id_to_name = {}
+        for accession, term in translator.id.items():
+            if "name" in term:
+                self.id_to_name[sys.intern(accession)] = sys.intern(term["name"])
+        self.binary_data_type_ids = tuple(
+            self.name_to_id[name]
+            for name in self.BINARY_DATA_TYPES
+            if name in self.name_to_id
+        )
+        self.binary_data_types = frozenset(self.binary_data_type_ids)
+        self.compressions = frozenset(
+            accession
+            for accession, name in self.id_to_name.items()
+            if "compression" in name
+        )
+
+    def data_type(self, accessions):
+        """
+        Find the binary data type accession among the given accessions.
+
+        Args:
+            accessions (dict or set): accessions of a binary data array
+
+        Returns:
+            accession (str): accession of the data type or None
+        """
+        for accession in self.binary_data_type_ids:
+            if accession in accessions:
+                return accession
+        return None
+
+
 if __name__ == "__main__":
     print(__doc__)
@@ -1,7 +1,6 @@
 """Collection of regular expressions to catch spectrum XML-tags."""
 
 import re
-import regex
 
 SPECTRUM_INDEX_PATTERN = re.compile(
     b'(?P<type>(scan=|nativeID="))(?P<nativeID>[0-9]*)">"'
@@ -23,7 +22,6 @@ SIM_INDEX_PATTERN = re.compile(
 """
 Regex pattern for SIM index
 """
-SPECTRUM_PATTERN3 = regex.compile(r"((\w+)=(\w+\s*))+")
 SPECTRUM_ID_PATTERN = re.compile(r'="{0,1}([0-9]*)"{0,1}>{0,1}$')
 SPECTRUM_ID_PATTERN2 = re.compile(r"(scan|scanId)=(\d+)")
 """
@@ -81,3 +79,34 @@ INDEX_LIST_OFFSET_PATTERN = re.compile(
 CHROMATOGRAM_OFFSET_PATTERN = re.compile(
     b'(?P<WTF>[nativeID|idRef])="TIC">(?P<offset>[0-9]*)</offset'
 )
+
+INDEX_CHROMATOGRAM_PATTERN = re.compile(b'<\\s*chromatogram[^>]*id="([^"]*)"')
+"""Regex to catch chromatogram ids while building an index from scratch"""
+
+INDEX_CHROMATOGRAM_COUNT_PATTERN = re.compile(
+    b'<\\s*chromatogramList\\s*count="([^"]*)"'
+)
+"""Regex to catch the chromatogram count while building an index from scratch"""
+
+INDEX_SPECTRUM_PATTERN = re.compile(b'<\\s*spectrum[^>]*id="([^"]*)"')
+"""Regex to catch spectrum ids while building an index from scratch"""
+
+INDEX_SPECTRUM_COUNT_PATTERN = re.compile(b'<\\s*spectrumList\\s*count="([^"]*)"')
+"""Regex to catch the spectrum count while building an index from scratch"""
+
+SPECTRUM_START_PATTERN = re.compile(rb"<spectrum[\s>]")
+"""Regex to catch the opening tag of a spectrum in raw bytes"""
+
+SPECTRUM_HEADER_END_PATTERN = re.compile(rb"<binaryDataArrayList|</spectrum>")
+"""Regex to catch the end of the metadata part of a spectrum in raw bytes"""
+
+
+def __getattr__(name):
+    # the regex module is only needed for SPECTRUM_PATTERN3 and slow to import
+    if name == "SPECTRUM_PATTERN3":
+        import regex
+
+        global SPECTRUM_PATTERN3
+        SPECTRUM_PATTERN3 = regex.compile(r"((\w+)=(\w+\s*))+")
+        return SPECTRUM_PATTERN3
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
@@ -41,14 +41,23 @@ import re
 import os
 import xml.etree.ElementTree as ElementTree
 from collections import defaultdict as ddict
+from collections import deque
+from functools import partial
+import gzip
+import queue
+import threading
+import weakref
 from io import BytesIO
 from pathlib import Path
 
+import numpy as np
+
 from . import spec
 from . import chromatogram
 from . import obo
 from . import regex_patterns
 from .file_interface import FileInterface
+from .file_classes.standardGzip import StandardGzip
 from .file_classes.standardMzml import StandardMzml
 
 from logging import getLogger
@@ -75,6 +84,34 @@ class Reader(object):
         obo_version (str, optional): obo version number as string. If not
             specified the version will be extracted from the mzML file
 
+        persistent_index (bool, optional): store the offset index of
+            uncompressed and plain gzipped mzML files in a sidecar file
+            (``<path>.pymzml-idx``) and load it on later opens instead of
+            re-reading the file.
+
+        index_workers (int, optional): number of processes used to scan
+            uncompressed mzML files without index list if
+            build_index_from_scratch is True. Defaults to 1.
+
+        decode_workers (int, optional): number of threads decoding the binary
+            arrays of the next spectra while iterating, so decoding overlaps
+            with XML parsing. Defaults to 0, i.e. arrays are decoded lazily on
+            first access.
+
+        prefetch (int, optional): number of spectra read and parsed ahead by
+            a background thread while iterating. Defaults to 0, i.e. no
+            prefetching. The thread is stopped by :py:meth:`close`.
+
+        detach (bool, optional): call :py:meth:`~pymzml.spec.Spectrum.detach`
+            on every returned spectrum, i.e. extract metadata and peaks
+            eagerly and drop the xml element. Reduces the memory of spectra
+            that are kept after reading. Defaults to False.
+
+        offset_dict (dict, optional): offset dict of another reader of the
+            same uncompressed mzML file, used instead of reading or building
+            the index of the file, e.g. in the worker processes of
+            :py:meth:`imap`.
+
     Note:
         Setting the precision for MS1 and MSn spectra has changed in version 1.2.
         However, the old syntax as kwargs is still compatible ( e.g. 'MS1_Precision=5e-6').
@@ -88,10 +125,28 @@ class Reader(object):
         build_index_from_scratch=False,
         skip_chromatogram=True,
         index_regex=None,
+        persistent_index=False,
+        index_workers=1,
+        decode_workers=0,
+        prefetch=0,
+        detach=False,
+        offset_dict=None,
         **kwargs,
     ):
         """Initialize and set required attributes."""
         self.index_regex = index_regex
+        self.detach = detach
+        self.decode_workers = decode_workers
+        self._decoder = None
+        self._decode_queue = deque()
+        self._decode_exhausted = False
+        self.prefetch = prefetch
+        self._prefetch_thread = None
+        self._prefetch_queue = None
+        self._prefetch_stop = None
+        self._file_lock = threading.RLock()
+        self.persistent_index = persistent_index
+        self.index_workers = index_workers
         self.build_index_from_scratch = build_index_from_scratch
         self.skip_chromatogram = skip_chromatogram
         if MS_precisions is None:
@@ -126,7 +181,9 @@ class Reader(object):
             self.info["encoding"] = self._guess_encoding(self.path_or_file)
 
         self.info["file_object"] = self._open_file(
-            self.path_or_file, build_index_from_scratch=self.build_index_from_scratch
+            self.path_or_file,
+            build_index_from_scratch=self.build_index_from_scratch,
+            offset_dict=offset_dict,
         )
         self.info["offset_dict"] = self.info["file_object"].offset_dict
         if obo_version:
@@ -154,6 +211,99 @@ class Reader(object):
         ...     print(spectrum.mz, end='\\r')
 
         """
+        if self.decode_workers:
+            element = self._next_decoded()
+        else:
+            element = self._next_parsed()
+        if self.detach and isinstance(element, spec.Spectrum):
+            element.detach()
+        return element
+
+    def _next_parsed(self):
+        """
+        Return the next parsed element, either from the prefetch thread or
+        by parsing it directly.
+
+        Returns:
+            element (Spectrum or Chromatogram): the next element
+        """
+        if not self.prefetch:
+            return self._next_element()
+        if self._prefetch_thread is None:
+            self._prefetch_queue = queue.Queue(maxsize=self.prefetch)
+            self._prefetch_stop = threading.Event()
+            self._prefetch_thread = threading.Thread(
+                target=_prefetch_worker,
+                args=(weakref.ref(self), self._prefetch_queue, self._prefetch_stop),
+                daemon=True,
+            )
+            self._prefetch_thread.start()
+        item = self._prefetch_queue.get()
+        if isinstance(item, _PrefetchEnd):
+            # the worker has finished this pass, the next call starts a new one
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+            if item.error is not None:
+                raise item.error
+            raise StopIteration
+        return item
+
+    def _stop_prefetch(self):
+        """Stop the prefetch thread and drop all prefetched elements."""
+        if self._prefetch_thread is None:
+            return
+        self._prefetch_stop.set()
+        while self._prefetch_thread.is_alive():
+            try:
+                self._prefetch_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._prefetch_thread.join()
+        self._prefetch_thread = None
+        self._prefetch_queue = None
+
+    def _next_decoded(self):
+        """
+        Return the next element with its binary arrays decoded.
+
+        Up to 2 * decode_workers elements are parsed ahead and their arrays
+        are decoded by a :py:class:`~pymzml.decoder.Decoder` in the meantime.
+
+        Returns:
+            element (Spectrum or Chromatogram): the next decoded element
+        """
+        if self._decoder is None:
+            # imported here, the decoder is only needed with decode_workers
+            from .decoder import Decoder
+
+            self._decoder = Decoder(nb_workers=self.decode_workers)
+        while (
+            not self._decode_exhausted
+            and len(self._decode_queue) <= 2 * self.decode_workers
+        ):
+            try:
+                element = self._next_parsed()
+            except StopIteration:
+                self._decode_exhausted = True
+                break
+            self._decode_queue.append((element, self._decoder.submit(element)))
+        if len(self._decode_queue) == 0:
+            self._decode_exhausted = False
+            raise StopIteration
+        element, futures = self._decode_queue.popleft()
+        return self._decoder.register(element, futures)
+
+    def _next_element(self):
+        """
+        Parse the next spectrum or chromatogram from the file.
+
+        Returns:
+            element (Spectrum or Chromatogram): the next element
+        """
+        with self._file_lock:
+            return self._parse_next_element()
+
+    def _parse_next_element(self):
         has_ref_group = self.info.get("referenceable_param_group_list", False)
         while True:
             event, element = next(self.iter, ("END", "END"))
@@ -180,10 +330,7 @@ class Reader(object):
                     return spectrum
             elif event == "END":
                 # reinit iter
-                self.info["file_object"].close()
-                self.info["file_object"] = self._open_file(
-                    self.path_or_file, build_index_from_scratch=False
-                )
+                self._reopen_file()
                 self.iter = self._init_iter()
                 raise StopIteration
 
@@ -205,11 +352,27 @@ class Reader(object):
         except:
             pass
 
-        element = self.info["file_object"][identifier]
+        with self._file_lock:
+            element = self.info["file_object"][identifier]
+        return self._prepare_element(element)
+
+    def _prepare_element(self, element):
+        """
+        Set obo translator and measured precision on an accessed element and
+        detach spectra if requested.
+
+        Arguments:
+            element (Spectrum or Chromatogram): element read from the file
+
+        Returns:
+            element (Spectrum or Chromatogram): the prepared element
+        """
         element.obo_translator = self.OT
 
         if isinstance(element, spec.Spectrum):
             element.measured_precision = self.ms_precisions[element.ms_level]
+            if self.detach:
+                element.detach()
 
         return element
 
@@ -224,13 +387,25 @@ class Reader(object):
         """Return file object in use."""
         return type(self.info["file_object"].file_handler)
 
-    def _open_file(self, path_or_file, build_index_from_scratch=False):
+    def _open_file(
+        self,
+        path_or_file,
+        build_index_from_scratch=False,
+        offset_dict=None,
+        checkpoint_index=None,
+    ):
         """
         Open the path using the FileInterface class as a wrapper.
 
         Arguments:
             path (str): path to the file to parse
 
+        Keyword Arguments:
+            build_index_from_scratch (bool): parse the file to build the index
+            offset_dict (dict): offset dict used instead of the file's index
+            checkpoint_index (tuple): checkpoint index of a plain gzipped
+                file used instead of building it again
+
         Returns:
             (FileInterface): Wrapper class for compressed and uncompressed
                 mzml files
@@ -240,6 +415,32 @@ class Reader(object):
             self.info["encoding"],
             build_index_from_scratch=build_index_from_scratch,
             index_regex=self.index_regex,
+            persistent_index=self.persistent_index,
+            index_workers=self.index_workers,
+            offset_dict=offset_dict,
+            checkpoint_index=checkpoint_index,
+        )
+
+    def _reopen_file(self):
+        """
+        Close the file and open it again to restart iterating.
+
+        The offset dict of uncompressed files and the checkpoint index of
+        plain gzipped files are passed on, so the index is neither read nor
+        built again.
+        """
+        file_object = self.info["file_object"]
+        file_object.close()
+        offset_dict = None
+        checkpoint_index = None
+        if self.file_class == StandardMzml:
+            offset_dict = file_object.offset_dict
+        elif self.file_class == StandardGzip:
+            checkpoint_index = file_object.file_handler.checkpoint_index
+        self.info["file_object"] = self._open_file(
+            self.path_or_file,
+            offset_dict=offset_dict,
+            checkpoint_index=checkpoint_index,
         )
 
     def _guess_encoding(self, mzml_file):
@@ -510,13 +711,11 @@ class Reader(object):
                 )
 
             # Reset the file pointer and iterate to find the chromatogram
+            self._stop_prefetch()
             temp_skip_chromatogram = self.skip_chromatogram
             self.skip_chromatogram = False
 
-            self.info["file_object"].close()
-            self.info["file_object"] = self._open_file(
-                self.path_or_file, build_index_from_scratch=False
-            )
+            self._reopen_file()
             self.iter = self._init_iter()
 
             chrom_count = 0
@@ -534,7 +733,337 @@ class Reader(object):
 
         raise ValueError("Identifier must be a string or an integer")
 
+    def get_spectra(self, identifiers, batch_size=1000):
+        """
+        Access several spectra at once.
+
+        Identifiers are processed in batches of batch_size. Within a batch
+        the spectra are read in order of their position in the file and
+        neighbouring spectra are read with a single read call, which is
+        much faster than accessing scattered spectra one by one via
+        :py:meth:`__getitem__`. Spectra are yielded in the order of
+        identifiers.
+
+        Arguments:
+            identifiers (iterable): native ids of the spectra
+
+        Keyword Arguments:
+            batch_size (int): number of identifiers read together
+
+        Returns:
+            spectra (generator): spectrum objects in the order of identifiers
+
+        Example:
+
+        >>> import pymzml
+        >>> run = pymzml.run.Reader("tests/data/example.mzML")
+        >>> for spectrum in run.get_spectra([10, 3, 7]):
+        ...     print(spectrum.ID)
+        """
+        batch = []
+        for identifier in identifiers:
+            batch.append(identifier)
+            if len(batch) >= batch_size:
+                yield from self._get_batch(batch)
+                batch = []
+        if batch:
+            yield from self._get_batch(batch)
+
+    def get_chromatograms(self, identifiers, batch_size=1000):
+        """
+        Access several chromatograms at once.
+
+        Works like :py:meth:`get_spectra` but for chromatogram identifiers
+        like 'TIC'.
+
+        Arguments:
+            identifiers (iterable): native ids of the chromatograms
+
+        Keyword Arguments:
+            batch_size (int): number of identifiers read together
+
+        Returns:
+            chromatograms (generator): chromatogram objects in the order of
+                identifiers
+        """
+        return self.get_spectra(identifiers, batch_size=batch_size)
+
+    def _get_batch(self, identifiers):
+        """
+        Read a batch of elements with offset sorted I/O.
+
+        Arguments:
+            identifiers (list): native ids of the elements
+
+        Returns:
+            elements (generator): prepared elements in the order of identifiers
+        """
+        with self._file_lock:
+            elements = self.info["file_object"].get_items(identifiers)
+        for element in elements:
+            yield self._prepare_element(element)
+
+    def imap(self, func, workers=None, chunksize=64, ordered=True):
+        """
+        Apply func to every spectrum of the file using a pool of processes.
+
+        The offset index is used to split the spectra into chunks of
+        consecutive spectra, i.e. contiguous byte ranges of the file. Every
+        worker process opens its own reader on the file, parses the spectra
+        of a chunk and applies func to them. Only the return values of func
+        are sent back to the calling process.
+
+        Parallel processing requires an uncompressed mzML file given as path.
+        Before splitting, the file is scanned for elements missing from the
+        offset index, so the same spectra are processed as by iterating the
+        reader. Otherwise all spectra are processed one by one in the
+        calling process.
+
+        Arguments:
+            func (callable): function called with every spectrum. Has to be
+                picklable, i.e. defined at module level.
+
+        Keyword Arguments:
+            workers (int): number of worker processes, defaults to the
+                number of cpus
+            chunksize (int): number of spectra processed per task
+            ordered (bool): yield results in file order. If False, results
+                are yielded as soon as a chunk is finished.
+
+        Returns:
+            results (generator): return values of func
+
+        Example:
+
+        >>> import pymzml
+        >>> def base_peak(spectrum):
+        ...     return spectrum.ID, spectrum.highest_peaks(1)
+        >>> run = pymzml.run.Reader("tests/data/example.mzML")
+        >>> for spectrum_id, peak in run.imap(base_peak, workers=4):
+        ...     print(spectrum_id, peak)
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        identifiers = None
+        if workers > 1:
+            identifiers, offset_dict = self._imap_identifiers(workers)
+        if identifiers is None:
+            for element in self:
+                yield func(element)
+            return
+
+        chunks = [
+            identifiers[pos : pos + chunksize]
+            for pos in range(0, len(identifiers), chunksize)
+        ]
+        reader_kwargs = {
+            "MS_precisions": self.ms_precisions,
+            "obo_version": self.info["obo_version"],
+            "skip_chromatogram": self.skip_chromatogram,
+            "index_regex": self.index_regex,
+            "offset_dict": offset_dict,
+        }
+        # imported here, multiprocessing is slow to import and rarely needed
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        task = partial(_imap_chunk, func)
+        # keep a bounded number of chunks in flight to limit memory usage
+        max_pending = 4 * workers
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_imap_worker,
+            initargs=(self.path_or_file, reader_kwargs),
+        ) as executor:
+            chunks = iter(chunks)
+            if ordered:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(task, chunk))
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            else:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(executor.submit(task, chunk))
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield from future.result()
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+
+    def _imap_identifiers(self, workers):
+        """
+        Collect the ids of the elements processed by imap sorted by offset.
+
+        Spectra precede chromatograms in mzML files, so if the offset index
+        lists at least as many elements as the file declares spectra, the
+        first offsets are the spectra. Otherwise the index is incomplete,
+        e.g. for truncated files, and the file is scanned for all spectrum
+        and chromatogram tags to add the missing elements by their id string.
+
+        Arguments:
+            workers (int): number of processes used to scan the file
+
+        Returns:
+            identifiers (list): ids in file order or None if the file can not
+                be processed in parallel
+            offset_dict (dict): offset dict completed by the scanned elements
+        """
+        if not isinstance(self.path_or_file, str):
+            return None, None
+        if self.file_class != StandardMzml:
+            return None, None
+        offset_dict = self.info["offset_dict"]
+        offsets = {}
+        for identifier, offset in offset_dict.items():
+            if offset is None or str(identifier).upper() == "TIC":
+                continue
+            if isinstance(offset, tuple):
+                offset = offset[0]
+            # keep the first id for elements listed several times in the index
+            offsets.setdefault(offset, identifier)
+        spectrum_count = self.info["spectrum_count"]
+        if spectrum_count and len(offsets) >= spectrum_count:
+            sorted_offsets = sorted(offsets)
+            if self.skip_chromatogram:
+                sorted_offsets = sorted_offsets[:spectrum_count]
+        else:
+            offset_dict = dict(offset_dict)
+            file_handler = self.info["file_object"].file_handler
+            chrom_positions, spec_positions, _, _ = (
+                file_handler._scan_data_indices_parallel(workers)
+            )
+            if self.skip_chromatogram:
+                # drop chromatograms listed in the index, e.g. the TIC
+                for offset in chrom_positions.values():
+                    offsets.pop(offset, None)
+            else:
+                spec_positions.update(chrom_positions)
+            for identifier, offset in spec_positions.items():
+                if offset not in offsets:
+                    offsets[offset] = identifier
+                    offset_dict[identifier] = (offset,)
+            sorted_offsets = sorted(offsets)
+        if len(sorted_offsets) == 0:
+            return None, None
+        return [offsets[offset] for offset in sorted_offsets], offset_dict
+
+    def iter_headers(self, chunk_size=2**20):
+        """
+        Iterate over the metadata of all spectra without their binary data.
+
+        The file is scanned on byte level and everything from the
+        binaryDataArrayList element to the end of a spectrum is skipped, so
+        neither the base64 encoded data is parsed nor kept in memory. The
+        yielded spectra offer all metadata properties like ID, ms_level,
+        scan_time, TIC and selected_precursors, but no peaks.
+
+        Keyword Arguments:
+            chunk_size (int): number of bytes read at once
+
+        Returns:
+            spectra (generator): header-only spectrum objects in file order
+
+        Note:
+            Files passed as file objects are iterated with the regular parser.
+        """
+        if not isinstance(self.path_or_file, str):
+            for element in self:
+                if isinstance(element, spec.Spectrum):
+                    yield element
+            return
+
+        has_ref_group = self.info.get("referenceable_param_group_list", False)
+        ns = re.match(r"\{.*\}", self.root.tag)
+        xmlns = ' xmlns="{0}"'.format(ns.group(0)[1:-1]).encode() if ns else b""
+        with open(self.path_or_file, "rb") as fin:
+            magic = fin.read(2)
+        _open = gzip.open if magic == b"\x1f\x8b" else open
+        with _open(self.path_or_file, "rb") as stream:
+            for header in _iter_spectrum_headers(stream, chunk_size=chunk_size):
+                parser = ElementTree.XMLParser(encoding=self.info["encoding"])
+                parser.feed(header[:9])
+                parser.feed(xmlns)
+                parser.feed(header[9:])
+                parser.feed(b"</spectrum>")
+                spectrum = spec.Spectrum(parser.close(), obo_version=self.OT.version)
+                if has_ref_group:
+                    spectrum._set_params_from_reference_group(
+                        self.info["referenceable_param_group_list_element"]
+                    )
+                spectrum.measured_precision = self.ms_precisions[spectrum.ms_level]
+                yield spectrum
+
+    def get_headers(self):
+        """
+        Collect the metadata of all spectra into a NumPy structured array.
+
+        Uses :py:meth:`iter_headers`, so binary data is never decoded.
+
+        Returns:
+            headers (numpy.ndarray): structured array with the fields id,
+                index, ms_level, scan_time (in minutes), tic and precursor_mz.
+                Missing values are -1 for integer fields and NaN for floats.
+                The id field holds integers if all native ids are numeric
+                and strings otherwise.
+
+        Example:
+
+        >>> import pymzml
+        >>> run = pymzml.run.Reader("tests/data/example.mzML")
+        >>> headers = run.get_headers()
+        >>> ms1 = headers[headers["ms_level"] == 1]
+        >>> print(ms1["scan_time"].max())
+        """
+        rows = []
+        for spectrum in self.iter_headers():
+            scan_time, unit = spectrum.scan_time
+            if scan_time is not None:
+                try:
+                    scan_time = spectrum.scan_time_in_minutes()
+                except Exception:
+                    scan_time = None
+            tic = spectrum._find_param("MS:1000285", direct=True)
+            precursors = spectrum.selected_precursors
+            rows.append(
+                (
+                    spectrum.ID,
+                    spectrum.index if isinstance(spectrum.index, int) else -1,
+                    -1 if spectrum.ms_level is None else spectrum.ms_level,
+                    np.nan if scan_time is None else scan_time,
+                    np.nan if tic is None else float(tic.get("value")),
+                    precursors[0]["mz"] if precursors else np.nan,
+                )
+            )
+        if all(isinstance(row[0], int) for row in rows):
+            id_dtype = "<i8"
+        else:
+            id_dtype = "U{0}".format(max(len(str(row[0])) for row in rows))
+            rows = [(str(row[0]),) + row[1:] for row in rows]
+        dtype = np.dtype(
+            [
+                ("id", id_dtype),
+                ("index", "<i8"),
+                ("ms_level", "<i2"),
+                ("scan_time", "<f8"),
+                ("tic", "<f8"),
+                ("precursor_mz", "<f8"),
+            ]
+        )
+        return np.array(rows, dtype=dtype)
+
     def close(self):
+        self._stop_prefetch()
+        if self._decoder is not None:
+            self._decoder.close()
+            self._decoder = None
+            self._decode_queue.clear()
+            self._decode_exhausted = False
         self.info["file_object"].close()
 
     def term_is_a_member(self, tested_term, member_of_term):
@@ -555,5 +1084,142 @@ class Reader(object):
         return is_member
 
 
+def _iter_spectrum_headers(stream, chunk_size=2**20):
+    """
+    Scan a binary stream for spectra and yield their metadata part.
+
+    Everything from the binaryDataArrayList element to the closing spectrum
+    tag is skipped without being kept in memory.
+
+    Arguments:
+        stream (IOBase): binary stream of an mzML file
+
+    Keyword Arguments:
+        chunk_size (int): number of bytes read at once
+
+    Returns:
+        headers (generator): bytes from the opening spectrum tag up to the
+            binaryDataArrayList element or the closing spectrum tag
+    """
+    close_tag = b"</spectrum>"
+    data = b""
+    pos = 0
+    mode = "start"
+    eof = False
+    while True:
+        if mode == "start":
+            match = regex_patterns.SPECTRUM_START_PATTERN.search(data, pos)
+            if match:
+                pos = match.start()
+                mode = "header"
+                continue
+            # keep a tail which might hold the beginning of an opening tag
+            pos = max(len(data) - 16, pos)
+        elif mode == "header":
+            match = regex_patterns.SPECTRUM_HEADER_END_PATTERN.search(data, pos)
+            if match:
+                yield data[pos : match.start()]
+                pos = match.end()
+                mode = "start" if match.group(0) == close_tag else "skip"
+                continue
+        else:
+            end = data.find(close_tag, pos)
+            if end != -1:
+                pos = end + len(close_tag)
+                mode = "start"
+                continue
+            pos = max(len(data) - len(close_tag), pos)
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        eof = len(chunk) == 0
+        data = data[pos:] + chunk
+        pos = 0
+
+
+class _PrefetchEnd(object):
+    """Marks the end of a prefetched pass, carrying the error if one occurred."""
+
+    def __init__(self, error=None):
+        self.error = error
+
+
+def _prefetch_worker(reader_ref, prefetch_queue, stop):
+    """
+    Parse elements of a reader into a bounded queue until the end of the file
+    is reached, stop is set or the reader has been garbage collected.
+
+    Arguments:
+        reader_ref (weakref.ref): weak reference to the reader
+        prefetch_queue (queue.Queue): queue receiving the parsed elements and
+            a final :py:class:`_PrefetchEnd`
+        stop (threading.Event): event to stop the worker
+    """
+    while not stop.is_set():
+        reader = reader_ref()
+        if reader is None:
+            return
+        try:
+            item = reader._next_element()
+        except StopIteration:
+            item = _PrefetchEnd()
+        except Exception as error:
+            item = _PrefetchEnd(error)
+        del reader
+        while not stop.is_set():
+            try:
+                prefetch_queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if reader_ref() is None:
+                    return
+        if isinstance(item, _PrefetchEnd):
+            return
+
+
+_imap_reader = None
+
+
+def _init_imap_worker(path, reader_kwargs):
+    """
+    Open the reader of an :py:meth:`Reader.imap` worker process.
+
+    reader_kwargs contain the offset dict of the calling process, so the
+    worker reader uses it instead of reading or building the index again.
+
+    Arguments:
+        path (str): path to the mzML file
+        reader_kwargs (dict): keyword arguments for :py:class:`Reader`
+    """
+    global _imap_reader
+    _imap_reader = Reader(path, **reader_kwargs)
+
+
+def _imap_chunk(func, identifiers):
+    """
+    Apply func to the elements of one chunk in an imap worker process.
+
+    Arguments:
+        func (callable): function called with every spectrum
+        identifiers (list): ids of the elements in the chunk
+
+    Returns:
+        results (list): return values of func
+    """
+    reader = _imap_reader
+    has_ref_group = reader.info.get("referenceable_param_group_list", False)
+    results = []
+    for element in reader.get_spectra(identifiers):
+        if isinstance(element, chromatogram.Chromatogram):
+            if reader.skip_chromatogram:
+                continue
+        elif has_ref_group:
+            element._set_params_from_reference_group(
+                reader.info["referenceable_param_group_list_element"]
+            )
+        results.append(func(element))
+    return results
+
+
 if __name__ == "__main__":
     print(__doc__)
@@ -50,7 +50,6 @@ import zlib
 from base64 import b64decode as b64dec
 from collections import defaultdict as ddict
 from functools import lru_cache
-from operator import itemgetter as itemgetter
 from struct import unpack
 
 import numpy as np
@@ -59,17 +58,56 @@ from logging import getLogger
 
 logger = getLogger(__name__)
 
-try:
-    DECON_DEP = True
-    from ms_deisotope.deconvolution import deconvolute_peaks
-    from ms_peak_picker import simple_peak
-except (ImportError, ModuleNotFoundError) as e:
-    DECON_DEP = False
-    pass
 from . import regex_patterns
-from .decoder import MSDecoder
 from .obo import OboTranslator
 
+
+@lru_cache(maxsize=None)
+def _deconvolution_dependencies():
+    """
+    Import the optional deconvolution dependencies on first use.
+
+    Returns:
+        dependencies (tuple or None): deconvolute_peaks and simple_peak or
+            None if ms_deisotope is not installed
+    """
+    try:
+        from ms_deisotope.deconvolution import deconvolute_peaks
+        from ms_peak_picker import simple_peak
+    except (ImportError, ModuleNotFoundError):
+        return None
+    return deconvolute_peaks, simple_peak
+
+
+@lru_cache(maxsize=None)
+def _scipy_sparse():
+    """
+    Import the optional scipy.sparse on first use.
+
+    Returns:
+        scipy_sparse (module or None): scipy.sparse or None if scipy is not
+            installed
+    """
+    try:
+        import scipy.sparse as scipy_sparse
+    except (ImportError, ModuleNotFoundError):
+        return None
+    return scipy_sparse
+
+
+def __getattr__(name):
+    # optional dependencies are only imported when they are needed (PEP 562)
+    if name == "DECON_DEP":
+        return _deconvolution_dependencies() is not None
+    if name == "SCIPY_DEP":
+        return _scipy_sparse() is not None
+    if name == "MSDecoder":
+        from .decoder import MSDecoder
+
+        return MSDecoder
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
 PROTON = 1.00727646677
 ISOTOPE_AVERAGE_DIFFERENCE = 1.002
 
@@ -357,6 +395,8 @@ class MS_Spectrum(MsData):
         result = []
         comp_ms_tags = [self.calling_instance.OT[comp]["id"] for comp in compression]
         data = np.frombuffer(data, dtype=np.uint8)
+        from .decoder import MSDecoder
+
         if "MS:1002312" in comp_ms_tags:
             result = MSDecoder.decode_linear(data)
         elif "MS:1002313" in comp_ms_tags:
@@ -406,6 +446,32 @@ class Spectrum(MsData):
 
     """
 
+    __slots__ = [
+        "_centroided_peaks",
+        "_centroided_peaks_sorted_by_i",
+        "_extreme_values",
+        "_ID",
+        "_id_dict",
+        "_index",
+        "_ms_deisotop_warning_printed",
+        "_ms_level",
+        "_peak_cache",
+        "_peak_search",
+        "_precursors",
+        "_reprofiled_peaks",
+        "_scan_time",
+        "_scan_time_in_minutes",
+        "_scan_time_unit",
+        "_selected_precursors",
+        "_t_mass_set",
+        "_t_mz_set",
+        "_TIC",
+        "_transformed_mass_with_error",
+        "_transformed_mz_with_error",
+        "_transformed_peaks",
+        "reprofiled",
+    ]
+
     def __init__(
         self,
         element=ElementTree.Element(""),
@@ -413,29 +479,6 @@ class Spectrum(MsData):
         *,
         obo_version=None,
     ):
-        __slots__ = [
-            "_centroided_peaks",
-            "_centroided_peaks_sorted_by_i",
-            "_deconvoluted_peaks",
-            "_extreme_values",
-            "_i",
-            "_ID",
-            "_id_dict",
-            "_index",
-            "_measured_precision",
-            "_peaks",
-            "_profile",
-            "_reprofiled_peaks",
-            "_t_mass_set",
-            "_t_mz_set",
-            "_time",
-            "_transformed_mass_with_error",
-            "_transformed_mz_with_error",
-            "_transformed_peakscalling_instanceelement",
-            "internal_precisionnoise_level_estimate",
-            "selected_precursors",
-        ]
-
         self._centroided_peaks = None
         self._centroided_peaks_sorted_by_i = None
         self._extreme_values = None
@@ -445,12 +488,9 @@ class Spectrum(MsData):
         self._index = None
         self._ms_level = None
         self._mz = None
-        self._peak_dict = {
-            "raw": None,
-            "centroided": None,
-            "reprofiled": None,
-            "deconvoluted": None,
-        }
+        self._params = None
+        self._binary_arrays = None
+        self._peak_cache = None
         self._selected_precursors = None
         self._profile = None
         self.reprofiled = False
@@ -465,23 +505,38 @@ class Spectrum(MsData):
         self._transformed_mass_with_error = None
         self._transformed_mz_with_error = None
         self._transformed_peaks = None
+        self._peak_search = None
         self.obo_translator = OboTranslator.from_cache(obo_version)
         self.element = element
         self.measured_precision = measured_precision
-        self.noise_level_estimate = {}
+        self._noise_level_estimate = None
 
         self.ns = ""
         if self.element is not None:
-            self.ns = (
-                re.match(r"\{.*\}", element.tag).group(0)
-                if re.match(r"\{.*\}", element.tag)
-                else ""
-            )
+            match = re.match(r"\{.*\}", element.tag)
+            if match:
+                self.ns = sys.intern(match.group(0))
 
-        self._decode = self._decode_to_numpy
-        self._array = np.array
         self._ms_deisotop_warning_printed = False
 
+    @property
+    def _peak_dict(self):
+        """
+        Cache of the raw, centroided, reprofiled and deconvoluted peaks,
+        allocated on first use.
+
+        Returns:
+            peak_dict (dict): peaks per peak type, None if not computed yet
+        """
+        if self._peak_cache is None:
+            self._peak_cache = {
+                "raw": None,
+                "centroided": None,
+                "reprofiled": None,
+                "deconvoluted": None,
+            }
+        return self._peak_cache
+
     def __del__(self):
         """
         Clear self.element to limit RAM usage
@@ -489,6 +544,49 @@ class Spectrum(MsData):
         if self.element is not None:
             self.element.clear()
 
+    def detach(self):
+        """
+        Extract all metadata and the raw peaks eagerly and drop the xml
+        element, so that a retained spectrum no longer holds the element tree
+        including the encoded binary data.
+
+        Accession based access, e.g. spectrum["MS:1000016"], keeps working.
+        Methods that need the element, e.g.
+        :py:meth:`~pymzml.msdata.MsData.get_element_by_path` or
+        :py:meth:`~pymzml.msdata.MsData.to_string`, are not available on
+        detached spectra and the selected precursors no longer contain their
+        precursor element.
+
+        Returns:
+            self (Spectrum): the detached spectrum
+        """
+        if self.element is None:
+            return self
+        self.ID
+        self.index
+        self.id_dict
+        self.ms_level
+        self.scan_time
+        if self._find_param("MS:1000285", direct=True) is not None:
+            self.TIC
+        for precursor in self.selected_precursors:
+            precursor.pop("element", None)
+        self._precursors = []
+        for precursor in self.element.findall(
+            "./{ns}precursorList/{ns}precursor".format(ns=self.ns)
+        ):
+            spec_ref = precursor.get("spectrumRef")
+            if spec_ref is not None:
+                self._precursors.append(
+                    regex_patterns.SPECTRUM_ID_PATTERN.search(spec_ref).group(1)
+                )
+        self.peaks("raw")
+        self._detach_params()
+        self._binary_arrays = None
+        self.element.clear()
+        self.element = None
+        return self
+
     def __add__(self, other_spec):
         """
         Adds two pymzml spectra
@@ -519,8 +617,9 @@ class Spectrum(MsData):
             self.set_peaks(reprofiled, "reprofiled")
         if other_spec._peak_dict["reprofiled"] is None:
             other_spec.set_peaks(other_spec._reprofile_Peaks(), "reprofiled")
-        for mz, i in other_spec.peaks("reprofiled"):
-            self._peak_dict["reprofiled"][mz] += i
+        self._peak_dict["reprofiled"] = self._merge_reprofiled(
+            self._peak_dict["reprofiled"], other_spec.peaks("reprofiled")
+        )
         return self
 
     def __sub__(self, other_spec):
@@ -539,8 +638,9 @@ class Spectrum(MsData):
             self.set_peaks(self._reprofile_Peaks(), "reprofiled")
         if other_spec._peak_dict["reprofiled"] is None:
             other_spec.set_peaks(other_spec._reprofile_Peaks(), "reprofiled")
-        for mz, i in other_spec.peaks("reprofiled"):
-            self._peak_dict["reprofiled"][mz] -= i
+        self._peak_dict["reprofiled"] = self._merge_reprofiled(
+            self._peak_dict["reprofiled"], other_spec.peaks("reprofiled"), factor=-1
+        )
         self.set_peaks(None, "centroided")
         self.set_peaks(None, "raw")
         return self
@@ -578,8 +678,10 @@ class Spectrum(MsData):
                 "centroided",
             )
         if self._peak_dict["reprofiled"] is not None:
-            for mz in self._peak_dict["reprofiled"].keys():
-                self._peak_dict["reprofiled"][mz] *= float(value)
+            peaks = self._peak_dict["reprofiled"]
+            self._peak_dict["reprofiled"] = np.column_stack(
+                (peaks[:, 0], peaks[:, 1] * float(value))
+            )
         return self
 
     def __truediv__(self, value):
@@ -594,8 +696,10 @@ class Spectrum(MsData):
                 by value.
         """
         if self._peak_dict["reprofiled"] is not None:
-            for mz, i in self.peaks("reprofiled"):
-                self._peak_dict["reprofiled"][mz] /= float(value)
+            peaks = self._peak_dict["reprofiled"]
+            self._peak_dict["reprofiled"] = np.column_stack(
+                (peaks[:, 0], peaks[:, 1] / float(value))
+            )
         if self._peak_dict["raw"] is not None:
             if len(self._peak_dict["raw"]) != 0:
                 self.set_peaks(
@@ -656,9 +760,8 @@ class Spectrum(MsData):
                     accession = self.obo_translator[accession]["id"]
                 except TypeError:
                     accession = "---"
-            search_string = './/*[@accession="{0}"]'.format(accession)
             elements = []
-            for x in self.element.iterfind(search_string):
+            for x in self._get_params().get(accession, []):
                 val = x.attrib.get("value", "")
                 try:
                     val = float(val)
@@ -809,9 +912,7 @@ class Spectrum(MsData):
         """
         if self._TIC is None:
             self._TIC = float(
-                self.element.find(
-                    "./{ns}cvParam[@accession='MS:1000285']".format(ns=self.ns)
-                ).get("value")
+                self._find_param("MS:1000285", direct=True).get("value")
             )  # put hardcoded MS tags in minimum.py???
         return self._TIC
 
@@ -887,9 +988,7 @@ class Spectrum(MsData):
             ms_level (int):
         """
         if self._ms_level is None:
-            sub_element = self.element.find(
-                ".//{ns}cvParam[@accession='MS:1000511']".format(ns=self.ns)
-            )
+            sub_element = self._find_param("MS:1000511")
             if sub_element is not None:
                 self._ms_level = int(
                     sub_element.get("value")
@@ -909,9 +1008,7 @@ class Spectrum(MsData):
             scan_time_unit (str):
         """
         if self._scan_time is None or self._scan_time_unit is None:
-            scan_time_ele = self.element.find(
-                ".//*[@accession='MS:1000016']".format(ns=self.ns)
-            )
+            scan_time_ele = self._find_param("MS:1000016")
             if scan_time_ele is not None:
                 self._scan_time = float(scan_time_ele.attrib.get("value"))
                 self._scan_time_unit = scan_time_ele.get("unitName", "unicorns")
@@ -953,15 +1050,10 @@ class Spectrum(MsData):
             selected_precursors (list):
         """
         if self._selected_precursors is None:
-            selected_precursor_mzs = self.element.findall(
-                ".//*[@accession='MS:1000744']"
-            )
-            selected_precursor_is = self.element.findall(
-                ".//*[@accession='MS:1000042']"
-            )
-            selected_precursor_cs = self.element.findall(
-                ".//*[@accession='MS:1000041']"
-            )
+            params = self._get_params()
+            selected_precursor_mzs = params.get("MS:1000744", [])
+            selected_precursor_is = params.get("MS:1000042", [])
+            selected_precursor_cs = params.get("MS:1000041", [])
             precursors = self.element.findall(
                 "./{ns}precursorList/{ns}precursor".format(ns=self.ns)
             )
@@ -1013,7 +1105,7 @@ class Spectrum(MsData):
             precursor(list): list of precursor ids for this spectrum.
         """
         self.deprecation_warning(sys._getframe().f_code.co_name)
-        if not self._precursors:
+        if self._precursors is None:
             precursors = self.element.findall(
                 "./{ns}precursorList/{ns}precursor".format(ns=self.ns)
             )
@@ -1096,12 +1188,7 @@ class Spectrum(MsData):
         """
         if self._peak_dict[peak_type] is None:
             if self._peak_dict["raw"] is None:
-                mz_params = self._get_encoding_parameters("m/z array")
-                i_params = self._get_encoding_parameters("intensity array")
-                mz = self._decode(*mz_params)
-                i = self._decode(*i_params)
-                arr = np.stack((mz, i), axis=-1)
-                self._peak_dict[peak_type] = arr
+                self._peak_dict["raw"] = self._decode_peaks()
             if peak_type == "raw":
                 pass
             elif peak_type == "centroided":
@@ -1117,11 +1204,21 @@ class Spectrum(MsData):
             peaks = self._array(self._peak_dict[peak_type])
         else:
             peaks = self._peak_dict[peak_type]
-        if peak_type == "reprofiled":
-            peaks = list(self._peak_dict[peak_type].items())
-            peaks.sort(key=itemgetter(0))
         return peaks
 
+    def _decode_peaks(self):
+        """
+        Combine the m/z and intensity arrays into one array of mz/i pairs.
+
+        Both arrays are decoded at most once. The cached mz and i arrays keep
+        their own memory and data type, so editing the peaks does not change
+        them.
+
+        Returns:
+            peaks (np.ndarray): (n, 2) array of mz/i pairs
+        """
+        return np.column_stack((np.asarray(self.mz), np.asarray(self.i)))
+
     @lru_cache()
     def get_array(self, arr_name):
         array_params = self._get_encoding_parameters(arr_name)
@@ -1158,7 +1255,9 @@ class Spectrum(MsData):
         return array_names
 
     def _deconvolute_peaks(self, *args, **kwargs):
-        if DECON_DEP is True:
+        dependencies = _deconvolution_dependencies()
+        if dependencies is not None:
+            deconvolute_peaks, simple_peak = dependencies
             peaks = self.peaks("centroided")
             # pack peak matrix into expected structure
             peaks = [simple_peak(p[0], p[1], 0.01) for p in peaks]
@@ -1189,6 +1288,7 @@ class Spectrum(MsData):
         # reset after changing peaks
         self._transformed_mass_with_error = None
         self._transformed_mz_with_error = None
+        self._peak_search = None
         if peak_type == "raw":
             # if not isinstance(peaks, np.ndarray):
             #     peaks = np.array(peaks)
@@ -1212,10 +1312,13 @@ class Spectrum(MsData):
                 self._i = np.array([])
 
         elif peak_type == "reprofiled":
-            try:
-                self._peak_dict["reprofiled"] = peaks
-            except TypeError:
+            if peaks is None:
                 self._peak_dict["reprofiled"] = None
+            else:
+                if isinstance(peaks, dict):
+                    peaks = sorted(peaks.items())
+                peaks = np.asarray(peaks, dtype=np.float64).reshape(-1, 2)
+                self._peak_dict["reprofiled"] = peaks[np.argsort(peaks[:, 0])]
         elif peak_type == "deconvoluted":
             self._peak_dict["deconvoluted"] = peaks
             try:
@@ -1235,7 +1338,8 @@ class Spectrum(MsData):
         centroided_peaks.
 
         Returns:
-            centroided_peaks (list): list of centroided m/z, i tuples
+            centroided_peaks (np.ndarray): (n, 2) array of centroided m/z, i
+                pairs
         """
 
         try:
@@ -1243,85 +1347,132 @@ class Spectrum(MsData):
             if profile_ot is None:
                 profile_ot = self.obo_translator.name.get("profile mass spectrum", None)
             acc = profile_ot["id"]
-            is_profile = (
-                True
-                if self.element.find(
-                    ".//*[@accession='{acc}']".format(ns=self.ns, acc=acc)
-                )
-                is not None
-                else None
-            )
+            is_profile = True if acc in self._get_params() else None
 
         except (TypeError, AttributeError) as e:
             # user creadted spectrum objects without xml and calling instance cant determine if they are reprofiled or not
             is_profile = None
 
         if is_profile is not None or self.reprofiled:  # check if spec is a profile spec
-            tmp = []
             if self._peak_dict["reprofiled"] is not None:
-                i_array = [i for mz, i in self.peaks("reprofiled")]
-                mz_array = [mz for mz, i in self.peaks("reprofiled")]
+                reprofiled = np.asarray(self.peaks("reprofiled"), dtype=np.float64)
+                reprofiled = reprofiled.reshape(-1, 2)
+                mz_array = reprofiled[:, 0]
+                i_array = reprofiled[:, 1]
             else:
-                i_array = self.i
-                mz_array = self.mz
-            for pos, i in enumerate(i_array[:-1]):
-                if pos <= 1:
-                    continue
-                if 0 < i_array[pos - 1] < i > i_array[pos + 1] > 0:
-                    x1 = float(mz_array[pos - 1])
-                    y1 = float(i_array[pos - 1])
-                    x2 = float(mz_array[pos])
-                    y2 = float(i_array[pos])
-                    x3 = float(mz_array[pos + 1])
-                    y3 = float(i_array[pos + 1])
-                    if x2 - x1 > (x3 - x2) * 10 or (x2 - x1) * 10 < x3 - x2:
-                        continue
-                    if y3 == y1:
-                        y3 += 0.01 * y1
-
-                    try:
-                        double_log = math.log(y2 / y1) / math.log(y3 / y1)
-                        mue = (double_log * (x1 * x1 - x3 * x3) - x1 * x1 + x2 * x2) / (
-                            2 * (x2 - x1) - 2 * double_log * (x3 - x1)
-                        )
-                        c_squarred = (
-                            x2 * x2 - x1 * x1 - 2 * x2 * mue + 2 * x1 * mue
-                        ) / (2 * math.log(y1 / y2))
-                        A = y1 * math.exp((x1 - mue) * (x1 - mue) / (2 * c_squarred))
-                    except ZeroDivisionError:
-                        continue
-                    tmp.append((mue, A))
-            return tmp
+                i_array = np.asarray(self.i, dtype=np.float64)
+                mz_array = np.asarray(self.mz, dtype=np.float64)
+            return self._fit_gauss_apexes(mz_array, i_array)
         else:
             return self.peaks("raw")
 
+    @staticmethod
+    def _fit_gauss_apexes(mz_array, i_array):
+        """
+        Centroid all local maxima of a profile by a three point Gauss fit.
+
+        Local maxima are detected with array comparisons and the fit is
+        computed for all apexes at once. Apexes with very unevenly spaced
+        neighbours and fits which can not be computed are skipped.
+
+        Arguments:
+            mz_array (np.ndarray): m/z values of the profile
+            i_array (np.ndarray): intensities of the profile
+
+        Returns:
+            centroided_peaks (np.ndarray): (n, 2) array of m/z, i pairs
+        """
+        if len(i_array) < 4:
+            return np.empty((0, 2))
+        # apex candidates at positions 2 .. n - 2
+        y1 = i_array[1:-2]
+        y2 = i_array[2:-1]
+        y3 = i_array[3:]
+        x1 = mz_array[1:-2]
+        x2 = mz_array[2:-1]
+        x3 = mz_array[3:]
+        mask = (0 < y1) & (y1 < y2) & (y2 > y3) & (y3 > 0)
+        mask &= ~((x2 - x1 > (x3 - x2) * 10) | ((x2 - x1) * 10 < x3 - x2))
+        x1, x2, x3 = x1[mask], x2[mask], x3[mask]
+        y1, y2, y3 = y1[mask], y2[mask], y3[mask]
+        y3 = np.where(y3 == y1, y3 + 0.01 * y1, y3)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            double_log = np.log(y2 / y1) / np.log(y3 / y1)
+            mue = (double_log * (x1 * x1 - x3 * x3) - x1 * x1 + x2 * x2) / (
+                2 * (x2 - x1) - 2 * double_log * (x3 - x1)
+            )
+            c_squarred = (x2 * x2 - x1 * x1 - 2 * x2 * mue + 2 * x1 * mue) / (
+                2 * np.log(y1 / y2)
+            )
+            A = y1 * np.exp((x1 - mue) * (x1 - mue) / (2 * c_squarred))
+        centroided_peaks = np.column_stack((mue, A))
+        return centroided_peaks[np.isfinite(centroided_peaks).all(axis=1)]
+
     def _reprofile_Peaks(self):
         """
         Performs reprofiling for property reprofiled_peaks.
 
+        Every centroid is replaced by a Gauss curve (+- 5 sigma) sampled on a
+        fixed m/z grid defined by the internal precision, so reprofiled
+        spectra with the same precision share their grid points. All curves
+        are computed at once and summed per grid point.
+
         Returns:
-            reprofiled_peaks (list): list of reprofiled m/z, i tuples
-        """
-        tmp = ddict(int)
-        for mz, i in self.peaks("centroided"):
-            # Let the measured precision be 2 sigma of the signal width
-            # When using normal distribution
-            # FWHM = 2 sqt(2 * ln(2)) sigma = 2.3548 sigma
-            s = mz * self.measured_precision * 2  # in before 2
-            s2 = s * s
-            floor = mz - 5.0 * s  # Gauss curve +- 3 sigma
-            ceil = mz + 5.0 * s
-            ip = self.internal_precision / 4
-            # more spacing, i.e. less points describing the gauss curve
-            # -> faster adding
-            for _ in range(int(round(floor * ip)), int(round(ceil * ip)) + 1):
-                if _ % int(5) == 0:
-                    a = float(_) / float(ip)
-                    y = i * math.exp(-1 * ((mz - a) * (mz - a)) / (2 * s2))
-                    tmp[a] += y
+            reprofiled_peaks (np.ndarray): (n, 2) array of reprofiled m/z, i
+                pairs sorted by m/z
+        """
+        peaks = np.asarray(self.peaks("centroided"), dtype=np.float64).reshape(-1, 2)
+        mz = peaks[:, 0]
+        i = peaks[:, 1]
+        # Let the measured precision be 2 sigma of the signal width
+        # When using normal distribution
+        # FWHM = 2 sqt(2 * ln(2)) sigma = 2.3548 sigma
+        s = mz * self.measured_precision * 2  # in before 2
+        s2 = s * s
+        ip = self.internal_precision / 4
+        # more spacing, i.e. less points describing the gauss curve
+        # -> faster adding, only every 5th grid point is used
+        floor = np.round((mz - 5.0 * s) * ip).astype(np.int64)
+        ceil = np.round((mz + 5.0 * s) * ip).astype(np.int64)
+        first = floor + (-floor % 5)
+        counts = np.maximum((ceil - first) // 5 + 1, 0)
+
+        owner = np.repeat(np.arange(len(mz)), counts)
+        steps = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        grid = first[owner] + 5 * steps
+        a = grid / ip
+        mu = mz[owner]
+        y = i[owner] * np.exp(-1 * ((mu - a) * (mu - a)) / (2 * s2[owner]))
+
+        grid, inverse = np.unique(grid, return_inverse=True)
+        reprofiled = np.column_stack(
+            (grid / ip, np.bincount(inverse, weights=y, minlength=len(grid)))
+        )
         self.reprofiled = True
         self.set_peaks(None, "centroided")
-        return tmp
+        return reprofiled
+
+    @staticmethod
+    def _merge_reprofiled(peaks, other_peaks, factor=1):
+        """
+        Sum two reprofiled peak arrays per m/z value.
+
+        Arguments:
+            peaks (np.ndarray): (n, 2) array of m/z, i pairs
+            other_peaks (np.ndarray): (m, 2) array of m/z, i pairs
+
+        Keyword Arguments:
+            factor (float): factor applied to the intensities of other_peaks,
+                i.e. -1 to subtract
+
+        Returns:
+            merged_peaks (np.ndarray): (k, 2) array sorted by m/z
+        """
+        mz = np.concatenate((peaks[:, 0], other_peaks[:, 0]))
+        i = np.concatenate((peaks[:, 1], other_peaks[:, 1] * factor))
+        mz, inverse = np.unique(mz, return_inverse=True)
+        return np.column_stack((mz, np.bincount(inverse, weights=i, minlength=len(mz))))
 
     def _mz_2_mass(self, mz, charge):
         """
@@ -1345,6 +1496,7 @@ class Spectrum(MsData):
             for param in ele.iter():
                 self.element.append(ele)
                 acc = param.get("accession")
+            self._params = None
 
     # Public functions
 
@@ -1570,8 +1722,87 @@ class Spectrum(MsData):
         [(1016.5404, 19141.735187697403)]
 
         """
+        peaks, order, lower, upper = self._get_peak_search()
         value = self.transform_mz(mz2find)
-        return self.transformed_mz_with_error[value]
+        start = np.searchsorted(upper, value, side="left")
+        stop = np.searchsorted(lower, value, side="right")
+        return [tuple(peak) for peak in peaks[order[start:stop]]]
+
+    def has_peaks(self, mz_array):
+        """
+        Checks for several m/z values at once if the spectrum has peaks
+        within the measured precision, see :py:meth:`has_peak`.
+
+        The centroided m/z values are sorted once and all queries are
+        answered with a binary search.
+
+        Arguments:
+            mz_array (list or np.ndarray): m/z values which should be found
+
+        Returns:
+            peaks (list): one (n, 2) array of m/z, i pairs per queried m/z
+                value, empty if no peak was found
+
+        Example:
+
+        >>> import pymzml
+        >>> run = pymzml.run.Reader("tests/data/example.mzML")
+        >>> spectrum = run[1]
+        >>> targets = [70.0658, 800.0]
+        >>> for mz, found in zip(targets, spectrum.has_peaks(targets)):
+        ...     print(mz, found)
+
+        """
+        peaks, order, lower, upper = self._get_peak_search()
+        values = np.round(
+            np.asarray(mz_array, dtype=np.float64) * self.internal_precision
+        ).astype(np.int64)
+        starts = np.searchsorted(upper, values, side="left")
+        stops = np.searchsorted(lower, values, side="right")
+        return [
+            peaks[order[start:stop]]
+            for start, stop in zip(starts.tolist(), stops.tolist())
+        ]
+
+    def _get_peak_search(self):
+        """
+        Prepare the centroided peaks for binary searches.
+
+        Every peak covers the transformed m/z values from its lower to its
+        upper bound (m/z -+ measured precision). Both bounds grow with m/z,
+        so the peaks covering a value form a contiguous block of the sorted
+        peaks. The result is cached until the peaks or the measured precision
+        change.
+
+        Returns:
+            peaks (np.ndarray): centroided peaks
+            order (np.ndarray): indices sorting the peaks by m/z
+            lower (np.ndarray): lower transformed m/z bound of sorted peaks
+            upper (np.ndarray): upper transformed m/z bound of sorted peaks
+        """
+        peaks = self.peaks("centroided")
+        if (
+            self._peak_search is None
+            or self._peak_search[0] is not self._peak_dict["centroided"]
+            or self._peak_search[1] != self.measured_precision
+        ):
+            peaks = np.asarray(peaks)
+            if len(peaks) == 0:
+                peaks = peaks.reshape(0, 2)
+            order = np.argsort(peaks[:, 0], kind="stable")
+            mz = peaks[order, 0]
+            precision = self.measured_precision
+            lower = np.round((mz - (mz * precision)) * self.internal_precision)
+            upper = np.round((mz + (mz * precision)) * self.internal_precision)
+            # guard against rounding making the bounds non monotonic
+            lower = np.maximum.accumulate(lower)
+            upper = np.maximum.accumulate(upper)
+            self._peak_search = (
+                self._peak_dict["centroided"],
+                self.measured_precision,
+                (peaks, order, lower, upper),
+            )
+        return self._peak_search[2]
 
     def has_overlapping_peak(self, mz):
         """
@@ -1585,14 +1816,41 @@ class Spectrum(MsData):
             Boolean (bool): Returns ``True`` if a nearby peak is detected,
             otherwise ``False``
         """
-        for minus_or_plus in [-1, 1]:
-            target = self.ppm2abs(mz, self.measured_precision, minus_or_plus, 1)
-            temp = self.has_peak(self.ppm2abs(mz, self.measured_precision))
-            if temp and len(temp) > 1:
-                return True
-        return False
+        peaks, order, lower, upper = self._get_peak_search()
+        value = self.transform_mz(self.ppm2abs(mz, self.measured_precision))
+        start = np.searchsorted(upper, value, side="left")
+        stop = np.searchsorted(lower, value, side="right")
+        return bool(stop - start > 1)
 
-    def similarity_to(self, spec2, round_precision=0):
+    @staticmethod
+    def _bin_peaks(peaks, round_precision=0, bin_width=None):
+        """
+        Sum up the intensities of peaks falling into the same m/z bin.
+
+        Arguments:
+            peaks (np.ndarray): m/z and intensity pairs
+
+        Keyword Arguments:
+            round_precision (int): precision mzs are rounded to, used if no
+                bin_width is given
+            bin_width (float): width of the m/z bins
+
+        Returns:
+            bins (np.ndarray): sorted integer bin ids
+            intensities (np.ndarray): summed intensity per bin
+        """
+        peaks = np.asarray(peaks, dtype=np.float64).reshape(-1, 2)
+        if bin_width is None:
+            keys = np.rint(peaks[:, 0] * 10.0**round_precision)
+        else:
+            keys = np.floor_divide(peaks[:, 0], bin_width)
+        bins, inverse = np.unique(keys.astype(np.int64), return_inverse=True)
+        intensities = np.bincount(
+            inverse.ravel(), weights=peaks[:, 1], minlength=len(bins)
+        )
+        return bins, intensities
+
+    def similarity_to(self, spec2, round_precision=0, bin_width=None):
         """
         Compares two spectra and returns cosine
 
@@ -1603,6 +1861,8 @@ class Spectrum(MsData):
         Keyword Arguments:
             round_precision (int): precision mzs are rounded to, i.e. round( mz,
                 round_precision )
+            bin_width (float): if set, m/z values are binned into bins of this
+                width instead of being rounded
 
         Returns:
             cosine (float): value between 0 and 1, i.e. the cosine between the
@@ -1617,31 +1877,96 @@ class Spectrum(MsData):
         """
         assert isinstance(spec2, Spectrum), "Spectrum 2 is not a pymzML spectrum"
 
-        vector1 = ddict(int)
-        vector2 = ddict(int)
-        mzs = set()
-        for mz, i in self.peaks("raw"):
-            vector1[round(mz, round_precision)] += i
-            mzs.add(round(mz, round_precision))
-        for mz, i in spec2.peaks("raw"):
-            vector2[round(mz, round_precision)] += i
-            mzs.add(round(mz, round_precision))
-
-        z = 0
-        n_v1 = 0
-        n_v2 = 0
-
-        for mz in mzs:
-            int1 = vector1[mz]
-            int2 = vector2[mz]
-            z += int1 * int2
-            n_v1 += int1 * int1
-            n_v2 += int2 * int2
-        try:
-            cosine = z / (math.sqrt(n_v1) * math.sqrt(n_v2))
-        except:
-            cosine = 0.0
-        return cosine
+        bins1, vector1 = self._bin_peaks(
+            self.peaks("raw"), round_precision=round_precision, bin_width=bin_width
+        )
+        bins2, vector2 = self._bin_peaks(
+            spec2.peaks("raw"), round_precision=round_precision, bin_width=bin_width
+        )
+        _, pos1, pos2 = np.intersect1d(
+            bins1, bins2, assume_unique=True, return_indices=True
+        )
+        z = np.dot(vector1[pos1], vector2[pos2])
+        n_v1 = np.dot(vector1, vector1)
+        n_v2 = np.dot(vector2, vector2)
+        if n_v1 == 0 or n_v2 == 0:
+            return 0.0
+        return float(z / (math.sqrt(n_v1) * math.sqrt(n_v2)))
+
+    @staticmethod
+    def similarity_matrix(spectra, round_precision=0, bin_width=None, peak_type="raw"):
+        """
+        Calculate the pairwise cosines of many spectra at once.
+
+        All spectra are binned into one spectra x bins matrix with normalized
+        rows, so that all cosines are given by a single matrix product. The
+        product is sparse if scipy is installed, otherwise it is calculated
+        with numpy on blocks of occupied bins. The m/z values are binned as
+        in :py:meth:`similarity_to`.
+
+        Arguments:
+            spectra (iterable): pymzml spectra to compare
+
+        Keyword Arguments:
+            round_precision (int): precision mzs are rounded to, used if no
+                bin_width is given
+            bin_width (float): if set, m/z values are binned into bins of this
+                width instead of being rounded
+            peak_type (str): peak type of the spectra to use, see
+                :py:meth:`pymzml.spec.Spectrum.peaks`
+
+        Returns:
+            cosines (np.ndarray): n x n matrix holding the cosine between
+                spectrum i and spectrum j, see
+                :py:meth:`pymzml.spec.Spectrum.similarity_to`
+        """
+        binned = [
+            Spectrum._bin_peaks(
+                spectrum.peaks(peak_type),
+                round_precision=round_precision,
+                bin_width=bin_width,
+            )
+            for spectrum in spectra
+        ]
+        n_spectra = len(binned)
+        if n_spectra == 0:
+            return np.zeros((0, 0))
+        rows = np.repeat(
+            np.arange(n_spectra), [len(bins) for bins, intensities in binned]
+        )
+        columns, columns_inverse = np.unique(
+            np.concatenate([bins for bins, intensities in binned]),
+            return_inverse=True,
+        )
+        columns_inverse = columns_inverse.ravel()
+        values = np.concatenate([intensities for bins, intensities in binned])
+        norms = np.sqrt(np.bincount(rows, weights=values**2, minlength=n_spectra))
+        norms[norms == 0] = 1
+        values = values / norms[rows]
+
+        scipy_sparse = _scipy_sparse()
+        if scipy_sparse is not None:
+            matrix = scipy_sparse.csr_matrix(
+                (values, (rows, columns_inverse)), shape=(n_spectra, len(columns))
+            )
+            return (matrix @ matrix.T).toarray()
+
+        order = np.argsort(columns_inverse, kind="stable")
+        rows = rows[order]
+        columns_inverse = columns_inverse[order]
+        values = values[order]
+        block_size = max(1, 2**22 // n_spectra)
+        cosines = np.zeros((n_spectra, n_spectra))
+        for start in range(0, len(columns), block_size):
+            first, last = np.searchsorted(
+                columns_inverse, [start, start + block_size], side="left"
+            )
+            block = np.zeros((n_spectra, min(block_size, len(columns) - start)))
+            block[rows[first:last], columns_inverse[first:last] - start] = values[
+                first:last
+            ]
+            cosines += block @ block.T
+        return cosines
 
     def transform_mz(self, value):
         """
@@ -1775,6 +2100,8 @@ class Chromatogram(MsData):
         self._transformed_mass_with_error = None
         self._precursors = None
         self._ID = None
+        self._params = None
+        self._binary_arrays = None
         self.obo_translator = OboTranslator.from_cache(obo_version)
 
         if self.element:
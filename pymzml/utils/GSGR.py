@@ -26,9 +26,176 @@ Reader class for indexed gzipped files
 #     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #     SOFTWARE.
 
+import bisect
 import struct
+import sys
 import zlib
+from binascii import a2b_base64
 from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+INDEX_MAGIC_BYTES = b"GSGI"
+"""Magic bytes at the start of a binary (version 2) index."""
+
+BLOCK_INDEX_MAGIC_BYTES = b"GSGB"
+"""
+Magic bytes at the start of a binary (version 2) index of a file written
+with blocks, storing block offset, offset in the block and length per entry.
+"""
+
+TRAILER_MAGIC_BYTES = b"FUIX"
+"""Magic bytes closing the comment of the index trailer member."""
+
+EMPTY_DEFLATE_MEMBER = b"\x03\x00" + 8 * b"\x00"
+"""Empty deflate stream, crc32 and isize closing the index trailer member."""
+
+TRAILER_FOOTER_SIZE = 16 + len(TRAILER_MAGIC_BYTES) + 1 + len(EMPTY_DEFLATE_MEMBER)
+"""Bytes from the end of the index length field to the end of the file."""
+
+
+def encode_key(identifier):
+    """
+    Encode an identifier into bytes with the same order for all keys.
+
+    Integers sort before strings, integers are ordered numerically and
+    strings by their utf-8 encoding.
+
+    Arguments:
+        identifier (int or str): identifier of a data block
+
+    Returns:
+        key (bytes): encoded identifier
+    """
+    if isinstance(identifier, int):
+        return b"\x01" + struct.pack(">Q", identifier + 2**63)
+    return b"\x02" + str(identifier).encode("utf-8")
+
+
+def decode_key(key):
+    """
+    Decode a key encoded with :py:func:`encode_key`.
+
+    Arguments:
+        key (bytes): encoded identifier
+
+    Returns:
+        identifier (int or str): identifier of a data block
+    """
+    if key[:1] == b"\x01":
+        return struct.unpack(">Q", key[1:])[0] - 2**63
+    return key[1:].decode("utf-8")
+
+
+def pack_index(index):
+    """
+    Pack an index into the binary (version 2) index format.
+
+    Layout (little endian)::
+
+        magic bytes (4) | number of entries n (uint32) |
+        offsets (n * width * uint64) | key starts ((n + 1) * uint64) | keys
+
+    Entries are sorted by their encoded key, so the index can be searched
+    with bisect directly after reading it. The width is 1 for indices of
+    byte offsets (magic bytes :py:data:`INDEX_MAGIC_BYTES`) and 3 for
+    indices of (block offset, offset in block, length) tuples (magic bytes
+    :py:data:`BLOCK_INDEX_MAGIC_BYTES`).
+
+    Arguments:
+        index (dict): maps identifiers to byte offsets or to tuples of block
+            offset, offset in the block and length
+
+    Returns:
+        packed_index (bytes): binary index
+    """
+    entries = sorted((encode_key(k), v) for k, v in index.items())
+    keys = [key for key, _ in entries]
+    blocked = any(isinstance(v, tuple) for _, v in entries)
+    magic_bytes = BLOCK_INDEX_MAGIC_BYTES if blocked else INDEX_MAGIC_BYTES
+    offsets = np.array([offset for _, offset in entries], dtype="<u8")
+    key_starts = np.zeros(len(keys) + 1, dtype="<u8")
+    np.cumsum([len(key) for key in keys], out=key_starts[1:])
+    return b"".join(
+        [
+            magic_bytes,
+            struct.pack("<I", len(keys)),
+            offsets.tobytes(),
+            key_starts.tobytes(),
+        ]
+        + keys
+    )
+
+
+class BinaryIndex(Mapping):
+    """
+    Read-only mapping of identifiers to byte offsets, or to tuples of block
+    offset, offset in the block and length, on top of a binary (version 2)
+    index, see :py:func:`pack_index`.
+
+    Nothing is unpacked when loading the index, keys are searched with
+    bisect on the sorted key block.
+
+    Arguments:
+        packed_index (bytes): binary index
+    """
+
+    def __init__(self, packed_index):
+        if packed_index[:4] == INDEX_MAGIC_BYTES:
+            self.blocked = False
+            width = 1
+        elif packed_index[:4] == BLOCK_INDEX_MAGIC_BYTES:
+            self.blocked = True
+            width = 3
+        else:
+            raise Exception("not a binary gzip index (wrong magic bytes)")
+        (n,) = struct.unpack("<I", packed_index[4:8])
+        self._offsets = np.frombuffer(
+            packed_index, dtype="<u8", count=n * width, offset=8
+        ).reshape(n, width)
+        key_starts = np.frombuffer(
+            packed_index, dtype="<u8", count=n + 1, offset=8 + 8 * n * width
+        )
+        if sys.byteorder == "little":
+            # memoryviews index faster than numpy arrays
+            self._key_starts = memoryview(key_starts).cast("B").cast("Q")
+        else:
+            self._key_starts = key_starts.tolist()
+        self._key_block = memoryview(packed_index)[8 * n * (width + 1) + 16 :]
+
+    def _key(self, pos):
+        """Return the encoded key at position pos."""
+        return bytes(self._key_block[self._key_starts[pos] : self._key_starts[pos + 1]])
+
+    def __getitem__(self, identifier):
+        key = encode_key(identifier)
+        pos = bisect.bisect_left(_KeySequence(self), key)
+        if pos < len(self) and self._key(pos) == key:
+            if self.blocked:
+                return tuple(self._offsets[pos].tolist())
+            return int(self._offsets[pos, 0])
+        raise KeyError(identifier)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield decode_key(self._key(pos))
+
+
+class _KeySequence(object):
+    """Sequence view on the sorted keys of a :py:class:`BinaryIndex`."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, pos):
+        return self._index._key(pos)
 
 
 class GSGR(object):
@@ -38,14 +205,20 @@ class GSGR(object):
 
     Keyword Arguments:
         file (str): path to file to read
+        block_cache_size (int): number of decompressed blocks kept in memory
+            for files written with blocks, see
+            :py:class:`~pymzml.utils.GSGW.GSGW`
     """
 
-    def __init__(self, file=None):
+    def __init__(self, file=None, block_cache_size=8):
 
         self.file_in = open(file, "rb")
         self.filename = file
         self.magic_bytes = b"\x1f\x8b"
         self.indexed = True
+        self.format_version = 1
+        self.block_cache_size = block_cache_size
+        self._block_cache = OrderedDict()
 
         if not self._check_magic_bytes():
             raise Exception("not a gzip file (wrong magic bytes)")
@@ -98,6 +271,12 @@ class GSGR(object):
             data (str): indexed text block as string
         """
         start = self.index[index]
+        if isinstance(start, tuple):
+            block_offset, intra_offset, length = start
+            block = self._read_cached_member(block_offset)
+            return block[intra_offset : intra_offset + length]
+        if self.format_version > 1:
+            return self._read_member(start)
         try:
             end = self.index[int(index) + 1]
         except:
@@ -108,6 +287,52 @@ class GSGR(object):
         data = zlib.decompress(comp_data, -zlib.MAX_WBITS)
         return data
 
+    def _read_cached_member(self, start):
+        """
+        Return the decompressed block starting at start from the block cache
+        or read it and drop the least recently used block from the cache.
+
+        Arguments:
+            start (int): byte offset of the compressed block
+
+        Returns:
+            data (bytes): decompressed block
+        """
+        try:
+            self._block_cache.move_to_end(start)
+            return self._block_cache[start]
+        except KeyError:
+            pass
+        data = self._read_member(start)
+        if self.block_cache_size > 0:
+            self._block_cache[start] = data
+            while len(self._block_cache) > self.block_cache_size:
+                self._block_cache.popitem(last=False)
+        return data
+
+    def _read_member(self, start, chunk_size=2**16):
+        """
+        Decompress the deflate stream starting at start up to its end.
+
+        Arguments:
+            start (int): byte offset of the compressed data
+
+        Keyword Arguments:
+            chunk_size (int): number of compressed bytes read at once
+
+        Returns:
+            data (bytes): decompressed data
+        """
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        self.file_in.seek(start)
+        data = []
+        while not decompressor.eof:
+            comp_data = self.file_in.read(chunk_size)
+            if not comp_data:
+                break
+            data.append(decompressor.decompress(comp_data))
+        return b"".join(data)
+
     def _check_magic_bytes(self):
         """
         Check if file is a gzip file.
@@ -147,6 +372,10 @@ class GSGR(object):
         self.index = OrderedDict()
         self.file_in.seek(10)  # make sure file pointer is at right position
         mb = self.file_in.read(3)
+        self.format_version = mb[2] if len(mb) == 3 else 0
+        if mb == b"FU\x02":
+            self._read_binary_index()
+            return
         if mb != b"FU\x01":  # All hail MK!
             print("No index in comment field found. No random access possible")
             self.indexed = False
@@ -168,6 +397,27 @@ class GSGR(object):
                 break
         self.file_in.seek(0)
 
+    def _read_binary_index(self):
+        """
+        Read the binary (version 2) index from the trailer member at the end
+        of the file, see :py:meth:`~pymzml.utils.GSGW.GSGW.write_index`.
+        """
+        file_size = self.file_in.seek(0, 2)
+        self.file_in.seek(max(file_size - TRAILER_FOOTER_SIZE, 0))
+        footer = self.file_in.read(TRAILER_FOOTER_SIZE)
+        magic = footer[16 : 16 + len(TRAILER_MAGIC_BYTES)]
+        if magic != TRAILER_MAGIC_BYTES or not footer.endswith(
+            b"\x00" + EMPTY_DEFLATE_MEMBER
+        ):
+            print("No index trailer found. No random access possible")
+            self.indexed = False
+            self.file_in.seek(0)
+            return
+        index_len = int(footer[:16], 16)
+        self.file_in.seek(file_size - TRAILER_FOOTER_SIZE - index_len)
+        self.index = BinaryIndex(a2b_base64(self.file_in.read(index_len)))
+        self.file_in.seek(0)
+
     def read(self, size=-1):
         """
         Read the content of the in File in binary mode
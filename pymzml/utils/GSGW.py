@@ -29,8 +29,38 @@ Writer class for indexed gzipped files
 import struct
 import time
 import zlib
+from binascii import b2a_base64
 from collections import OrderedDict
 
+from pymzml.utils.GSGR import EMPTY_DEFLATE_MEMBER, TRAILER_MAGIC_BYTES, pack_index
+
+
+def compress_member(data, comp_str=-1):
+    """
+    Compress data into the body of a gzip member.
+
+    Arguments:
+        data (bytes): uncompressed data
+
+    Keyword Arguments:
+        comp_str (int): compression strength of zlib compression
+
+    Returns:
+        member (bytes): raw deflate stream followed by crc32 and isize
+    """
+    compressor = zlib.compressobj(
+        comp_str, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, 0
+    )
+    # compress data and flush (includes writing crc32 and isize)
+    return b"".join(
+        [
+            compressor.compress(data),
+            compressor.flush(),
+            struct.pack("<L", zlib.crc32(data)),
+            struct.pack("<L", len(data) % 2**32),
+        ]
+    )
+
 
 class GSGW(object):
     """
@@ -45,6 +75,16 @@ class GSGW(object):
                                 be between 1 and 255
         max_offset_len (int) : maximal length of the offset in bytes
         output_path (str)    : path to the output file
+        format_version (int) : 1 writes the index as fixed width strings
+                                into the comment of the first member, 2
+                                writes a binary index into a trailer member
+                                at the end of the file, so max_idx,
+                                max_idx_len and max_offset_len are ignored
+        block_size (int)     : if set, consecutive data is collected into
+                                blocks of at least block_size bytes, which
+                                are compressed into one member each and
+                                indexed with block offset, offset in the
+                                block and length. Requires format version 2
 
     """
 
@@ -56,9 +96,13 @@ class GSGW(object):
         max_offset_len=8,
         output_path="./test.dat.igzip",
         comp_str=-1,
+        format_version=1,
+        block_size=None,
     ):
+        if block_size is not None and format_version < 2:
+            raise Exception("Writing blocks requires format version 2")
         self.Lock = False
-        self._format_version = 1  # max 255!!!
+        self._format_version = format_version  # max 255!!!
         self.file_name = output_path
         self.max_idx_num = max_idx
         self.max_idx_len = max_idx_len
@@ -83,6 +127,10 @@ class GSGW(object):
         self.crc32 = 0
         self.isize = 0
         self.comp_str = comp_str
+        self.block_size = block_size
+        self._block = []
+        self._block_entries = []
+        self._block_len = 0
 
     def __del__(self):
         """
@@ -171,6 +219,10 @@ class GSGW(object):
         if Index:
             self.generic_header["FLAGS"] = b"\x00"
             self.file_out.write(self.index_magic_bytes)
+            if self._format_version > 1:
+                # the index itself follows in the trailer member
+                self.file_out.write(b"\x00")
+                return self.file_out.tell()
             self.file_out.write(struct.pack("<B", self.max_idx_len))
             self.file_out.write(struct.pack("<B", self.max_offset_len))
             self.index_offset = self.file_out.tell()
@@ -202,49 +254,109 @@ class GSGW(object):
         Arguments:
             data (str): uncompressed data
         """
-        Compressor = zlib.compressobj(
-            self.comp_str, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, 0
-        )
-        # compress data and flush (includes writing crc32 and isize)
         if isinstance(data, bytes) is False:
             data = bytes(data, "latin-1")
         self.crc32 = zlib.crc32(data)
         self.isize = len(data) % 2**32
-        comp_data = Compressor.compress(data) + Compressor.flush()
-        self.file_out.write(comp_data)
-        self.file_out.write(struct.pack("<L", self.crc32))
-        self.file_out.write(struct.pack("<L", self.isize))
+        self.file_out.write(compress_member(data, self.comp_str))
         return
 
-    def add_data(self, data, identifier):
+    def add_data(self, data, identifier, compressed=False):
         """
         Create a new gzip member with compressed 'data' indexed with 'index'.
 
         Arguments:
             data (str)         : uncompressed data to write to file
             index (str or int) : unique index for the data
+
+        Keyword Arguments:
+            compressed (bool)  : data has already been compressed with
+                                    :py:func:`compress_member`, e.g. in
+                                    another process, and is written as is
         """
         if self.Lock is False:
-            if len(self.index) + 1 > self.max_idx_num:
+            if self._format_version == 1 and len(self.index) + 1 > self.max_idx_num:
                 print("""
     WARNING: Reached maximum number of indexed data blocks
     '({0}), cannot add any more data!
                     """.format(self.max_idx_num))
                 return False
 
-            if not self.first_header_set:
-                self._write_gen_header(Index=True)
-                self.first_header_set = True
+            if self.block_size is not None and compressed is False:
+                self._add_to_block(data, identifier)
+                return
+            self.index[identifier] = self._start_member()
+            if compressed is True:
+                self.file_out.write(data)
             else:
-                # do we need this?
-                self._write_gen_header(Index=False)
-
-            self.index[identifier] = self.file_out.tell()
-            self._write_data(data)
+                self._write_data(data)
             return
         else:
             raise Exception("Cant add any more data if index is already written")
 
+    def add_compressed_block(self, member, entries):
+        """
+        Create a new gzip member from a block compressed with
+        :py:func:`compress_member` holding the data of several identifiers.
+
+        Arguments:
+            member (bytes)  : compressed block
+            entries (list)  : identifier, offset in the uncompressed block
+                                and length of every data in the block
+        """
+        if self.Lock is True:
+            raise Exception("Cant add any more data if index is already written")
+        block_offset = self._start_member()
+        self.file_out.write(member)
+        for identifier, intra_offset, length in entries:
+            self.index[identifier] = (block_offset, intra_offset, length)
+
+    def _add_to_block(self, data, identifier):
+        """
+        Append data to the current block and write the block if it reached
+        the block size.
+
+        Arguments:
+            data (str)         : uncompressed data
+            identifier (str or int) : unique index for the data
+        """
+        if isinstance(data, bytes) is False:
+            data = bytes(data, "latin-1")
+        self._block.append(data)
+        self._block_entries.append((identifier, self._block_len, len(data)))
+        self._block_len += len(data)
+        if self._block_len >= self.block_size:
+            self._flush_block()
+
+    def _flush_block(self):
+        """
+        Compress and write the current block.
+        """
+        if len(self._block_entries) == 0:
+            return
+        self.add_compressed_block(
+            compress_member(b"".join(self._block), self.comp_str),
+            self._block_entries,
+        )
+        self._block = []
+        self._block_entries = []
+        self._block_len = 0
+
+    def _start_member(self):
+        """
+        Write the header of a new gzip member.
+
+        Returns:
+            offset (int): byte offset of the compressed data of the member
+        """
+        if not self.first_header_set:
+            self._write_gen_header(Index=True)
+            self.first_header_set = True
+        else:
+            # do we need this?
+            self._write_gen_header(Index=False)
+        return self.file_out.tell()
+
     def _write_identifier(self, identifier):
         """
         Convert and write the identifier into output file.
@@ -279,13 +391,39 @@ class GSGW(object):
 
         Seek back to the beginning of the file and write the index into the
         allocated comment bytes (see _write_gen_header(Index=True)).
+
+        For format version 2, the index is packed (see
+        :py:func:`~pymzml.utils.GSGR.pack_index`) and written base64 encoded
+        into the comment of an empty gzip member appended to the file,
+        followed by its length, so readers can locate it from the end of the
+        file and the decompressed content of the file stays unchanged.
         """
+        self._flush_block()
         self.Lock = True
+        if self._format_version > 1:
+            self._write_index_trailer()
+            return
         self.file_out.seek(self.index_offset)
         for identifier, offset in self.index.items():
             self._write_identifier(identifier)
             self._write_offset(offset)
 
+    def _write_index_trailer(self):
+        """
+        Append the gzip member holding the binary index to the output file.
+        """
+        packed_index = b2a_base64(pack_index(self.index), newline=False)
+        self.file_out.seek(0, 2)
+        self.generic_header["FLAGS"] = b"\x10"
+        for value in self.generic_header.values():
+            self.file_out.write(value)
+        self.generic_header["FLAGS"] = b"\x00"
+        self.file_out.write(packed_index)
+        self.file_out.write("{0:016x}".format(len(packed_index)).encode("latin-1"))
+        self.file_out.write(TRAILER_MAGIC_BYTES)
+        self.file_out.write(b"\x00")
+        self.file_out.write(EMPTY_DEFLATE_MEMBER)
+
     def __enter__(self):
         """
         Enable the with syntax for this class (entry point).
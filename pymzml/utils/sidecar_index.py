@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk offset index for mzML files.
+
+The sidecar file (e.g. ``file.mzML.pymzml-idx``) is written next to the mzML
+file the first time it is opened with ``persistent_index=True`` and
+memory-mapped on every later open, so re-opening a large file does not
+require scanning it again.
+
+Layout of the sidecar file::
+
+    magic bytes (8) | header length (uint32) | json header | padding |
+    int keys | int offsets | str keys | padding | str offsets
+
+The json header stores a fingerprint of the mzML file (size, mtime and a
+hash of the last bytes), the seek list and the number of keys. The keys of
+the offset dict are stored sorted in binary blocks, integer ids as int64
+and string ids as fixed width utf-8 bytes, each followed by a block with
+their offsets. Offsets are looked up lazily by a binary search on the
+memory-mapped blocks, see :py:class:`SidecarOffsetDict`, so loading the
+index does not depend on the number of spectra. The sidecar is ignored and
+rebuilt if the fingerprint does not match the file anymore.
+"""
+
+# Python mzML module - pymzml
+# Copyright (C) 2010-2019 M. Kösters, C. Fufezan
+#     The MIT License (MIT)
+
+#     Permission is hereby granted, free of charge, to any person obtaining a copy
+#     of this software and associated documentation files (the "Software"), to deal
+#     in the Software without restriction, including without limitation the rights
+#     to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#     copies of the Software, and to permit persons to whom the Software is
+#     furnished to do so, subject to the following conditions:
+
+#     The above copyright notice and this permission notice shall be included in all
+#     copies or substantial portions of the Software.
+
+#     THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#     IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#     FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#     AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#     LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#     SOFTWARE.
+
+import hashlib
+import json
+import os
+import struct
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+SIDECAR_SUFFIX = ".pymzml-idx"
+MAGIC_BYTES = b"PYMZIDX\x02"
+TAIL_HASH_SIZE = 65536
+
+OFFSET_DTYPE = np.dtype("<i8")
+"""
+Dtype of the integer keys and of the offsets. Offsets of -1 encode offset
+dict entries with value None.
+"""
+
+_DELETED = object()
+
+
+class SidecarOffsetDict(MutableMapping):
+    """
+    Offset dict backed by the memory-mapped key and offset blocks of a
+    sidecar index.
+
+    Lookups do a binary search on the sorted keys, so only the few pages of
+    the sidecar touched by the search are read. Entries added or removed
+    later, e.g. by the searches of
+    :py:class:`~pymzml.file_classes.standardMzml.StandardMzml`, are kept in
+    memory.
+
+    Arguments:
+        int_keys (np.ndarray): sorted integer keys
+        int_offsets (np.ndarray): offsets of int_keys
+        str_keys (np.ndarray): sorted utf-8 encoded string keys
+        str_offsets (np.ndarray): offsets of str_keys
+    """
+
+    def __init__(self, int_keys, int_offsets, str_keys, str_offsets):
+        self._int_keys = int_keys
+        self._int_offsets = int_offsets
+        self._str_keys = str_keys
+        self._str_offsets = str_offsets
+        self._changed = {}
+
+    def _stored(self, key):
+        """
+        Look key up in the memory-mapped blocks.
+
+        Arguments:
+            key (int or str): key of the offset dict
+
+        Returns:
+            offset (tuple or None): (offset,) or None for entries without
+                offset
+
+        Raises:
+            KeyError: if key is not stored in the sidecar
+        """
+        if isinstance(key, (int, np.integer)):
+            keys, offsets, needle = self._int_keys, self._int_offsets, key
+        elif isinstance(key, str):
+            keys, offsets = self._str_keys, self._str_offsets
+            needle = key.encode("utf-8")
+        else:
+            raise KeyError(key)
+        pos = int(np.searchsorted(keys, needle))
+        if pos == len(keys) or keys[pos] != needle:
+            raise KeyError(key)
+        offset = int(offsets[pos])
+        return None if offset == -1 else (offset,)
+
+    def _is_stored(self, key):
+        try:
+            self._stored(key)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key):
+        if key in self._changed:
+            value = self._changed[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        return self._stored(key)
+
+    def __setitem__(self, key, value):
+        self._changed[key] = value
+
+    def __delitem__(self, key):
+        self[key]
+        self._changed[key] = _DELETED
+
+    def __iter__(self):
+        changed = self._changed
+        for key in self._int_keys.tolist():
+            if key not in changed:
+                yield key
+        for key in self._str_keys.tolist():
+            key = key.decode("utf-8")
+            if key not in changed:
+                yield key
+        for key, value in changed.items():
+            if value is not _DELETED:
+                yield key
+
+    def __len__(self):
+        length = len(self._int_keys) + len(self._str_keys)
+        for key, value in self._changed.items():
+            length += (not self._is_stored(key)) - (value is _DELETED)
+        return length
+
+
+def sidecar_path(path):
+    """
+    Return the path of the sidecar index belonging to an mzML file.
+
+    Arguments:
+        path (str): path to the mzML file
+
+    Returns:
+        sidecar (str): path to the sidecar index file
+    """
+    return path + SIDECAR_SUFFIX
+
+
+def fingerprint(path):
+    """
+    Compute a cheap fingerprint of a file to detect changes.
+
+    Arguments:
+        path (str): path to the mzML file
+
+    Returns:
+        fingerprint (dict): file size, mtime in ns and sha1 of the last
+            :py:data:`TAIL_HASH_SIZE` bytes of the file
+    """
+    stat = os.stat(path)
+    with open(path, "rb") as fin:
+        fin.seek(max(stat.st_size - TAIL_HASH_SIZE, 0))
+        tail = fin.read()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "tail_sha1": hashlib.sha1(tail).hexdigest(),
+    }
+
+
+def write_sidecar_index(path, offset_dict, seek_list, index_regex=None):
+    """
+    Write the offset index of an mzML file into its sidecar file.
+
+    The file is written to a temporary file first and moved into place, so
+    concurrent readers never see a partially written index. The temporary
+    file is removed if writing fails.
+
+    Arguments:
+        path (str): path to the mzML file
+        offset_dict (dict): offset dict of the file class
+        seek_list (list): seek list of the file class
+
+    Keyword Arguments:
+        index_regex (re.Pattern): custom index regex used to build the index
+
+    Returns:
+        sidecar (str): path of the written sidecar file
+    """
+    int_entries = []
+    str_entries = []
+    for key, offset in offset_dict.items():
+        if isinstance(offset, tuple):
+            offset = offset[0]
+        if offset is None:
+            offset = -1
+        if isinstance(key, int):
+            int_entries.append((key, offset))
+        else:
+            str_entries.append((key.encode("utf-8"), offset))
+    int_entries.sort()
+    str_entries.sort()
+    str_key_width = max((len(key) for key, _ in str_entries), default=1)
+    blocks = [
+        np.array([key for key, _ in int_entries], dtype=OFFSET_DTYPE),
+        np.array([offset for _, offset in int_entries], dtype=OFFSET_DTYPE),
+        np.array([key for key, _ in str_entries], dtype="S{0}".format(str_key_width)),
+        np.array([offset for _, offset in str_entries], dtype=OFFSET_DTYPE),
+    ]
+    header = {
+        "fingerprint": fingerprint(path),
+        "index_regex": _regex_pattern(index_regex),
+        "seek_list": seek_list,
+        "int_key_count": len(int_entries),
+        "str_key_count": len(str_entries),
+        "str_key_width": str_key_width,
+    }
+    header = json.dumps(header).encode("utf-8")
+
+    sidecar = sidecar_path(path)
+    tmp_file = "{0}.{1}.tmp".format(sidecar, os.getpid())
+    try:
+        with open(tmp_file, "wb") as fout:
+            fout.write(MAGIC_BYTES)
+            fout.write(struct.pack("<I", len(header)))
+            fout.write(header)
+            for block in blocks:
+                fout.write(b"\x00" * _aligned(fout.tell()))
+                fout.write(block.tobytes())
+        os.replace(tmp_file, sidecar)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return sidecar
+
+
+def read_sidecar_index(path, index_regex=None):
+    """
+    Load the sidecar index of an mzML file if it is still valid.
+
+    Only the header is read, the offsets are memory-mapped.
+
+    Arguments:
+        path (str): path to the mzML file
+
+    Keyword Arguments:
+        index_regex (re.Pattern): custom index regex, must match the one the
+            sidecar was built with
+
+    Returns:
+        index (dict or None): dict with offset_dict
+            (:py:class:`SidecarOffsetDict`) and seek_list or None if no valid
+            sidecar exists
+    """
+    sidecar = sidecar_path(path)
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        with open(sidecar, "rb") as fin:
+            if fin.read(len(MAGIC_BYTES)) != MAGIC_BYTES:
+                logger.warning("Ignoring sidecar index with unknown format")
+                return None
+            (header_len,) = struct.unpack("<I", fin.read(4))
+            header = json.loads(fin.read(header_len).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        logger.warning("Ignoring unreadable sidecar index {0}".format(sidecar))
+        return None
+
+    if header["fingerprint"] != fingerprint(path):
+        return None
+    if header["index_regex"] != _regex_pattern(index_regex):
+        return None
+
+    str_key_dtype = np.dtype("S{0}".format(header["str_key_width"]))
+    position = len(MAGIC_BYTES) + 4 + header_len
+    blocks = []
+    for dtype, count in (
+        (OFFSET_DTYPE, header["int_key_count"]),
+        (OFFSET_DTYPE, header["int_key_count"]),
+        (str_key_dtype, header["str_key_count"]),
+        (OFFSET_DTYPE, header["str_key_count"]),
+    ):
+        position += _aligned(position)
+        blocks.append(_map_block(sidecar, dtype, position, count))
+        position += dtype.itemsize * count
+    return {
+        "offset_dict": SidecarOffsetDict(*blocks),
+        "seek_list": [tuple(entry) for entry in header["seek_list"]],
+    }
+
+
+def _aligned(position):
+    """Return the number of padding bytes up to the next 8 byte boundary."""
+    return -position % 8
+
+
+def _map_block(sidecar, dtype, offset, count):
+    """Memory-map a block of the sidecar file, mmap can not map 0 bytes."""
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(sidecar, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def _regex_pattern(index_regex):
+    """Return a json serializable representation of a custom index regex."""
+    if index_regex is None:
+        return None
+    pattern = index_regex.pattern
+    if isinstance(pattern, bytes):
+        pattern = pattern.decode("latin-1")
+    return pattern
+
+
+if __name__ == "__main__":
+    print(__doc__)
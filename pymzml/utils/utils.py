@@ -27,16 +27,36 @@ Additional functions for converting file etc.
 #     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #     SOFTWARE.
 
-from pymzml.utils.GSGW import GSGW
+from pymzml.utils.GSGW import GSGW, compress_member
+from pymzml.file_classes.standardMzml import _scan_data_indices_range
 import pymzml.regex_patterns as regex_patterns
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
 import re
 import gzip
 
 
-def index_gzip(pathIn, pathOut, max_idx=10000, idx_len=8, verbose=False, comp_str=-1):
+def index_gzip(
+    pathIn,
+    pathOut,
+    max_idx=10000,
+    idx_len=8,
+    verbose=False,
+    comp_str=-1,
+    format_version=2,
+    workers=1,
+    block_size=None,
+):
     """
     Convert an mzml file (can be gzipped) into an indexed, gzipped mzML file.
 
+    Uncompressed input files are memory-mapped and cut into the byte ranges
+    of their spectra and chromatograms, which are compressed into gzip
+    members by a pool of worker processes and written in file order.
+    Gzipped input files are read line by line.
+
     Arguments:
         pathIn (str): path to an mzML input File.
         pathOut (str): path were the index gzip will be created.
@@ -47,19 +67,32 @@ def index_gzip(pathIn, pathOut, max_idx=10000, idx_len=8, verbose=False, comp_st
         verbose (boolean): print progress while parsing input.
         comp_str(int): compression strength of zlib compression,
             needs to  be 1 <= x <= 9
+        format_version (int): index format of the output file, version 2
+            stores a binary index at the end of the file and ignores max_idx
+            and idx_len, see :py:class:`~pymzml.utils.GSGW.GSGW`
+        workers (int): number of processes compressing uncompressed input
+            files
+        block_size (int): if set, consecutive spectra are compressed together
+            into blocks of at least block_size bytes, which gives better
+            compression ratios for small spectra, see
+            :py:class:`~pymzml.utils.GSGW.GSGW`
     """
-    if pathIn.endswith("gz"):
-        fileOpen = gzip.open
-    elif pathIn.lower().endswith("mzml"):
-        fileOpen = open
     with GSGW(
         output_path=pathOut,
         max_idx=max_idx,
         max_idx_len=idx_len,
         max_offset_len=idx_len,
         comp_str=comp_str,
+        format_version=format_version,
+        block_size=block_size,
     ) as Writer:
-        with fileOpen(pathIn, "rt") as Reader:
+        if not pathIn.endswith("gz"):
+            _add_mzml_members(
+                pathIn, Writer, comp_str=comp_str, workers=workers, verbose=verbose
+            )
+            Writer.write_index()
+            return
+        with gzip.open(pathIn, "rt") as Reader:
             data = ""
             for line in Reader:
                 if line.strip().startswith("</spectrum>"):
@@ -113,7 +146,213 @@ def index_gzip(pathIn, pathOut, max_idx=10000, idx_len=8, verbose=False, comp_st
     return
 
 
-def index(pathIn, pathOut, max_idx=10000, idx_len=8, verbose=False, comp_str=-1):
+def _add_mzml_members(pathIn, Writer, comp_str=-1, workers=1, verbose=False):
+    """
+    Compress the spectra and chromatograms of an uncompressed mzML file into
+    gzip members and add them to a writer in file order.
+
+    Arguments:
+        pathIn (str): path to an uncompressed mzML file
+        Writer (GSGW): writer of the indexed gzip file
+
+    Keyword Arguments:
+        comp_str (int): compression strength of zlib compression
+        workers (int): number of processes used to find and compress the
+            members
+        verbose (boolean): print progress
+    """
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        members = _mzml_member_ranges(pathIn, executor, workers)
+        if Writer.block_size is None:
+            units = [[member] for member in members]
+        else:
+            units = _batch_member_ranges(members, Writer.block_size)
+        batches = _batch_member_ranges(units)
+        pending = deque()
+        for batch in batches:
+            if executor is None:
+                compressed = _compress_member_ranges(pathIn, batch, comp_str)
+                pending.append((batch, compressed))
+            else:
+                future = executor.submit(
+                    _compress_member_ranges, pathIn, batch, comp_str
+                )
+                pending.append((batch, future))
+            # keep a bounded number of batches in flight to limit memory usage
+            while len(pending) > 2 * workers or (executor is None and pending):
+                _add_compressed_batch(Writer, *pending.popleft(), verbose=verbose)
+        while pending:
+            _add_compressed_batch(Writer, *pending.popleft(), verbose=verbose)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _add_compressed_batch(Writer, batch, compressed, verbose=False):
+    """
+    Add the compressed members or blocks of a batch to the writer.
+
+    Arguments:
+        Writer (GSGW): writer of the indexed gzip file
+        batch (list): lists of the members compressed together
+        compressed (list or Future): compressed data of the batch
+    """
+    if not isinstance(compressed, list):
+        compressed = compressed.result()
+    for unit, member in zip(batch, compressed):
+        if Writer.block_size is None:
+            Writer.add_data(member, unit[0][0], compressed=True)
+        else:
+            block_start = unit[0][1]
+            Writer.add_compressed_block(
+                member,
+                [(i, start - block_start, end - start) for i, start, end in unit],
+            )
+        if verbose:
+            print("NativeID : {0}".format(unit[-1][0]), end="\r")
+
+
+def _mzml_member_ranges(pathIn, executor=None, workers=1, min_range_size=2**20):
+    """
+    Cut an uncompressed mzML file into the byte ranges of its gzip members.
+
+    Every spectrum and chromatogram becomes one member, together with the
+    whitespace in front of it. The remaining bytes become the members
+    'Head' (up to the first spectrum), 'junk' (between the spectrum and
+    chromatogram lists) and 'tail' (after the last element), as for gzipped
+    input files.
+
+    Arguments:
+        pathIn (str): path to an uncompressed mzML file
+
+    Keyword Arguments:
+        executor (ProcessPoolExecutor): pool used to find the offsets of
+            the spectra and chromatograms
+        workers (int): number of processes of the pool
+        min_range_size (int): minimal number of bytes scanned by one process
+
+    Returns:
+        members (list): identifier, start and end of every member
+    """
+    file_size = os.path.getsize(pathIn)
+    range_size = max(-(-file_size // (workers * 4)), min_range_size)
+    starts = list(range(0, file_size, range_size))
+    ends = starts[1:] + [file_size]
+    if executor is None:
+        results = map(_scan_data_indices_range, [pathIn] * len(starts), starts, ends)
+    else:
+        results = executor.map(
+            _scan_data_indices_range, [pathIn] * len(starts), starts, ends
+        )
+
+    elements = []
+    for chrom_positions, spec_positions, _, _ in results:
+        for native_id, offset in spec_positions.items():
+            match = regex_patterns.SPECTRUM_ID_PATTERN.search(native_id)
+            if match is not None and match.group(1) != "":
+                native_id = int(match.group(1))
+            elements.append((offset, native_id, b"</spectrum>"))
+        for native_id, offset in chrom_positions.items():
+            elements.append((offset, native_id, b"</chromatogram>"))
+    elements.sort(key=lambda element: element[0])
+
+    members = []
+    previous_end = 0
+    with open(pathIn, "rb") as fin:
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset, identifier, close_tag in elements:
+                if offset < previous_end:
+                    continue
+                end = data.find(close_tag, offset)
+                end = file_size if end == -1 else end + len(close_tag)
+                start = previous_end
+                if data[previous_end:offset].strip():
+                    junk_id = "Head" if len(members) == 0 else "junk"
+                    members.append((junk_id, previous_end, offset))
+                    start = offset
+                members.append((identifier, start, end))
+                previous_end = end
+    if previous_end < file_size:
+        members.append(("tail", previous_end, file_size))
+    return members
+
+
+def _batch_member_ranges(members, batch_size=2**24):
+    """
+    Group consecutive members into batches of about batch_size bytes.
+
+    Arguments:
+        members (list): identifier, start and end of every member, or lists
+            of those
+
+    Keyword Arguments:
+        batch_size (int): minimal number of uncompressed bytes per batch
+
+    Returns:
+        batches (list): lists of members
+    """
+    batches = []
+    batch = []
+    for member in members:
+        batch.append(member)
+        if _range_end(member) - _range_start(batch[0]) >= batch_size:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _range_start(member):
+    """Return the first byte of a member or of a list of members."""
+    if isinstance(member, list):
+        return member[0][1]
+    return member[1]
+
+
+def _range_end(member):
+    """Return the first byte after a member or after a list of members."""
+    if isinstance(member, list):
+        return member[-1][2]
+    return member[2]
+
+
+def _compress_member_ranges(pathIn, batch, comp_str=-1):
+    """
+    Compress the byte ranges of a batch of members of an mzML file.
+
+    Arguments:
+        pathIn (str): path to an uncompressed mzML file
+        batch (list): lists of consecutive members, each list is compressed
+            into one gzip member
+
+    Keyword Arguments:
+        comp_str (int): compression strength of zlib compression
+
+    Returns:
+        compressed (list): compressed gzip member bodies
+    """
+    with open(pathIn, "rb") as fin:
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return [
+                compress_member(data[_range_start(unit) : _range_end(unit)], comp_str)
+                for unit in batch
+            ]
+
+
+def index(
+    pathIn,
+    pathOut,
+    max_idx=10000,
+    idx_len=8,
+    verbose=False,
+    comp_str=-1,
+    format_version=2,
+    block_size=None,
+):
     """
     Convert an mzml file (can be gzipped) into an indexed, gzipped mzML file.
 
@@ -127,6 +366,11 @@ def index(pathIn, pathOut, max_idx=10000, idx_len=8, verbose=False, comp_str=-1)
         verbose (boolean): print progress while parsing input.
         comp_str(int): compression strength of zlib compression,
             needs to  be 1 <= x <= 9
+        format_version (int): index format of the output file, version 2
+            stores a binary index at the end of the file and ignores max_idx
+            and idx_len, see :py:class:`~pymzml.utils.GSGW.GSGW`
+        block_size (int): if set, consecutive spectra are compressed together
+            into blocks of at least block_size bytes
     """
     import gzip
 
@@ -135,6 +379,8 @@ def index(pathIn, pathOut, max_idx=10000, idx_len=8, verbose=False, comp_str=-1)
         max_idx_len=idx_len,
         max_offset_len=idx_len,
         comp_str=comp_str,
+        format_version=format_version,
+        block_size=block_size,
     ) as Writer:
         with gzip.open(pathIn, "rt") as Reader:
             data = ""
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extraction of many ion chromatograms (XIC/EIC) in a single pass over a run.
+
+All targets are matched against every spectrum at once using binary searches
+on the sorted m/z values of the spectrum, so the run is iterated only once,
+independent of the number of targets.
+
+Example:
+
+>>> import pymzml
+>>> run = pymzml.run.Reader("tests/data/example.mzML")
+>>> extractor = pymzml.xic.XICExtractor(
+...     [70.06575775, 136.06178], precision=5e-6, rt_start=0, rt_end=10
+... )
+>>> for chromatogram in extractor.extract(run):
+...     print(chromatogram.ID, chromatogram.time, chromatogram.i)
+"""
+
+# Python mzML module - pymzml
+# Copyright (C) 2010-2019 M. Kösters, C. Fufezan
+#     The MIT License (MIT)
+
+#     Permission is hereby granted, free of charge, to any person obtaining a copy
+#     of this software and associated documentation files (the "Software"), to deal
+#     in the Software without restriction, including without limitation the rights
+#     to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#     copies of the Software, and to permit persons to whom the Software is
+#     furnished to do so, subject to the following conditions:
+
+#     The above copyright notice and this permission notice shall be included in all
+#     copies or substantial portions of the Software.
+
+#     THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#     IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#     FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#     AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#     LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#     SOFTWARE.
+
+import numpy as np
+
+from .chromatogram import Chromatogram
+
+
+class XICExtractor(object):
+    """
+    Collect the ion chromatograms of many targets from the spectra of a run.
+
+    Every target is defined by its m/z value, a relative precision and an
+    optional retention time window. For each spectrum of the requested ms
+    level within the retention time window of a target, the intensities of
+    all peaks within m/z +- m/z * precision are summed up. Spectra without a
+    matching peak contribute an intensity of 0.
+
+    Arguments:
+        mz (list or np.ndarray): m/z values of the targets
+
+    Keyword Arguments:
+        precision (float or list): relative precision of the targets, i.e.
+            5e-6 equals to 5 ppm
+        rt_start (float or list): start of the retention time window in
+            minutes, None for no limit
+        rt_end (float or list): end of the retention time window in minutes,
+            None for no limit
+        ids (list): ids of the resulting chromatograms, defaults to the
+            position of the target
+        ms_level (int): ms level of the spectra to use
+        peak_type (str): peak type of the spectra to use, see
+            :py:meth:`pymzml.spec.Spectrum.peaks`
+    """
+
+    def __init__(
+        self,
+        mz,
+        precision=5e-6,
+        rt_start=None,
+        rt_end=None,
+        ids=None,
+        ms_level=1,
+        peak_type="centroided",
+    ):
+        self.mz = np.atleast_1d(np.asarray(mz, dtype=np.float64))
+        n_targets = len(self.mz)
+        precision = np.broadcast_to(
+            np.asarray(precision, dtype=np.float64), (n_targets,)
+        )
+        self.lower = self.mz - self.mz * precision
+        self.upper = self.mz + self.mz * precision
+        self.rt_start = self._broadcast_rt(rt_start, -np.inf, n_targets)
+        self.rt_end = self._broadcast_rt(rt_end, np.inf, n_targets)
+        if ids is None:
+            ids = list(range(n_targets))
+        if len(ids) != n_targets:
+            raise ValueError("Number of ids does not match the number of targets")
+        self.ids = list(ids)
+        self.ms_level = ms_level
+        self.peak_type = peak_type
+        self._times = []
+        self._targets = []
+        self._intensities = []
+
+    @staticmethod
+    def _broadcast_rt(value, default, n_targets):
+        """
+        Convert a retention time limit into an array with one entry per
+        target, replacing None by default.
+        """
+        if value is None:
+            return np.full(n_targets, default)
+        values = np.broadcast_to(np.asarray(value, dtype=object), (n_targets,))
+        return np.array([default if v is None else v for v in values], dtype=np.float64)
+
+    def add_spectrum(self, spectrum):
+        """
+        Match all targets against a single spectrum.
+
+        Spectra of other ms levels are ignored.
+
+        Arguments:
+            spectrum (Spectrum): spectrum to add
+        """
+        if spectrum.ms_level != self.ms_level:
+            return
+        scan_time = spectrum.scan_time_in_minutes()
+        active = np.flatnonzero(
+            (self.rt_start <= scan_time) & (scan_time <= self.rt_end)
+        )
+        if len(active) == 0:
+            return
+        peaks = np.asarray(spectrum.peaks(self.peak_type), dtype=np.float64)
+        peaks = peaks.reshape(-1, 2)
+        order = np.argsort(peaks[:, 0], kind="stable")
+        mz = peaks[order, 0]
+        cumulative_i = np.concatenate(([0.0], np.cumsum(peaks[order, 1])))
+        starts = np.searchsorted(mz, self.lower[active], side="left")
+        stops = np.searchsorted(mz, self.upper[active], side="right")
+        self._times.append(np.full(len(active), scan_time))
+        self._targets.append(active)
+        self._intensities.append(cumulative_i[stops] - cumulative_i[starts])
+
+    def extract(self, run):
+        """
+        Iterate over a run and return the chromatograms of all targets.
+
+        Arguments:
+            run (Reader or iterable): spectra to use
+
+        Returns:
+            chromatograms (list): one chromatogram per target
+        """
+        for spectrum in run:
+            if getattr(spectrum, "ms_level", None) == self.ms_level:
+                self.add_spectrum(spectrum)
+        return self.chromatograms()
+
+    def chromatograms(self):
+        """
+        Build the chromatograms of all spectra added so far.
+
+        Returns:
+            chromatograms (list): one
+                :py:class:`~pymzml.chromatogram.Chromatogram` per target, in
+                the order of the targets, holding time (in minutes) and
+                intensity arrays
+        """
+        if len(self._targets) > 0:
+            times = np.concatenate(self._times)
+            targets = np.concatenate(self._targets)
+            intensities = np.concatenate(self._intensities)
+        else:
+            times = np.empty(0)
+            targets = np.empty(0, dtype=np.int64)
+            intensities = np.empty(0)
+        order = np.argsort(targets, kind="stable")
+        bounds = np.searchsorted(targets[order], np.arange(len(self.mz) + 1))
+        chromatograms = []
+        for pos, target_id in enumerate(self.ids):
+            selection = order[bounds[pos] : bounds[pos + 1]]
+            chromatogram = Chromatogram(None)
+            chromatogram._ID = target_id
+            chromatogram._time = times[selection]
+            chromatogram._i = intensities[selection]
+            chromatograms.append(chromatogram)
+        return chromatograms
+
+
+if __name__ == "__main__":
+    print(__doc__)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Part of pymzml test cases
+
+Points the compiled obo cache to a temporary directory for the whole test
+session, so running the tests does not write into the cache of the user.
+"""
+
+import os
+import shutil
+import tempfile
+
+_CACHE_DIR = None
+_OLD_CACHE_DIR = None
+
+
+def pytest_configure(config):
+    global _CACHE_DIR, _OLD_CACHE_DIR
+    _CACHE_DIR = tempfile.mkdtemp(prefix="pymzml-cache-")
+    _OLD_CACHE_DIR = os.environ.get("PYMZML_CACHE_DIR")
+    os.environ["PYMZML_CACHE_DIR"] = _CACHE_DIR
+
+
+def pytest_unconfigure(config):
+    if _OLD_CACHE_DIR is None:
+        os.environ.pop("PYMZML_CACHE_DIR", None)
+    else:
+        os.environ["PYMZML_CACHE_DIR"] = _OLD_CACHE_DIR
+    shutil.rmtree(_CACHE_DIR, ignore_errors=True)
@@ -3,8 +3,12 @@
 """
 Part of pymzml test cases
 """
+import gzip
 import os
-from pymzml.utils.GSGR import GSGR
+import shutil
+import tempfile
+from pymzml.utils.GSGR import GSGR, BinaryIndex, pack_index
+from pymzml.utils.utils import index_gzip
 import unittest
 import test_file_paths
 
@@ -42,5 +46,72 @@ class GSGRTest(unittest.TestCase):
         self.assertIsNotNone(self.Reader.index)
 
 
+class GSGRBinaryIndexTest(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.mzml = test_file_paths.paths[0]
+        self.path_v1 = os.path.join(self.tmp_dir, "v1.mzML.gz")
+        self.path_v2 = os.path.join(self.tmp_dir, "v2.mzML.gz")
+        index_gzip(self.mzml, self.path_v1, format_version=1)
+        index_gzip(self.mzml, self.path_v2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pack_index(self):
+        index = BinaryIndex(pack_index({3: 30, "TIC": 50, 1: 10, -2: 0, "a": 7}))
+        self.assertFalse(index.blocked)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(list(index), [-2, 1, 3, "TIC", "a"])
+        self.assertEqual(index[3], 30)
+        self.assertEqual(index["TIC"], 50)
+        self.assertNotIn(2, index)
+        self.assertNotIn("3", index)
+
+    def test_read_index_v2(self):
+        reader_v1 = GSGR(self.path_v1)
+        reader_v2 = GSGR(self.path_v2)
+        self.assertTrue(reader_v2.indexed)
+        self.assertEqual(reader_v1.format_version, 1)
+        self.assertEqual(reader_v2.format_version, 2)
+        self.assertEqual(dict(reader_v2.index).keys(), reader_v1.index.keys())
+        for identifier in reader_v1.index:
+            self.assertEqual(
+                reader_v2.read_block(identifier), reader_v1.read_block(identifier)
+            )
+        reader_v1.close()
+        reader_v2.close()
+
+    def test_read_block_from_blocks(self):
+        path = os.path.join(self.tmp_dir, "blocks.mzML.gz")
+        index_gzip(self.mzml, path, block_size=30000)
+        reader_v1 = GSGR(self.path_v1)
+        reader = GSGR(path, block_cache_size=2)
+        self.assertTrue(reader.index.blocked)
+        block_offsets = set()
+        for identifier in reader_v1.index:
+            block_offset, intra_offset, length = reader.index[identifier]
+            block_offsets.add(block_offset)
+            self.assertEqual(
+                reader.read_block(identifier), reader_v1.read_block(identifier)
+            )
+        self.assertLess(len(block_offsets), len(reader_v1.index))
+        self.assertEqual(len(reader._block_cache), 2)
+        with open(self.mzml, "rb") as fin:
+            expected = fin.read()
+        with gzip.open(path, "rb") as fin:
+            self.assertEqual(fin.read(), expected)
+        reader_v1.close()
+        reader.close()
+
+    def test_decompressed_content_unchanged(self):
+        with open(self.mzml, "rb") as fin:
+            expected = fin.read()
+        with gzip.open(self.path_v2, "rb") as fin:
+            self.assertEqual(fin.read(), expected)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=3)
@@ -3,8 +3,14 @@
 """
 Part of pymzml test cases
 """
+import gzip
 import os
+import shutil
+import tempfile
+from pymzml.utils.GSGR import GSGR
 from pymzml.utils.GSGW import GSGW
+from pymzml.utils.utils import index_gzip
+import test_file_paths
 import unittest
 import zlib
 import struct
@@ -175,6 +181,51 @@ class GSGWTest(unittest.TestCase):
         self.assertEqual(identifier.strip("\xAC"), "1")
         self.assertIsInstance(offset.strip("\xAC"), str)
 
+    def test_add_data_blocks(self):
+        path = os.path.abspath(os.path.join(".", "tests", "data", "unittest2.mzml"))
+        blocks = [b"A" * 10, b"B" * 20, b"C" * 5, b"D" * 40]
+        with GSGW(output_path=path, format_version=2, block_size=30) as writer:
+            for identifier, data in enumerate(blocks):
+                writer.add_data(data, identifier)
+            writer.write_index()
+        reader = GSGR(path)
+        self.assertEqual(reader.index[0], (reader.index[1][0], 0, 10))
+        self.assertEqual(reader.index[1][1:], (10, 20))
+        self.assertNotEqual(reader.index[2][0], reader.index[0][0])
+        for identifier, data in enumerate(blocks):
+            self.assertEqual(reader.read_block(identifier), data)
+        reader.close()
+        with gzip.open(path, "rb") as fin:
+            self.assertEqual(fin.read(), b"".join(blocks))
+
+
+class IndexGzipTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.mzml = test_file_paths.paths[0]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_index_gzip_workers(self):
+        with open(self.mzml, "rb") as fin:
+            expected = fin.read()
+        indices = []
+        for workers in [1, 2]:
+            path = os.path.join(self.tmp_dir, "{0}.mzML.gz".format(workers))
+            index_gzip(self.mzml, path, workers=workers)
+            with gzip.open(path, "rb") as fin:
+                self.assertEqual(fin.read(), expected)
+            reader = GSGR(path)
+            indices.append(dict(reader.index))
+            self.assertTrue(reader.read_block(11).strip().startswith(b"<spectrum"))
+            self.assertTrue(reader.read_block(11).endswith(b"</spectrum>"))
+            reader.close()
+        self.assertEqual(indices[0], indices[1])
+        self.assertEqual(
+            set(indices[0]), set(range(1, 12)) | {"Head", "junk", "TIC", "tail"}
+        )
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=3)
@@ -3,7 +3,11 @@
 """
 Part of pymzml test cases
 """
+import gzip
 import os
+import shutil
+import tempfile
+from pymzml.file_classes.standardMzml import StandardMzml
 from pymzml.file_classes.standardGzip import StandardGzip
 import unittest
 import random
@@ -12,6 +16,7 @@ from pymzml.chromatogram import Chromatogram
 import re
 import struct
 import test_file_paths
+from xml.etree.ElementTree import tostring
 
 
 class StandardGzipTest(unittest.TestCase):
@@ -39,6 +44,56 @@ class StandardGzipTest(unittest.TestCase):
         self.assertIsInstance(chrom, Chromatogram)
         self.assertEqual(chrom.ID, ID)
 
+    def test_getitem_from_checkpoints(self):
+        self.File.close()
+        paths = test_file_paths.paths
+        self.File = StandardGzip(
+            paths[1], "latin-1", checkpoint_spacing=2**12, chunk_size=2**10
+        )
+        plain = StandardMzml(paths[0], "latin-1")
+        for ID in [11, 1, 6, "controllerType=0 controllerNumber=1 scan=3"]:
+            item = self.File[ID]
+            expected = plain[ID]
+            self.assertEqual(item.ID, expected.ID)
+            self.assertEqual(tostring(item.element), tostring(expected.element))
+        plain.close()
+        self.assertEqual(self.File["TIC"].ID, "TIC")
+        self.assertGreater(len(self.File._checkpoints), 1)
+
+    def test_getitem_multiple_members(self):
+        with open(test_file_paths.paths[0], "rb") as fin:
+            data = fin.read()
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "members.mzML.gz")
+            with open(path, "wb") as fout:
+                for pos in range(0, len(data), 5000):
+                    fout.write(gzip.compress(data[pos : pos + 5000]))
+            members = StandardGzip(path, "latin-1", chunk_size=2**10)
+            for ID in [2, 9, "TIC"]:
+                self.assertEqual(members[ID].ID, ID)
+            members.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_persistent_index(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "example.mzML.gz")
+            shutil.copy(test_file_paths.paths[1], path)
+            first = StandardGzip(path, "latin-1", persistent_index=True)
+            self.assertEqual(first[5].ID, 5)
+            first.close()
+            self.assertTrue(os.path.exists(path + ".pymzml-idx"))
+
+            second = StandardGzip(path, "latin-1", persistent_index=True)
+            self.assertTrue(second._indexed)
+            self.assertEqual(second.offset_dict, first.offset_dict)
+            self.assertEqual(second[7].ID, 7)
+            second.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=3)
@@ -4,7 +4,10 @@
 Part of pymzml test cases
 """
 import os
+import shutil
+import tempfile
 from pymzml.file_classes.standardMzml import StandardMzml
+from pymzml.utils import sidecar_index
 import unittest
 from pymzml.spec import Spectrum
 from pymzml.chromatogram import Chromatogram
@@ -36,11 +39,112 @@ class StandardMzmlTest(unittest.TestCase):
         self.assertIsInstance(chrom, Chromatogram)
         self.assertEqual(ID, chrom.ID)
 
+    def test_getitem_mmap(self):
+        """ """
+        ids = [k for k in self.standard_mzml.offset_dict if isinstance(k, int)]
+        mmap_specs = [self.standard_mzml[ID] for ID in ids]
+        # force the file handler based access
+        self.standard_mzml._get_buffer = lambda: None
+        for ID, spec in zip(ids, mmap_specs):
+            self.assertEqual(spec.ID, ID)
+            self.assertEqual(spec.to_string(), self.standard_mzml[ID].to_string())
+
     def test_interpol_search(self):
         """ """
         spec = self.standard_mzml._interpol_search(5)
         self.assertIsInstance(spec, Spectrum)
 
+    def test_persistent_index(self):
+        """ """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "example.mzML")
+            shutil.copy(test_file_paths.paths[0], path)
+            written = StandardMzml(path, "latin-1", persistent_index=True)
+            written.close()
+            self.assertTrue(os.path.exists(sidecar_index.sidecar_path(path)))
+
+            loaded = StandardMzml(path, "latin-1", persistent_index=True)
+            offset_dict = loaded.offset_dict
+            self.assertIsInstance(offset_dict, sidecar_index.SidecarOffsetDict)
+            self.assertEqual(offset_dict, self.standard_mzml.offset_dict)
+            self.assertEqual(loaded.seek_list, self.standard_mzml.seek_list)
+            self.assertEqual(loaded[8].ID, 8)
+            loaded.close()
+
+            # outdated sidecar is ignored and rewritten
+            with open(path, "ab") as fout:
+                fout.write(b"\n")
+            self.assertIsNone(sidecar_index.read_sidecar_index(path))
+            rebuilt = StandardMzml(path, "latin-1", persistent_index=True)
+            rebuilt.close()
+            self.assertIsNotNone(sidecar_index.read_sidecar_index(path))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_sidecar_offset_dict(self):
+        """ """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "example.mzML")
+            shutil.copy(test_file_paths.paths[0], path)
+            offset_dict = {3: (300,), 1: (100,), "TIC": None, "b": (20,), "a": 10}
+            sidecar_index.write_sidecar_index(path, offset_dict, [])
+            loaded = sidecar_index.read_sidecar_index(path)["offset_dict"]
+            self.assertEqual(len(loaded), 5)
+            self.assertEqual(loaded[1], (100,))
+            self.assertEqual(loaded["a"], (10,))
+            self.assertIsNone(loaded["TIC"])
+            self.assertNotIn(2, loaded)
+            self.assertNotIn("1", loaded)
+            loaded[2] = (200,)
+            del loaded["b"]
+            self.assertEqual(len(loaded), 5)
+            self.assertEqual(set(loaded), {1, 2, 3, "TIC", "a"})
+            with self.assertRaises(KeyError):
+                loaded["b"]
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_sidecar_write_failure(self):
+        """ """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "example.mzML")
+            shutil.copy(test_file_paths.paths[0], path)
+            # the sidecar can not replace a directory
+            os.mkdir(sidecar_index.sidecar_path(path))
+            with self.assertRaises(OSError):
+                sidecar_index.write_sidecar_index(path, {1: (100,)}, [])
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)), ["example.mzML", "example.mzML.pymzml-idx"]
+            )
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_build_index_from_scratch_parallel(self):
+        """ """
+        with self.standard_mzml.get_binary_file_handler() as seeker:
+            self.standard_mzml.offset_dict = {}
+            self.standard_mzml._build_index_from_scratch(seeker)
+        sequential = self.standard_mzml.offset_dict
+
+        self.standard_mzml.offset_dict = {}
+        with self.standard_mzml.get_binary_file_handler() as seeker:
+            self.standard_mzml._build_index_from_scratch(seeker, workers=2)
+        self.assertEqual(self.standard_mzml.offset_dict, sequential)
+
+        # many small ranges, tags crossing range borders must be stitched
+        parallel = self.standard_mzml._scan_data_indices_parallel(
+            3, min_range_size=1000
+        )
+        chroms, specs, chromcnt, speccnt = parallel
+        self.assertEqual(len(specs), 11)
+        self.assertEqual(chromcnt, 1)
+        self.assertEqual(speccnt, 2918)
+        for native_id, offset in specs.items():
+            self.assertEqual(sequential[native_id], (offset,))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=3)
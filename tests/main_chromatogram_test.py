@@ -47,6 +47,11 @@ class ChromatogramTest(unittest.TestCase):
         else:
             self.assertIsInstance(profile, list)
 
+    def test_slots(self):
+        self.assertFalse(hasattr(self.chrom, "__dict__"))
+        self.assertIsNone(self.chrom._noise_level_estimate)
+        self.assertEqual(self.chrom.noise_level_estimate, {})
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=3)
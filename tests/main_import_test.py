@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Part of pymzml test cases
+"""
+import os
+import subprocess
+import sys
+import unittest
+
+# generous budget in microseconds for importing pymzml without numpy, which
+# guards against heavy imports sneaking back into the import path
+IMPORT_BUDGET = 500000
+
+LAZY_MODULES = [
+    "regex",
+    "multiprocessing",
+    "importlib.metadata",
+    "concurrent.futures",
+    "pymzml.plot",
+    "pymzml.decoder",
+    "pymzml.ms_numpress",
+    "pymzml.utils",
+    "pymzml.utils.utils",
+    "pymzml.utils.GSGR",
+    "pymzml.utils.sidecar_index",
+    "ms_deisotope",
+    "scipy",
+    "plotly",
+]
+
+
+def _import_pymzml(code):
+    """Import pymzml in a fresh interpreter and return stdout and stderr."""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pymzml\n" + code],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout, result.stderr
+
+
+class ImportTest(unittest.TestCase):
+    def test_lazy_modules_not_imported(self):
+        stdout, _ = _import_pymzml(
+            "import sys\n"
+            "print(' '.join(m for m in {0!r} if m in sys.modules))".format(
+                LAZY_MODULES
+            )
+        )
+        self.assertEqual(stdout.strip(), "")
+
+    def test_lazy_attributes(self):
+        stdout, _ = _import_pymzml(
+            "print(pymzml.plot.__name__, pymzml.utils.__name__, "
+            "pymzml.spec.DECON_DEP in (True, False), "
+            "pymzml.MSDecoder is not None)"
+        )
+        self.assertEqual(
+            stdout.split(), ["pymzml.plot", "pymzml.utils", "True", "True"]
+        )
+
+    def test_import_time(self):
+        _, stderr = _import_pymzml("")
+        cumulative = {}
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+        pymzml_time = cumulative["pymzml"] - cumulative.get("numpy", 0)
+        self.assertLess(pymzml_time, IMPORT_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=3)
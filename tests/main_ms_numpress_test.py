@@ -1,3 +1,4 @@
+import base64
 import unittest
 import struct
 import math
@@ -7,6 +8,7 @@ try:
 except:
     np = None
 
+import pymzml.ms_numpress as ms_numpress
 from pymzml.ms_numpress import MSNumpress
 
 
@@ -204,6 +206,43 @@ class test_MSNumpress(unittest.TestCase):
         decoded_array = self.Decoder.decode_pic()
         self.assertCountEqual(self.i_slof_data, decoded_array)
 
+    def test_decode_pic_consecutive_zeros(self):
+        """ """
+        self.Decoder.decoded_data = [0, 0, 0, 5, 0, 0, 16, 0]
+        encoded_array = self.Decoder.encode_pic()
+        decoded_array = ms_numpress.decode_pic(encoded_array)
+        self.assertIsInstance(decoded_array, np.ndarray)
+        self.assertEqual(decoded_array.tolist(), [0, 0, 0, 5, 0, 0, 16, 0])
+
+    def test_decode_pic_reference_data(self):
+        """ """
+        # intensity array of tests/data/mini_numpress.chrom.mzML, encoded
+        # with the C implementation
+        encoded_array = base64.b64decode(
+            "iIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIiIhqRl1d8VjyWFNbQlRh"
+            "apYTiIiIiIZxiIiIhnGIiIiIiIiIiIiIiIiIiIhpGIiIiIiIiIiIiIiIiIiIiIiIiIiI"
+            "bBA="
+        )
+        decoded_array = self.Decoder.decode_pic(encoded_array)
+        self.assertEqual(len(decoded_array), 176)
+        nonzero = np.flatnonzero(decoded_array)
+        self.assertEqual(
+            nonzero.tolist(), [76, 77, 78, 79, 80, 81, 82, 83, 84, 94, 102, 133, 175]
+        )
+        self.assertEqual(
+            decoded_array[nonzero].tolist(),
+            [74, 213, 509, 760, 856, 587, 356, 154, 49, 23, 23, 25, 28],
+        )
+
+    def test_decode_linear_negative_differences(self):
+        """ """
+        test_array = np.array([500.5, 500.25, 499.0, 499.0, 499.5, 498.0, 501.0])
+        self.Decoder.decoded_data = test_array
+        encoded_array = self.Decoder.encode_linear()
+        decoded_array = ms_numpress.decode_linear(encoded_array)
+        self.assertEqual(len(decoded_array), len(test_array))
+        np.testing.assert_allclose(decoded_array, test_array, atol=1e-4)
+
     def test_encode_decode_fixed_point(self):
         encoded_fixed_point = self.Decoder._encode_fixed_point(self.fixed_point)
         decoded_fixed_point = self.Decoder._decode_fixed_point(encoded_fixed_point)
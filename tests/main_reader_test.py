@@ -7,10 +7,15 @@ import os
 import re
 import pymzml.run as run
 import unittest
+import numpy as np
 from pymzml.spec import Spectrum, Chromatogram
 import test_file_paths
 
 
+def _spectrum_summary(spectrum):
+    return spectrum.ID, spectrum.ms_level, len(spectrum.peaks("raw"))
+
+
 class runTest(unittest.TestCase):
     """ """
 
@@ -204,6 +209,130 @@ class runTest(unittest.TestCase):
         reader = run.Reader(self.paths[0])
         self.assertEqual(reader.get_chromatogram_count(), None)
 
+    def test_get_spectra(self):
+        ids = [10, 5, 3, 5, 1]
+        for reader in (
+            self.reader_uncompressed_indexed,
+            self.reader_compressed_indexed,
+        ):
+            spectra = list(reader.get_spectra(ids, batch_size=4))
+            self.assertEqual([s.ID for s in spectra], ids)
+            for spectrum, identifier in zip(spectra, ids):
+                expected = reader[identifier]
+                self.assertEqual(spectrum.measured_precision, 5e-6)
+                self.assertEqual(
+                    spectrum.peaks("raw").tolist(), expected.peaks("raw").tolist()
+                )
+
+    def test_get_chromatograms(self):
+        reader = run.Reader(self.paths[3], build_index_from_scratch=True)
+        ids = [
+            "54036_LEKELEEKKEALELAIDQASR/3_y6",
+            "DECOY_24891_FLEQHGVNFQEINIDEHPEK/3_y6",
+        ]
+        chromatograms = list(reader.get_chromatograms(ids))
+        self.assertEqual([c.ID for c in chromatograms], ids)
+        for chrom in chromatograms:
+            expected = reader[chrom.ID]
+            self.assertEqual(chrom.peaks().tolist(), expected.peaks().tolist())
+
+    def test_imap(self):
+        reader = run.Reader(self.paths[0])
+        # the index of example.mzML lists the first 10 of 11 spectra only
+        expected = [_spectrum_summary(spectrum) for spectrum in reader]
+        self.assertEqual(len(expected), 11)
+        results = list(reader.imap(_spectrum_summary, workers=2, chunksize=3))
+        self.assertEqual(results, expected)
+        results = reader.imap(_spectrum_summary, workers=2, chunksize=3, ordered=False)
+        self.assertEqual(sorted(results), sorted(expected))
+
+    def test_imap_identifiers(self):
+        reader = run.Reader(self.paths[0])
+        identifiers, offset_dict = reader._imap_identifiers(2)
+        # the scanned TIC chromatogram is not processed as a chunk element
+        self.assertEqual(len(identifiers), 11)
+        self.assertNotIn("TIC", identifiers)
+        self.assertIsNot(offset_dict, reader.info["offset_dict"])
+
+    def test_imap_identifiers_complete_index(self):
+        reader = run.Reader(self.paths[0])
+        reader.info["spectrum_count"] = 10
+        file_handler = reader.info["file_object"].file_handler
+        # a complete index is used without scanning the file
+        file_handler._scan_data_indices_parallel = None
+        identifiers, offset_dict = reader._imap_identifiers(2)
+        self.assertEqual(identifiers, list(range(1, 11)))
+        self.assertIs(offset_dict, reader.info["offset_dict"])
+
+    def test_reader_offset_dict(self):
+        offset_dict = run.Reader(self.paths[0]).info["offset_dict"]
+        reader = run.Reader(self.paths[0], offset_dict=offset_dict)
+        self.assertIs(reader.info["offset_dict"], offset_dict)
+        self.assertEqual(reader[5].ID, 5)
+
+    def test_reopen_keeps_index(self):
+        reader = run.Reader(self.paths[1])
+        self.assertEqual(reader[5].ID, 5)
+        checkpoint_index = reader.info["file_object"].file_handler.checkpoint_index
+        self.assertIsNotNone(checkpoint_index)
+        ids = [spectrum.ID for spectrum in reader]
+        # iterating to the end reopens the file
+        file_handler = reader.info["file_object"].file_handler
+        self.assertIs(file_handler.checkpoint_index[1], checkpoint_index[1])
+        self.assertEqual([spectrum.ID for spectrum in reader], ids)
+        self.assertEqual(reader[7].ID, 7)
+
+        reader = run.Reader(self.paths[0])
+        offset_dict = reader.info["offset_dict"]
+        list(reader)
+        self.assertIs(reader.info["file_object"].offset_dict, offset_dict)
+
+    def test_imap_serial_fallback(self):
+        reader = run.Reader(self.paths[1])
+        expected = [_spectrum_summary(spectrum) for spectrum in reader]
+        results = list(reader.imap(_spectrum_summary, workers=2))
+        self.assertEqual(results, expected)
+
+    def test_prefetch(self):
+        expected = [_spectrum_summary(s) for s in run.Reader(self.paths[0])]
+        with run.Reader(self.paths[0], prefetch=2) as reader:
+            for _ in range(2):
+                results = [_spectrum_summary(spectrum) for spectrum in reader]
+                self.assertEqual(results, expected)
+            first = next(reader)
+            self.assertLessEqual(reader._prefetch_queue.qsize(), 2)
+            self.assertEqual(reader[5].ID, 5)
+            self.assertEqual(next(reader).ID, first.ID + 1)
+            thread = reader._prefetch_thread
+            self.assertTrue(thread.is_alive())
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(reader._prefetch_thread)
+
+    def test_iter_headers(self):
+        for path in (self.paths[0], self.paths[1]):
+            expected = [
+                (s.ID, s.ms_level, s.scan_time, s.TIC) for s in run.Reader(path)
+            ]
+            reader = run.Reader(path)
+            headers = list(reader.iter_headers())
+            self.assertEqual(
+                [(s.ID, s.ms_level, s.scan_time, s.TIC) for s in headers], expected
+            )
+            for header in headers:
+                self.assertIsNone(header.element.find(".//{*}binaryDataArrayList"))
+
+    def test_get_headers(self):
+        reader = run.Reader(self.paths[0])
+        headers = reader.get_headers()
+        self.assertEqual(len(headers), 11)
+        self.assertEqual(headers["id"].tolist(), list(range(1, 12)))
+        self.assertEqual(headers["index"].tolist(), list(range(11)))
+        self.assertTrue((headers["ms_level"] == 1).all())
+        spectrum = run.Reader(self.paths[0])[3]
+        self.assertAlmostEqual(headers["scan_time"][2], spectrum.scan_time_in_minutes())
+        self.assertAlmostEqual(headers["tic"][2], spectrum.TIC)
+        self.assertTrue(np.isnan(headers["precursor_mz"]).all())
+
     def test_readers_remeber_spawned_spectra(self):
         """
         Make multiple Readers, spawn 10 spectra each, mix them
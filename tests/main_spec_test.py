@@ -8,6 +8,9 @@ from pymzml.chromatogram import Chromatogram
 import random
 import statistics as stat
 import unittest
+import xml.etree.ElementTree as ElementTree
+import math
+import numpy as np
 import test_file_paths
 from pprint import pprint
 
@@ -19,6 +22,52 @@ except:
     numpy_installed = False
 
 
+def _centroid_reference(mz_array, i_array):
+    """Previous loop based centroiding, kept as regression reference."""
+    tmp = []
+    for pos, i in enumerate(i_array[:-1]):
+        if pos <= 1:
+            continue
+        if 0 < i_array[pos - 1] < i > i_array[pos + 1] > 0:
+            x1, y1 = mz_array[pos - 1], i_array[pos - 1]
+            x2, y2 = mz_array[pos], i_array[pos]
+            x3, y3 = mz_array[pos + 1], i_array[pos + 1]
+            if x2 - x1 > (x3 - x2) * 10 or (x2 - x1) * 10 < x3 - x2:
+                continue
+            if y3 == y1:
+                y3 += 0.01 * y1
+            try:
+                double_log = math.log(y2 / y1) / math.log(y3 / y1)
+                mue = (double_log * (x1 * x1 - x3 * x3) - x1 * x1 + x2 * x2) / (
+                    2 * (x2 - x1) - 2 * double_log * (x3 - x1)
+                )
+                c_squarred = (x2 * x2 - x1 * x1 - 2 * x2 * mue + 2 * x1 * mue) / (
+                    2 * math.log(y1 / y2)
+                )
+                A = y1 * math.exp((x1 - mue) * (x1 - mue) / (2 * c_squarred))
+            except ZeroDivisionError:
+                continue
+            tmp.append((mue, A))
+    return tmp
+
+
+def _reprofile_reference(peaks, measured_precision, internal_precision):
+    """Previous dict based reprofiling, kept as regression reference."""
+    tmp = {}
+    for mz, i in peaks:
+        s = mz * measured_precision * 2
+        s2 = s * s
+        floor = mz - 5.0 * s
+        ceil = mz + 5.0 * s
+        ip = internal_precision / 4
+        for _ in range(int(round(floor * ip)), int(round(ceil * ip)) + 1):
+            if _ % int(5) == 0:
+                a = float(_) / float(ip)
+                y = i * math.exp(-1 * ((mz - a) * (mz - a)) / (2 * s2))
+                tmp[a] = tmp.get(a, 0) + y
+    return sorted(tmp.items())
+
+
 class SpectrumTest(unittest.TestCase):
     """ """
 
@@ -92,6 +141,26 @@ class SpectrumTest(unittest.TestCase):
         self.assertIsNotNone(r_peaks)
         # self.assertEqual(r_peaks, [(1, 10),(2, 20),(3, 30),(4, 40)])
 
+    def test_reprofile_peaks_regression(self):
+        centroids = [(100.0, 200.0), (100.001, 50.0), (250.5, 1e5), (1200.3, 7.5)]
+        self.spec.set_peaks(centroids, "centroided")
+        self.spec.set_peaks(None, "reprofiled")
+        expected = np.array(
+            _reprofile_reference(
+                centroids,
+                self.spec.measured_precision,
+                self.spec.internal_precision,
+            )
+        )
+        r_peaks = self.spec.peaks("reprofiled")
+        self.assertIsInstance(r_peaks, np.ndarray)
+        self.assertEqual(r_peaks.shape, expected.shape)
+        self.assertTrue((np.diff(r_peaks[:, 0]) > 0).all())
+        np.testing.assert_array_equal(r_peaks[:, 0], expected[:, 0])
+        np.testing.assert_allclose(r_peaks[:, 1], expected[:, 1], rtol=1e-12)
+        # the reprofiled array is cached
+        self.assertIs(self.spec.peaks("reprofiled"), r_peaks)
+
     def test_centroid_peaks(self):
         """ """
         self.spec.set_peaks([(1, 10), (2, 20), (3, 30), (4, 40)], "centroided")
@@ -112,6 +181,31 @@ class SpectrumTest(unittest.TestCase):
         peaks = self.spec.peaks("centroided")
         self.assertPeaksIdentical(peaks, new_peaks)
 
+    def test_centroid_profile_spectrum(self):
+        element = ElementTree.fromstring(
+            '<spectrum xmlns="http://psi.hupo.org/ms/mzml" id="scan=1">'
+            '<cvParam accession="MS:1000128" name="profile spectrum" value=""/>'
+            "</spectrum>"
+        )
+        rng = np.random.default_rng(42)
+        mz = np.linspace(400, 410, 20000)
+        i = np.zeros_like(mz) + rng.uniform(1, 5, len(mz))
+        for mu in rng.uniform(400.1, 409.9, 30):
+            i += rng.uniform(1e3, 1e6) * np.exp(-((mz - mu) ** 2) / (2 * 0.002**2))
+        spec = Spectrum(element)
+        spec.obo_translator = self.Run.OT
+        spec.set_peaks(np.column_stack((mz, i)), "raw")
+        peaks = spec.peaks("centroided")
+        self.assertIsInstance(peaks, np.ndarray)
+        self.assertEqual(peaks.shape[1], 2)
+        expected = _centroid_reference(mz.tolist(), i.tolist())
+        self.assertEqual(len(peaks), len(expected))
+        expected = np.array(expected)
+        np.testing.assert_allclose(peaks[:, 0], expected[:, 0], rtol=1e-9)
+        # fits of flat noise maxima are ill-conditioned, allow rounding
+        # differences between math and numpy log/exp
+        np.testing.assert_allclose(peaks[:, 1], expected[:, 1], rtol=1e-3)
+
     def test_median(self):
         array = [1, 4, 6, 7, 2, 5, 7, 23.324, 5.0, -4.4, 0]
         res = self.spec._median(array)
@@ -227,6 +321,25 @@ class SpectrumTest(unittest.TestCase):
         self.assertAlmostEqual(hits[0][0], i)
         self.assertIsNotNone(hits2[0][0], i)
 
+    def test_has_peak_matches_transformed_mz_with_error(self):
+        spec = self.Run[3]
+        queries = np.concatenate(
+            [spec.mz, spec.mz * (1 + 4e-6), spec.mz * (1 - 6e-6), [1.0, 1e5]]
+        )
+        tmz = spec.transformed_mz_with_error
+        for mz, found in zip(queries, spec.has_peaks(queries)):
+            expected = tmz.get(spec.transform_mz(mz), [])
+            self.assertEqual(spec.has_peak(mz), expected)
+            self.assertEqual([tuple(peak) for peak in found], expected)
+
+    def test_has_peaks_unsorted(self):
+        peaks = np.array([(300.0, 3), (100.0, 1), (200.0, 2)])
+        self.spec.set_peaks(peaks, "centroided")
+        found = self.spec.has_peaks([200.0, 100.0005, 150.0])
+        self.assertEqual(found[0].tolist(), [[200.0, 2]])
+        self.assertEqual(found[1].tolist(), [[100.0, 1]])
+        self.assertEqual(found[2].shape, (0, 2))
+
     def test_transform_mz(self):
         """ """
         mz = 213.33333333333333
@@ -252,6 +365,133 @@ class SpectrumTest(unittest.TestCase):
         cos = self.spec.similarity_to(spec2)
         self.assertLess(cos, 1)
 
+    def test_similarity_to_rounding(self):
+        """ """
+        spec1 = run.Reader(self.paths[0])[1]
+        spec2 = run.Reader(self.paths[0])[1]
+        spec1.set_peaks([(100.2, 3), (100.4, 4), (200.6, 5)], "raw")
+        spec2.set_peaks([(100.1, 3), (201.4, 5), (300.0, 1)], "raw")
+        # rounded to full m/z: {100: 7, 201: 5} vs {100: 3, 201: 5, 300: 1}
+        expected = (7 * 3 + 5 * 5) / (math.sqrt(7**2 + 5**2) * math.sqrt(35))
+        self.assertAlmostEqual(spec1.similarity_to(spec2), expected)
+        # binned by 0.5 m/z: {200: 7, 401: 5} vs {200: 3, 402: 5, 600: 1}
+        expected = 7 * 3 / (math.sqrt(7**2 + 5**2) * math.sqrt(35))
+        self.assertAlmostEqual(spec1.similarity_to(spec2, bin_width=0.5), expected)
+        spec2.set_peaks([], "raw")
+        self.assertEqual(spec1.similarity_to(spec2), 0.0)
+
+    def test_similarity_matrix(self):
+        """ """
+        spectra = list(run.Reader(self.paths[0]))
+        empty = run.Reader(self.paths[0])[1]
+        empty.set_peaks([], "raw")
+        spectra.append(empty)
+        for kwargs in ({}, {"round_precision": 1}, {"bin_width": 1.0}):
+            cosines = Spectrum.similarity_matrix(spectra, **kwargs)
+            self.assertEqual(cosines.shape, (len(spectra), len(spectra)))
+            for x, spec1 in enumerate(spectra):
+                for y, spec2 in enumerate(spectra):
+                    self.assertAlmostEqual(
+                        cosines[x, y], spec1.similarity_to(spec2, **kwargs)
+                    )
+            np.testing.assert_allclose(np.diag(cosines)[:-1], 1)
+            self.assertEqual(cosines[-1, -1], 0)
+
+    def test_raw_peaks_decoded_once(self):
+        """ """
+        spec = run.Reader(self.paths[0])[1]
+        mz = np.array(spec.mz)
+        i = np.array(spec.i)
+        peaks = spec.peaks("raw")
+        self.assertEqual(peaks.shape, (len(mz), 2))
+        np.testing.assert_array_equal(peaks[:, 0], mz)
+        np.testing.assert_array_equal(peaks[:, 1], i)
+        self.assertIs(spec.peaks("raw"), peaks)
+        self.assertIs(spec.mz, spec._mz)
+
+    def test_raw_peaks_independent_of_arrays(self):
+        spec = run.Reader(self.paths[0])[1]
+        i_dtype = spec.i.dtype
+        peaks = spec.peaks("raw")
+        self.assertFalse(np.shares_memory(spec.mz, peaks))
+        self.assertFalse(np.shares_memory(spec.i, peaks))
+        self.assertEqual(spec.i.dtype, i_dtype)
+        self.assertTrue(spec.mz.flags["C_CONTIGUOUS"])
+        self.assertTrue(spec.i.flags["C_CONTIGUOUS"])
+        first_i = spec.i[0]
+        peaks[0, 1] = -1
+        self.assertEqual(spec.i[0], first_i)
+        spec = Spectrum()
+        spec._mz = np.arange(3, dtype=np.float64)
+        spec._i = np.arange(3, dtype=np.float32)
+        spec.peaks("raw")
+        self.assertEqual(spec.i.dtype, np.float32)
+
+    def test_slots(self):
+        spec = run.Reader(self.paths[0])[1]
+        self.assertFalse(hasattr(spec, "__dict__"))
+        with self.assertRaises(AttributeError):
+            spec.not_an_attribute = 1
+        self.assertIsNone(spec._peak_cache)
+        self.assertIsNone(spec._noise_level_estimate)
+        spec.peaks("raw")
+        self.assertIsNotNone(spec._peak_cache)
+        spec.estimated_noise_level(mode="median")
+        self.assertIn("median", spec.noise_level_estimate)
+
+    def test_detach(self):
+        reference = run.Reader(self.paths[0])[5]
+        spec = run.Reader(self.paths[0])[5]
+        self.assertIs(spec.detach(), spec)
+        self.assertIsNone(spec.element)
+        self.assertIsNone(spec._binary_arrays)
+        self.assertEqual(spec.ID, reference.ID)
+        self.assertEqual(spec.index, reference.index)
+        self.assertEqual(spec.id_dict, reference.id_dict)
+        self.assertEqual(spec.ms_level, reference.ms_level)
+        self.assertEqual(spec.scan_time, reference.scan_time)
+        self.assertEqual(spec.scan_time_in_minutes(), reference.scan_time_in_minutes())
+        self.assertEqual(spec.TIC, reference.TIC)
+        self.assertEqual(spec["MS:1000504"], reference["MS:1000504"])
+        self.assertEqual(spec.get("filter string"), reference.get("filter string"))
+        np.testing.assert_array_equal(spec.peaks("raw"), reference.peaks("raw"))
+        np.testing.assert_array_equal(
+            spec.peaks("centroided"), reference.peaks("centroided")
+        )
+
+    def test_detach_precursors(self):
+        element = ElementTree.fromstring(
+            '<spectrum xmlns="http://psi.hupo.org/ms/mzml" index="1" '
+            'id="scan=2" defaultArrayLength="0">'
+            '<cvParam accession="MS:1000511" name="ms level" value="2"/>'
+            '<precursorList count="1"><precursor spectrumRef="scan=1">'
+            "<selectedIonList><selectedIon>"
+            '<cvParam accession="MS:1000744" name="selected ion m/z" '
+            'value="445.34"/>'
+            '<cvParam accession="MS:1000041" name="charge state" value="2"/>'
+            "</selectedIon></selectedIonList></precursor></precursorList>"
+            "</spectrum>"
+        )
+        spec = Spectrum(element, obo_version="4.1.79").detach()
+        self.assertEqual(
+            spec.selected_precursors,
+            [{"mz": 445.34, "charge": 2, "precursor id": "1"}],
+        )
+        self.assertEqual(spec.precursors, ["1"])
+        self.assertEqual(spec.ms_level, 2)
+        self.assertEqual(len(spec.peaks("raw")), 0)
+
+    def test_reader_detach(self):
+        reference = list(run.Reader(self.paths[0]))
+        spectra = list(run.Reader(self.paths[0], detach=True))
+        self.assertEqual(len(spectra), len(reference))
+        for spec, ref_spec in zip(spectra, reference):
+            self.assertIsNone(spec.element)
+            self.assertEqual(spec.ID, ref_spec.ID)
+            np.testing.assert_array_equal(spec.mz, ref_spec.mz)
+            np.testing.assert_array_equal(spec.i, ref_spec.i)
+        self.assertIsNone(run.Reader(self.paths[0], detach=True)[3].element)
+
     def test_peaks_are_set(self):
         spec = self.spec
         spec.set_peaks([(1000, 10)], "raw")
@@ -488,6 +728,39 @@ class SpectrumTest(unittest.TestCase):
         self.assertIsInstance(scan_time, float)
         self.assertEqual(scan_time, 0.023756566)
 
+    def test_accession_lookup(self):
+        element = ElementTree.fromstring(
+            '<spectrum xmlns="http://psi.hupo.org/ms/mzml" id="scan=7">'
+            '<cvParam accession="MS:1000511" name="ms level" value="2"/>'
+            '<cvParam accession="MS:1000285" name="total ion current" value="12.5"/>'
+            "<scanList><scan>"
+            '<cvParam accession="MS:1000016" name="scan start time" value="3.5"'
+            ' unitName="second"/>'
+            "</scan></scanList>"
+            '<precursorList><precursor spectrumRef="scan=6">'
+            "<selectedIonList><selectedIon>"
+            '<cvParam accession="MS:1000744" name="selected ion m/z" value="445.3"/>'
+            '<cvParam accession="MS:1000041" name="charge state" value="2"/>'
+            "</selectedIon></selectedIonList>"
+            "</precursor></precursorList>"
+            "</spectrum>"
+        )
+        spec = Spectrum(element)
+        self.assertEqual(spec.ms_level, 2)
+        self.assertEqual(spec.TIC, 12.5)
+        self.assertEqual(spec.scan_time, (3.5, "second"))
+        self.assertEqual(spec["MS:1000744"], 445.3)
+        precursor = spec.selected_precursors[0]
+        self.assertEqual(precursor["mz"], 445.3)
+        self.assertEqual(precursor["charge"], 2)
+        self.assertEqual(precursor["precursor id"], "6")
+        self.assertEqual(
+            set(spec._get_params()),
+            {"MS:1000511", "MS:1000285", "MS:1000016", "MS:1000744", "MS:1000041"},
+        )
+        # the TIC is only read from direct children of the spectrum
+        self.assertIsNone(spec._find_param("MS:1000744", direct=True))
+
     def test_get_all_arrays_in_spec(self):
         assert self.spec.get_all_arrays_in_spec() == ["m/z array", "intensity array"]
 
@@ -10,6 +10,12 @@ import os
 sys.path.append(os.path.abspath("."))
 import unittest
 import gzip
+import pickle
+import shutil
+import tempfile
+import threading
+
+from pymzml import obo
 
 
 class TestRound(unittest.TestCase):
@@ -54,5 +60,97 @@ class TestOboVersion(unittest.TestCase):
             self._check_version(v, _v)
 
 
+class TestCompiledCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.old_cache_dir = os.environ.get("PYMZML_CACHE_DIR")
+        os.environ["PYMZML_CACHE_DIR"] = self.cache_dir
+        self.cache_file = os.path.join(self.cache_dir, "psi-ms-4.1.79.obo.pickle")
+
+    def tearDown(self):
+        if self.old_cache_dir is None:
+            del os.environ["PYMZML_CACHE_DIR"]
+        else:
+            os.environ["PYMZML_CACHE_DIR"] = self.old_cache_dir
+        shutil.rmtree(self.cache_dir)
+
+    def test_warm_cache(self):
+        self.assertEqual(obo.warm_cache(["4.1.79"]), ["4.1.79"])
+        self.assertTrue(os.path.exists(self.cache_file))
+        cached = obo.OboTranslator("4.1.79")
+        try:
+            obo.OboTranslator.use_compiled_cache = False
+            parsed = obo.OboTranslator("4.1.79")
+            parsed.parseOBO()
+        finally:
+            obo.OboTranslator.use_compiled_cache = True
+        self.assertEqual(cached["MS:1000016"], parsed["MS:1000016"])
+        self.assertEqual(cached["positive scan"], parsed["positive scan"])
+        self.assertEqual(cached.all_dicts, parsed.all_dicts)
+        self.assertIs(cached.id["MS:1000016"], cached.name["scan start time"])
+
+    def test_load_from_cache(self):
+        obo.warm_cache(["4.1.79"])
+        with open(self.cache_file, "rb") as fin:
+            header = pickle.load(fin)
+        marker = {"id": "MS:1000016", "name": "from cache"}
+        with open(self.cache_file, "wb") as fout:
+            pickle.dump(header, fout)
+            pickle.dump(([marker], {"MS:1000016": marker}, {}, {}), fout)
+        self.assertEqual(obo.OboTranslator("4.1.79")["MS:1000016"], "from cache")
+
+    def test_invalidated_cache(self):
+        with open(self.cache_file, "wb") as fout:
+            pickle.dump((obo.COMPILED_CACHE_FORMAT, "outdated"), fout)
+            pickle.dump(([{"id": "MS:1000016", "name": "stale"}], {}, {}, {}), fout)
+        translator = obo.OboTranslator("4.1.79")
+        self.assertEqual(translator["MS:1000016"], "scan start time")
+        with open(self.cache_file, "rb") as fin:
+            self.assertNotEqual(pickle.load(fin)[1], "outdated")
+
+    def test_write_failure(self):
+        translator = obo.OboTranslator("4.1.79")
+        # locks can not be pickled
+        translator.definition["lock"] = threading.Lock()
+        cache_file = os.path.join(self.cache_dir, "failing.obo.pickle")
+        with self.assertRaises(TypeError):
+            translator._write_compiled_cache("failing.obo", "hash")
+        self.assertFalse(os.path.exists(cache_file))
+        self.assertEqual(
+            [name for name in os.listdir(self.cache_dir) if name.endswith(".tmp")],
+            [],
+        )
+
+
+class TestAccessionTable(unittest.TestCase):
+    def setUp(self):
+        self.translator = obo.OboTranslator.from_cache("4.1.79")
+
+    def test_lookups(self):
+        table = self.translator.accessions
+        self.assertIs(table, self.translator.accessions)
+        self.assertEqual(table.name_to_id["64-bit float"], "MS:1000523")
+        self.assertEqual(table.id_to_name["MS:1000016"], "scan start time")
+        for name, accession in table.name_to_id.items():
+            self.assertEqual(self.translator[name]["id"], accession)
+
+    def test_binary_accessions(self):
+        table = self.translator.accessions
+        self.assertEqual(
+            table.binary_data_type_ids,
+            tuple(
+                self.translator[name]["id"] for name in table.BINARY_DATA_TYPES
+            ),
+        )
+        self.assertIn("MS:1000574", table.compressions)  # zlib compression
+        self.assertIn("MS:1002312", table.compressions)  # numpress linear
+        self.assertNotIn("MS:1000523", table.compressions)
+        self.assertEqual(
+            table.data_type({"MS:1000514": "m/z array", "MS:1000523": None}),
+            "MS:1000523",
+        )
+        self.assertIsNone(table.data_type({"MS:1000514": "m/z array"}))
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=3)
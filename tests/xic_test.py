@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Part of pymzml test cases
+"""
+import unittest
+
+import numpy as np
+
+import pymzml.run as run
+from pymzml.chromatogram import Chromatogram
+from pymzml.xic import XICExtractor
+import test_file_paths
+
+
+class XICTest(unittest.TestCase):
+    """ """
+
+    def setUp(self):
+        """ """
+        self.paths = test_file_paths.paths
+        self.targets = [70.06575775, 136.06178, 500.0]
+
+    def test_extract(self):
+        extractor = XICExtractor(self.targets, precision=5e-6, ids=["a", "b", "c"])
+        chromatograms = extractor.extract(run.Reader(self.paths[0]))
+        self.assertEqual([c.ID for c in chromatograms], ["a", "b", "c"])
+        spectra = [s for s in run.Reader(self.paths[0]) if s.ms_level == 1]
+        for chromatogram, target in zip(chromatograms, self.targets):
+            self.assertIsInstance(chromatogram, Chromatogram)
+            expected_i = []
+            for spectrum in spectra:
+                peaks = spectrum.peaks("centroided")
+                mask = np.abs(peaks[:, 0] - target) <= target * 5e-6
+                expected_i.append(peaks[mask, 1].sum())
+            np.testing.assert_allclose(
+                chromatogram.time, [s.scan_time_in_minutes() for s in spectra]
+            )
+            np.testing.assert_allclose(chromatogram.i, expected_i, rtol=1e-9)
+        self.assertTrue((chromatograms[0].i > 0).all())
+        self.assertTrue((chromatograms[2].i == 0).all())
+
+    def test_rt_window(self):
+        extractor = XICExtractor(
+            self.targets, rt_start=[0.01, None, 1.0], rt_end=[0.03, 0.02, None]
+        )
+        chromatograms = extractor.extract(run.Reader(self.paths[0]))
+        self.assertTrue(
+            ((chromatograms[0].time >= 0.01) & (chromatograms[0].time <= 0.03)).all()
+        )
+        self.assertTrue((chromatograms[1].time <= 0.02).all())
+        self.assertEqual(len(chromatograms[1].time), 5)
+        self.assertEqual(len(chromatograms[2].time), 0)
+
+    def test_ms_level(self):
+        extractor = XICExtractor(self.targets, ms_level=2)
+        chromatograms = extractor.extract(run.Reader(self.paths[0]))
+        self.assertEqual([len(c.time) for c in chromatograms], [0, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=3)